@@ -0,0 +1,118 @@
+import threading
+from config import ANALYSIS_CACHE_MAX_ENTRIES
+from utils.logger import setup_logger
+
+logger = setup_logger("analysis_cache")
+
+class AnalysisCache:
+    """
+    Content-addressed cache of full video analyses.
+
+    Results are keyed by the BLAKE2b hash of the video bytes and stored in the
+    events database, so re-uploading the same clip under any filename skips
+    the analysis pipeline, the LLM call and the event embeddings.
+    """
+
+    # Counters are shared by every instance in the process
+    _stats_lock = threading.Lock()
+    _hits = 0
+    _misses = 0
+
+    def __init__(self, db, max_entries=ANALYSIS_CACHE_MAX_ENTRIES):
+        """
+        Initialize the cache on top of an EventDB.
+
+        Parameters:
+            db (EventDB): Database holding the cache table and events
+            max_entries (int): Maximum number of cached analyses (0 disables the cache)
+        """
+        self.db = db
+        self.max_entries = max_entries
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def lookup(self, content_hash):
+        """
+        Find the cached analysis for a video.
+
+        Parameters:
+            content_hash (str): BLAKE2b hex digest of the video
+
+        Returns:
+            dict: {'video_filename', 'llm_analysis'} or None on a miss
+        """
+        if not self.enabled or not content_hash:
+            return None
+
+        cached = self.db.get_cached_analysis(content_hash)
+        with AnalysisCache._stats_lock:
+            if cached is None:
+                AnalysisCache._misses += 1
+            else:
+                AnalysisCache._hits += 1
+        if cached is not None:
+            logger.info(f"Analysis cache hit for {content_hash} (originally {cached['video_filename']})")
+        return cached
+
+    def store(self, content_hash, video_filename, llm_analysis):
+        """
+        Cache the analysis of a video.
+
+        Parameters:
+            content_hash (str): BLAKE2b hex digest of the video
+            video_filename (str): Filename the events were saved under
+            llm_analysis (dict): The LLM analysis
+        """
+        if not self.enabled or not content_hash or not llm_analysis:
+            return
+        self.db.save_cached_analysis(content_hash, video_filename, llm_analysis, self.max_entries)
+
+    def link_events(self, cached, video_filename, content_hash):
+        """
+        Make the events of a cached analysis available under a new filename.
+
+        The events under the filename the analysis was cached with are only used
+        if they were still saved from this video: another video may have been
+        uploaded under that name since. They are reused as is when the filename
+        is the same, and otherwise copied along with their embeddings. In every
+        other case the cached analysis is saved again.
+
+        Parameters:
+            cached (dict): Result of lookup()
+            video_filename (str): Filename of the new upload
+            content_hash (str): BLAKE2b hex digest of the new upload
+
+        Returns:
+            list: Event IDs for the new filename
+        """
+        source_filename = cached['video_filename']
+        if self.db.get_video_content_hash(source_filename) == content_hash:
+            if source_filename == video_filename:
+                existing = self.db.get_events_by_filename(video_filename)
+                if existing:
+                    return [event['id'] for event in existing]
+            else:
+                # Checks the hash again in its transaction, the source may be replaced meanwhile
+                saved_ids = self.db.copy_events(source_filename, video_filename, content_hash)
+                if saved_ids:
+                    return saved_ids
+        return self.db.save_llm_analysis(cached['llm_analysis'], video_filename, content_hash)
+
+    @classmethod
+    def stats(cls):
+        """
+        Return hit/miss counters of this process.
+
+        Returns:
+            dict: Hits, misses and hit rate
+        """
+        with cls._stats_lock:
+            hits, misses = cls._hits, cls._misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0
+        }
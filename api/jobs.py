@@ -0,0 +1,207 @@
+"""
+Background job queue for video analysis.
+
+Analysing a video takes minutes and is CPU bound, so the upload endpoint only
+enqueues a job and returns its id. A bounded pool of worker threads runs the
+jobs; the event loop stays free to serve chat requests meanwhile.
+"""
+
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from utils.logger import correlation_id
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+    def __init__(self, retry_after):
+        super().__init__("Analysis queue is full")
+        self.retry_after = retry_after
+
+
+class Job:
+    def __init__(self, func, args, description=None):
+        """
+        A unit of work tracked by the JobQueue.
+
+        Parameters:
+            func (Callable): Function to run in a worker thread.
+            args (tuple): Positional arguments for func.
+            description (str, optional): Human readable label (e.g. the video filename).
+        """
+        self.id = uuid.uuid4().hex
+        self.func = func
+        self.args = args
+        self.description = description
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self):
+        """Returns the public view of the job."""
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "description": self.description,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error
+        }
+
+
+class JobQueue:
+    def __init__(self, num_workers=1, max_queue_size=8, max_history=1000, default_retry_after=30):
+        """
+        Initialize a bounded job queue served by a fixed number of worker threads.
+
+        Parameters:
+            num_workers (int): Number of worker threads.
+            max_queue_size (int): Maximum number of jobs waiting to run.
+            max_history (int): Number of finished jobs kept for status polling.
+            default_retry_after (int): Retry-After seconds used before any job has finished.
+        """
+        self.num_workers = num_workers
+        self.max_queue_size = max_queue_size
+        self.max_history = max_history
+        self.default_retry_after = default_retry_after
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._busy = 0
+        self._durations = []
+        self._workers = []
+        self._started = False
+
+    def start(self):
+        """Start the worker threads (idempotent)."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"analysis-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        logger.info(f"Started {self.num_workers} analysis workers (queue size {self.max_queue_size})")
+
+    def submit(self, func, *args, description=None):
+        """
+        Enqueue a job.
+
+        Parameters:
+            func (Callable): Function to run in a worker thread. Its return value becomes the job result.
+            *args: Positional arguments for func.
+            description (str, optional): Human readable label for the job.
+
+        Returns:
+            Job: The queued job.
+
+        Raises:
+            QueueFullError: If the queue is at capacity.
+        """
+        self.start()
+        job = Job(func, args, description)
+        # Register before queueing so a worker or a status poll never sees an unknown job
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+            raise QueueFullError(self.retry_after())
+
+        with self._lock:
+            self._prune_history()
+        return job
+
+    def is_full(self):
+        """Returns True if a submit would currently be rejected."""
+        return self._queue.full()
+
+    def get(self, job_id):
+        """Returns the job with the given id or None."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def retry_after(self):
+        """
+        Estimate in seconds until a queue slot frees up, based on recent job durations.
+        """
+        with self._lock:
+            if not self._durations:
+                return self.default_retry_after
+            average = sum(self._durations) / len(self._durations)
+        return max(1, int(average / max(1, self.num_workers)))
+
+    def stats(self):
+        """
+        Returns queue depth and worker utilization.
+
+        Returns:
+            dict: Queue and worker statistics.
+        """
+        with self._lock:
+            busy = self._busy
+            counts = {QUEUED: 0, RUNNING: 0, COMPLETED: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_size": self.max_queue_size,
+            "workers": self.num_workers,
+            "busy_workers": busy,
+            "utilization": busy / self.num_workers if self.num_workers else 0.0,
+            "jobs": counts
+        }
+
+    def _prune_history(self):
+        """Drop the oldest finished jobs beyond max_history. Caller holds the lock."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in (COMPLETED, FAILED)]
+        for job_id in finished[:max(0, len(finished) - self.max_history)]:
+            del self._jobs[job_id]
+
+    def _worker_loop(self):
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                self._busy += 1
+                job.status = RUNNING
+                job.started_at = time.time()
+            try:
+                logger.info(f"Running job {job.id} ({job.description})")
+                # Everything logged through setup_logger while the job runs carries its id
+                with correlation_id(job.id):
+                    result = job.func(*job.args)
+                with self._lock:
+                    job.result = result
+                    job.status = COMPLETED
+            except Exception as e:
+                logger.error(f"Job {job.id} failed: {str(e)}", exc_info=True)
+                with self._lock:
+                    job.error = str(e)
+                    job.status = FAILED
+            finally:
+                with self._lock:
+                    job.finished_at = time.time()
+                    self._busy -= 1
+                    self._durations = (self._durations + [job.finished_at - job.started_at])[-20:]
+                    self._prune_history()
+                self._queue.task_done()
@@ -1,6 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 import logging
+from config import WARM_UP_MODELS, POSTGRES_URL, OPENAI_API_KEY, OPENAI_EMBEDDING_MODEL, JOB_BACKEND, EVENT_STORE
+from db_pool import close_pools
+from async_event_db import close_async_pools
+from event_db import init_schema
+from video_analyzer.model_registry import model_registry, warm_up_models
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -30,6 +36,44 @@ async def root():
     logger.info("Root endpoint called")
     return {"status": "ok", "message": "Video Highlights Chat API is running"}
 
+@app.on_event("startup")
+async def init_database():
+    """Create the database schema once instead of on every request."""
+    if EVENT_STORE == "local":
+        # A configuration error, unlike an unreachable database, should stop the API
+        from local_event_db import check_single_process
+        check_single_process()
+    try:
+        await run_in_threadpool(init_schema, POSTGRES_URL, OPENAI_API_KEY, OPENAI_EMBEDDING_MODEL)
+        logger.info("Database schema initialized")
+    except Exception as e:
+        # Not fatal: the first request retries the initialization
+        logger.error(f"Database schema initialization failed: {e}")
+
+@app.on_event("shutdown")
+async def close_database():
+    """Close the pooled database connections."""
+    close_pools()
+    await close_async_pools()
+
+@app.on_event("startup")
+async def load_models():
+    """Optionally load all analysis models before serving requests."""
+    if WARM_UP_MODELS:
+        logger.info("Warming up analysis models...")
+        await run_in_threadpool(warm_up_models)
+        logger.info(f"Models loaded: {model_registry.status()}")
+
+@app.get("/ready")
+async def ready():
+    """Report which models are loaded and how long each load took."""
+    models = model_registry.status()
+    return {
+        "status": "ready" if models else "cold",
+        "warm_up": WARM_UP_MODELS,
+        "models": models
+    }
+
 # Add back video routes
 logger.info("Importing video routes...")
 from .routes import video
@@ -40,4 +84,12 @@ logger.info("Importing chat routes...")
 from .routes import chat
 app.include_router(chat.router, prefix="/api", tags=["chat"])
 
+@app.on_event("startup")
+async def start_workers():
+    """Start the analysis worker threads, unless worker.py processes run the jobs."""
+    if JOB_BACKEND == "postgres":
+        logger.info("Analysis jobs are queued in the jobs table for worker processes")
+        return
+    video.job_queue.start()
+
 logger.info("FastAPI app setup complete") 
\ No newline at end of file
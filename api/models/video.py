@@ -0,0 +1,94 @@
+"""
+Pydantic models for the video API.
+
+This module defines the data structures used by the video processing routes:
+- JobStatus: State of a queued video analysis job
+- QueueStats: Depth of the analysis queue and worker utilization
+- UploadInit, UploadStatus, UploadFinalize: Resumable chunked upload protocol
+"""
+
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+
+class JobStatus(BaseModel):
+    """
+    State of a video analysis job.
+    
+    Attributes:
+        job_id: Unique identifier for the job
+        status: One of "queued", "running", "completed" or "failed"
+        description: Label of the job, usually the video filename
+        created_at: Unix time the job was enqueued
+        started_at: Unix time a worker picked the job up, if it has started
+        finished_at: Unix time the job finished, if it has finished
+        result: Processing results once the job has completed
+        error: Error message if the job failed
+        stage: Pipeline stage the job is in (jobs run by worker.py processes only)
+        attempts: Number of times a worker claimed the job (jobs run by worker.py processes only)
+    """
+    job_id: str
+    status: str
+    description: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    stage: Optional[str] = None
+    attempts: Optional[int] = None
+
+class QueueStats(BaseModel):
+    """
+    Analysis queue statistics.
+    
+    Attributes:
+        queue_depth: Number of jobs waiting for a worker
+        max_queue_size: Capacity of the queue
+        workers: Number of worker threads (live worker processes with JOB_BACKEND=postgres)
+        busy_workers: Number of workers currently running a job
+        utilization: Fraction of busy workers
+        jobs: Number of tracked jobs per status
+    """
+    queue_depth: int
+    max_queue_size: int
+    workers: int
+    busy_workers: int
+    utilization: float
+    jobs: Dict[str, int]
+
+class UploadInit(BaseModel):
+    """
+    Request to start a chunked upload.
+    
+    Attributes:
+        filename: Original filename of the video
+        size: Total size of the video in bytes
+    """
+    filename: str
+    size: int
+
+class UploadStatus(BaseModel):
+    """
+    Progress of a chunked upload.
+    
+    Attributes:
+        upload_id: Unique identifier for the upload
+        filename: Original filename of the video
+        size: Total size of the video in bytes
+        offset: Number of bytes received so far; the next chunk must start here
+        complete: Whether all bytes have been received
+    """
+    upload_id: str
+    filename: str
+    size: int
+    offset: int
+    complete: bool
+
+class UploadFinalize(BaseModel):
+    """
+    Request to finish a chunked upload.
+    
+    Attributes:
+        blake2b: Optional BLAKE2b (32 byte digest) hex checksum of the whole file, verified before analysis
+    """
+    blake2b: Optional[str] = None
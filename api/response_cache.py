@@ -0,0 +1,163 @@
+"""
+In-process cache of rendered event listings.
+
+Clients poll GET /events/{video_filename} while a video is analyzed, but a
+video's events only change when an analysis is saved. Each cached response
+records the version of the video it was rendered from (see
+EventDB.get_video_version). Within the TTL it is served without touching the
+database; after that one version lookup revalidates it. Analysis jobs of this
+process invalidate a video's entries as soon as they save its events, the TTL
+bounds how long writes from other processes go unnoticed.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from config import EVENTS_CACHE_TTL, EVENTS_CACHE_MAX_ENTRIES, EVENTS_CACHE_MAX_BODY_BYTES
+
+logger = logging.getLogger(__name__)
+
+
+def version_etag(version):
+    """ETag of a listing rendered from a version of a video's events."""
+    return f'"v{version}"'
+
+
+def etag_matches(if_none_match, etag):
+    """
+    Check an If-None-Match header against an ETag.
+
+    Parameters:
+        if_none_match (str, optional): Header value, a list of ETags or "*"
+        etag (str): Current ETag
+
+    Returns:
+        bool: Whether the client's copy is current
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in candidates]
+
+
+class CachedResponse:
+    def __init__(self, version, body, media_type, headers, ttl):
+        """
+        A rendered response and the version of the video it shows.
+
+        Parameters:
+            version (int): Version of the video's events
+            body (bytes): Response body
+            media_type (str): Content type
+            headers (dict): Extra response headers, e.g. X-Next-Cursor
+            ttl (float): Seconds until the entry must be revalidated
+        """
+        self.version = version
+        self.body = body
+        self.media_type = media_type
+        self.headers = headers
+        self.expires_at = time.monotonic() + ttl
+
+    def fresh(self):
+        return time.monotonic() < self.expires_at
+
+
+class ResponseCache:
+    def __init__(self, ttl=EVENTS_CACHE_TTL, max_entries=EVENTS_CACHE_MAX_ENTRIES,
+                 max_body_bytes=EVENTS_CACHE_MAX_BODY_BYTES):
+        """
+        LRU cache of rendered responses keyed by (video_filename, variant).
+
+        Parameters:
+            ttl (float): Seconds an entry is served without revalidation (0 disables the cache)
+            max_entries (int): Maximum number of cached responses
+            max_body_bytes (int): Larger responses are not cached
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_body_bytes = max_body_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key, version=None):
+        """
+        Look up a response.
+
+        Parameters:
+            key (tuple): (video_filename, variant)
+            version (int, optional): Current version of the video. Without it only
+                fresh entries are returned; with it an expired entry of the same
+                version is renewed for another TTL.
+
+        Returns:
+            CachedResponse: The entry, or None
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if version is not None:
+                    self.misses += 1
+                return None
+            if version is None:
+                if not entry.fresh():
+                    return None
+                self.hits += 1
+            elif entry.version == version:
+                entry.expires_at = time.monotonic() + self.ttl
+                self.revalidated += 1
+            else:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, version, body, media_type="application/json", headers=None):
+        """Store a rendered response, unless the cache is disabled or the body too large."""
+        if not self.enabled or len(body) > self.max_body_bytes:
+            return
+        with self._lock:
+            self._entries[key] = CachedResponse(version, body, media_type, headers or {}, self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, video_filename):
+        """Drop every cached response of a video, called after its events were written."""
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == video_filename]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += 1
+        if keys:
+            logger.info(f"Invalidated {len(keys)} cached event listings of {video_filename}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Returns hit/miss counters of this process."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "ttl": self.ttl
+            }
@@ -3,40 +3,39 @@ Chat API routes for video highlights.
 
 This module provides the FastAPI routes for the chat functionality:
 - POST /api/chat: Search for video events based on natural language queries
-- Database connection management
+- GET /api/chat/cache: Hit rates of the embedding cache
+- Database access through an async connection pool
 - Error handling for chat operations
 """
 
 from fastapi import APIRouter, Depends, HTTPException
 from typing import Optional
 from api.models.chat import ChatRequest, ChatResponse, Event
-from event_db import EventDB
+from async_event_db import AsyncEventDB, open_async_event_db
+from embedding_cache import EmbeddingCache
 from config import POSTGRES_URL, OPENAI_API_KEY, OPENAI_EMBEDDING_MODEL
 
 router = APIRouter()
 
-def get_db():
+async def get_db():
     """
-    Dependency to get database connection.
+    Dependency to get database access.
     
-    Creates and yields a database connection, ensuring it's properly closed after use.
+    Returns an AsyncEventDB; queries borrow connections from the process-wide
+    async pool, so they don't block the event loop.
     Uses configuration from environment variables.
     
-    Yields:
-        EventDB: Database connection instance
+    Returns:
+        AsyncEventDB: Database access instance
     """
-    db = EventDB(
+    return open_async_event_db(
         db_url=POSTGRES_URL,
         openai_api_key=OPENAI_API_KEY,
         embedding_model=OPENAI_EMBEDDING_MODEL
     )
-    try:
-        yield db
-    finally:
-        db.close()
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest, db: EventDB = Depends(get_db)):
+async def chat(request: ChatRequest, db: AsyncEventDB = Depends(get_db)):
     """
     Search for events based on a natural language query.
     
@@ -56,13 +55,23 @@ async def chat(request: ChatRequest, db: EventDB = Depends(get_db)):
     try:
         if request.query == '__GET_ALL_EVENTS__':
             # If query is the special marker, get all events by filename
-            events = db.get_events_by_filename(request.video_filename)
+            events = await db.get_events_by_filename(request.video_filename)
         else:
-            # Otherwise, perform a semantic search
-            events = db.search_events(request.query, request.limit)
+            # Otherwise, perform a semantic search within the video
+            events = await db.search_events(request.query, request.limit, request.video_filename)
         return ChatResponse(
             events=[Event(**event) for event in events],
             total_results=len(events)
         )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e)) 
+
+@router.get("/chat/cache")
+async def get_embedding_cache_stats():
+    """
+    Get hit/miss counters of the embedding cache.
+    
+    Returns:
+        dict: Hits of the in-process and Postgres tiers, misses and hit rate
+    """
+    return EmbeddingCache.stats()
@@ -2,19 +2,35 @@
 Video processing routes for the API.
 
 This module provides endpoints for:
-- Uploading and processing videos
-- Getting analysis results
+- Uploading videos (single-shot or resumable chunked) and queueing them for processing
+- Polling analysis jobs, queue and analysis cache statistics
+- Getting analysis results, paginated or streamed as NDJSON for large videos, with
+  ETags and an in-process cache for clients that poll them
 """
 
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Request, Query
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from typing import List, Optional
 from api.models.chat import Event
+from api.models.video import JobStatus, QueueStats, UploadInit, UploadStatus, UploadFinalize
+from api.jobs import JobQueue, QueueFullError
+from api.uploads import UploadManager, UploadError, save_upload_file
+from api.response_cache import ResponseCache, version_etag, etag_matches
+import json
 import logging
 import os
+import uuid
 from pathlib import Path
 from video_analyzer.analyze_video import AnalyzeVideo
-from event_db import EventDB
-from config import OPENAI_API_KEY, OPENAI_MODEL, OPENAI_EMBEDDING_MODEL, POSTGRES_URL, OUTPUT_DIR
+from event_db import open_event_db
+from async_event_db import AsyncEventDB, open_async_event_db
+from analysis_cache import AnalysisCache
+from job_store import JobStore, LeaseLostError
+from config import (OPENAI_API_KEY, OPENAI_MODEL, OPENAI_EMBEDDING_MODEL, POSTGRES_URL, OUTPUT_DIR,
+                    ANALYSIS_WORKERS, ANALYSIS_QUEUE_SIZE, ANALYSIS_CACHE_MAX_ENTRIES, JOB_BACKEND,
+                    EVENT_STREAM_BATCH_SIZE, EVENT_PAGE_MAX_SIZE)
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -22,120 +38,496 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-def get_db():
-    """Get database connection."""
-    db = EventDB(
+# Shared by all requests of this process
+job_queue = JobQueue(num_workers=ANALYSIS_WORKERS, max_queue_size=ANALYSIS_QUEUE_SIZE)
+upload_manager = UploadManager(OUTPUT_DIR / "uploads")
+event_list_cache = ResponseCache()
+_job_store = None
+
+def get_job_store():
+    """Jobs table for JOB_BACKEND=postgres, run by worker.py processes instead of job_queue."""
+    global _job_store
+    if _job_store is None:
+        _job_store = JobStore(POSTGRES_URL)
+    return _job_store
+
+async def get_db():
+    """Get async database access backed by the process-wide pool."""
+    return open_async_event_db(
         db_url=POSTGRES_URL,
         openai_api_key=OPENAI_API_KEY,
         embedding_model=OPENAI_EMBEDDING_MODEL
     )
-    try:
-        yield db
-    finally:
-        db.close()
 
-@router.post("/upload")
-async def upload_video(
-    file: UploadFile = File(...),
-    db: EventDB = Depends(get_db)
-):
+def analyze_video_job(video_path, video_filename, content_hash=None, progress=None):
     """
-    Upload and process a video file.
+    Run the full analysis pipeline for an uploaded video.
+    
+    Executed by a job queue worker thread or a worker.py process, so it borrows its
+    own pooled database connection. If a video with the same content was analyzed
+    before, the cached analysis is reused without decoding the video. Saving
+    replaces the video's events, so a job that runs again writes them once.
     
     Parameters:
-        file: The video file to upload
-        db: Database connection (injected by FastAPI)
+        video_path (Path): Location of the uploaded video
+        video_filename (str): Original filename of the video
+        content_hash (str, optional): BLAKE2b hex digest of the video
+        progress (Callable[[str], None], optional): Called with the name of each stage as it starts.
+            A worker.py process raises LeaseLostError from it once another worker reclaimed the job;
+            the job then stops without saving and leaves the video to that worker.
     
     Returns:
         dict: Processing results
     """
-    temp_path = None
+    report = progress or (lambda stage: None)
+    db = None
+    owned = True
     try:
-        logger.info(f"Received upload request for file: {file.filename}")
-        
-        # Create output directory if it doesn't exist
-        os.makedirs(OUTPUT_DIR, exist_ok=True)
-        
-        # Save uploaded file temporarily
-        temp_path = OUTPUT_DIR / file.filename
-        logger.info(f"Saving uploaded file to: {temp_path}")
+        db = open_event_db(
+            db_url=POSTGRES_URL,
+            openai_api_key=OPENAI_API_KEY,
+            embedding_model=OPENAI_EMBEDDING_MODEL
+        )
+        cache = AnalysisCache(db)
         
-        with open(temp_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        report("analysis_cache")
+        cached = cache.lookup(content_hash)
+        if cached is not None:
+            logger.info(f"Reusing cached analysis for video: {video_filename}")
+            report("saving")
+            saved_ids = cache.link_events(cached, video_filename, content_hash)
+            event_list_cache.invalidate(video_filename)
+            return {
+                "message": "File processed successfully",
+                "filename": video_filename,
+                "events_saved": len(saved_ids),
+                "analysis": cached['llm_analysis'],
+                "cached": True
+            }
         
         # Initialize video analyzer
         analyzer = AnalyzeVideo(OPENAI_API_KEY, OPENAI_MODEL, OUTPUT_DIR)
         
         # Process video
-        logger.info(f"Starting analysis of video: {file.filename}")
-        results = analyzer.process_video(str(temp_path))
+        logger.info(f"Starting analysis of video: {video_filename}")
+        results = analyzer.process_video(str(video_path), content_hash, progress=report)
         
         # Get LLM analysis
         logger.info("Getting LLM analysis of video")
+        report("llm_analysis")
         llm_analysis = analyzer.get_llm_analysis(results)
         
         # Save events to database
         logger.info("Saving events to database")
-        saved_ids = db.save_llm_analysis(llm_analysis, file.filename)
+        report("saving")
+        saved_ids = db.save_llm_analysis(llm_analysis, video_filename, content_hash)
+        event_list_cache.invalidate(video_filename)
+        if saved_ids:
+            cache.store(content_hash, video_filename, llm_analysis)
         
         return {
             "message": "File processed successfully",
-            "filename": file.filename,
+            "filename": video_filename,
             "events_saved": len(saved_ids),
-            "analysis": llm_analysis
+            "analysis": llm_analysis,
+            "cached": False
         }
+    except LeaseLostError:
+        owned = False
+        raise
+    finally:
+        if db is not None:
+            db.close()
+        if owned:
+            try:
+                report("cleanup")
+            except LeaseLostError:
+                owned = False
+        if owned:
+            remove_temp_file(video_path)
+
+def remove_temp_file(path):
+    """Delete a temporary upload, logging rather than raising on failure."""
+    if path and os.path.exists(path):
+        try:
+            os.remove(path)
+            logger.info(f"Cleaned up temporary file: {path}")
+        except Exception as e:
+            logger.error(f"Error cleaning up temporary file: {str(e)}", exc_info=True)
+
+def temp_video_path(filename):
+    """Unique location for an uploaded video so concurrent uploads of the same name don't collide."""
+    return OUTPUT_DIR / f"{uuid.uuid4().hex}_{os.path.basename(filename)}"
+
+async def queue_retry_after():
+    """
+    Check whether the analysis queue is full.
+    
+    Returns:
+        int: Seconds to retry after if the queue is full, otherwise None
+    """
+    if JOB_BACKEND == "postgres":
+        store = get_job_store()
+        if await run_in_threadpool(store.is_full):
+            return await run_in_threadpool(store.retry_after)
+        return None
+    return job_queue.retry_after() if job_queue.is_full() else None
+
+async def enqueue_analysis(video_path, video_filename, content_hash=None):
+    """
+    Queue an analysis job for a video that is already on disk.
+    
+    Raises:
+        HTTPException: 429 with a Retry-After header if the analysis queue is full
+    """
+    if JOB_BACKEND == "postgres":
+        retry_after = await queue_retry_after()
+        if retry_after is not None:
+            logger.warning(f"Analysis queue full, rejecting video {video_filename}")
+            raise HTTPException(
+                status_code=429,
+                detail="Analysis queue is full, please retry later",
+                headers={"Retry-After": str(retry_after)}
+            )
+        # Workers on other hosts find the video at the same path on the shared volume
+        job = await run_in_threadpool(
+            get_job_store().submit, "analyze_video",
+            {"video_path": str(video_path), "video_filename": video_filename, "content_hash": content_hash},
+            video_filename
+        )
+        logger.info(f"Queued job {job['job_id']} for video: {video_filename}")
+        return job
+    
+    try:
+        job = job_queue.submit(analyze_video_job, video_path, video_filename, content_hash,
+                               description=video_filename)
+    except QueueFullError as e:
+        logger.warning(f"Analysis queue full, rejecting video {video_filename}")
+        raise HTTPException(
+            status_code=429,
+            detail="Analysis queue is full, please retry later",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    logger.info(f"Queued job {job.id} for video: {video_filename}")
+    return job.to_dict()
+
+@router.post("/upload", status_code=202, response_model=JobStatus)
+async def upload_video(file: UploadFile = File(...)):
+    """
+    Upload a video file and enqueue it for analysis.
+    
+    Parameters:
+        file: The video file to upload
+    
+    Returns:
+        JobStatus: The queued job; poll /api/video/jobs/{job_id} for the results
+    
+    Raises:
+        HTTPException: 429 with a Retry-After header if the analysis queue is full
+    """
+    temp_path = None
+    try:
+        logger.info(f"Received upload request for file: {file.filename}")
+        
+        # Create output directory if it doesn't exist
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        
+        # Stream uploaded file to disk; the job removes it when done
+        temp_path = temp_video_path(file.filename)
+        logger.info(f"Saving uploaded file to: {temp_path}")
+        size, content_hash = await save_upload_file(file, temp_path)
+        logger.info(f"Saved {size} bytes (blake2b {content_hash})")
+        
+        return await enqueue_analysis(temp_path, file.filename, content_hash)
         
+    except HTTPException:
+        remove_temp_file(temp_path)
+        raise
     except Exception as e:
         logger.error(f"Error in upload_video: {str(e)}", exc_info=True)
+        remove_temp_file(temp_path)
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        # Clean up temporary file
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.remove(temp_path)
-                logger.info(f"Cleaned up temporary file: {temp_path}")
-            except Exception as e:
-                logger.error(f"Error cleaning up temporary file: {str(e)}", exc_info=True)
+
+async def get_upload_or_404(upload_id):
+    upload = await upload_manager.get(upload_id)
+    if upload is None:
+        raise HTTPException(status_code=404, detail=f"Upload {upload_id} not found")
+    return upload
+
+@router.post("/uploads", status_code=201, response_model=UploadStatus)
+async def init_upload(request: UploadInit):
+    """
+    Start a resumable chunked upload.
+    
+    Parameters:
+        request: Filename and total size of the video
+    
+    Returns:
+        UploadStatus: The new upload; send chunks to PUT /api/video/uploads/{upload_id}
+    """
+    try:
+        return upload_manager.create(request.filename, request.size).to_dict()
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+@router.get("/uploads/{upload_id}", response_model=UploadStatus)
+async def get_upload(upload_id: str):
+    """
+    Get the progress of a chunked upload, e.g. to resume after a disconnect.
+    
+    Parameters:
+        upload_id: Id returned when the upload was started
+    
+    Returns:
+        UploadStatus: Current offset of the upload
+    """
+    return (await get_upload_or_404(upload_id)).to_dict()
+
+@router.put("/uploads/{upload_id}", response_model=UploadStatus)
+async def put_upload_chunk(upload_id: str, offset: int, request: Request):
+    """
+    Append a chunk to an upload. The raw request body is streamed to disk.
+    
+    Parameters:
+        upload_id: Id returned when the upload was started
+        offset: Byte offset of the chunk, must equal the current upload offset
+        request: The raw request carrying the chunk bytes
+    
+    Returns:
+        UploadStatus: Upload progress after the chunk was written
+    """
+    upload = await get_upload_or_404(upload_id)
+    try:
+        await upload_manager.write_chunk(upload, offset, request.stream())
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    return upload.to_dict()
+
+@router.post("/uploads/{upload_id}/finalize", status_code=202, response_model=JobStatus)
+async def finalize_upload(upload_id: str, request: Optional[UploadFinalize] = None):
+    """
+    Finish a chunked upload and enqueue the video for analysis.
+    
+    Parameters:
+        upload_id: Id returned when the upload was started
+        request: Optional checksum of the whole file
+    
+    Returns:
+        JobStatus: The queued analysis job
+    """
+    upload = await get_upload_or_404(upload_id)
+    retry_after = await queue_retry_after()
+    if retry_after is not None:
+        # Keep the upload on disk so the client can finalize it again later
+        raise HTTPException(
+            status_code=429,
+            detail="Analysis queue is full, please retry later",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+    # The queue may fill up after the check above; a rejected enqueue moves the
+    # video back into the upload instead of losing it
+    async def enqueue(video_path, content_hash):
+        return await enqueue_analysis(video_path, upload.filename, content_hash)
+
+    try:
+        _, job = await upload_manager.finalize(
+            upload, temp_video_path(upload.filename), request.blake2b if request else None, on_complete=enqueue
+        )
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    return job
+
+@router.delete("/uploads/{upload_id}", status_code=204)
+async def cancel_upload(upload_id: str):
+    """
+    Abort a chunked upload and delete its partial data.
+    
+    Parameters:
+        upload_id: Id returned when the upload was started
+    """
+    upload_manager.discard(await get_upload_or_404(upload_id))
+
+@router.get("/jobs", response_model=QueueStats)
+async def get_queue_stats():
+    """
+    Get analysis queue depth and worker utilization.
+    
+    Returns:
+        QueueStats: Queue statistics (of the whole worker fleet with JOB_BACKEND=postgres)
+    """
+    if JOB_BACKEND == "postgres":
+        return await run_in_threadpool(get_job_store().stats)
+    return job_queue.stats()
+
+@router.get("/cache")
+async def get_cache_stats():
+    """
+    Get hit/miss counters of the content-addressed analysis cache and the event listing cache.
+    
+    Returns:
+        dict: Cache statistics of this process
+    """
+    return {
+        **AnalysisCache.stats(),
+        "max_entries": ANALYSIS_CACHE_MAX_ENTRIES,
+        "event_listings": event_list_cache.stats()
+    }
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """
+    Get the status of an analysis job.
+    
+    Parameters:
+        job_id: Id returned by /upload
+    
+    Returns:
+        JobStatus: Current state of the job, including results once completed
+    """
+    if JOB_BACKEND == "postgres":
+        job = await run_in_threadpool(get_job_store().get, job_id)
+    else:
+        job = job_queue.get(job_id)
+        job = job.to_dict() if job is not None else None
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+def encode_cursor(event):
+    """Cursor of the page following an event: its (timestamp, id) sort key."""
+    return f"{float(event['timestamp'])!r}:{event['id']}"
+
+def parse_cursor(cursor):
+    """
+    Parse a cursor returned in X-Next-Cursor.
+    
+    Returns:
+        tuple: (timestamp, id), or None without a cursor
+    """
+    if cursor is None:
+        return None
+    try:
+        timestamp, event_id = cursor.rsplit(":", 1)
+        return float(timestamp), int(event_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {cursor}")
+
+def _event_json(event):
+    # Plain dicts, validating one Event model per row dominates the cost of large listings
+    return {**event, 'timestamp': float(event['timestamp']), 'similarity': 1.0}
+
+async def _ndjson_lines(events):
+    """Serialize events as NDJSON, one chunk per EVENT_STREAM_BATCH_SIZE events."""
+    lines = []
+    async for event in events:
+        lines.append(json.dumps(_event_json(event)) + "\n")
+        if len(lines) >= EVENT_STREAM_BATCH_SIZE:
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
+
+async def _render_events(db, video_filename, limit, cursor):
+    """
+    Query and serialize a video's events.
+    
+    Returns:
+        Tuple[bytes, dict]: JSON body and extra headers
+    """
+    if limit is not None or cursor is not None:
+        events = await db.get_events_page(video_filename, limit, cursor)
+        headers = {}
+        if limit is not None and len(events) == limit:
+            headers["X-Next-Cursor"] = encode_cursor(events[-1])
+        return JSONResponse([_event_json(event) for event in events]).body, headers
+
+    events = await db.get_events_by_filename(video_filename)
+    logger.info(f"Found {len(events)} events in database")
+    
+    # Convert events to Event model
+    event_models = []
+    for event in events:
+        try:
+            event_models.append(Event(
+                id=event['id'],
+                timestamp=event['timestamp'],
+                description=event['description'],
+                video_id=event['video_id'],
+                video_filename=event['video_filename'],
+                llm_summary=event['llm_summary'],
+                similarity=1.0  # Default similarity for direct database queries
+            ))
+        except Exception as e:
+            logger.error(f"Error converting event to model: {str(e)}", exc_info=True)
+            continue
+    return JSONResponse(jsonable_encoder(event_models)).body, {}
 
 @router.get("/events/{video_filename}", response_model=List[Event])
 async def get_video_events(
     video_filename: str,
-    db: EventDB = Depends(get_db)
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=EVENT_PAGE_MAX_SIZE),
+    after: Optional[str] = None,
+    format: str = "json",
+    db: AsyncEventDB = Depends(get_db)
 ):
     """
-    Get all events for a specific video.
+    Get the events of a specific video in timestamp order.
+    
+    Without parameters all events are returned at once. With limit, one page is
+    returned and the X-Next-Cursor header holds the after value of the next page
+    (absent on the last page). With format=ndjson the events are streamed from a
+    database cursor, one JSON object per line, so memory stays flat for any video length.
+    
+    Responses carry an ETag derived from the video's version; a request whose
+    If-None-Match still matches gets 304 Not Modified. JSON responses are cached
+    in process and invalidated when the video's events are saved.
     
     Parameters:
         video_filename: Name of the video file
+        request: Incoming request, for If-None-Match
+        limit: Page size
+        after: Cursor of the previous page
+        format: "json" or "ndjson"
         db: Database connection (injected by FastAPI)
     
     Returns:
         List[Event]: List of events for the video
     """
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    cursor = parse_cursor(after)
+    key = (video_filename, (format, limit, cursor))
+    
     try:
-        logger.info(f"Received request for events of video: {video_filename}")
-        events = db.get_events_by_filename(video_filename)
-        logger.info(f"Found {len(events)} events in database")
+        # A fresh cached response answers without a database round trip
+        entry = event_list_cache.get(key) if format == "json" else None
+        # Read the version before the events: a concurrent write then at worst
+        # tags newer events with an older version, which only costs a refetch
+        version = entry.version if entry else await db.get_video_version(video_filename)
+        etag = version_etag(version)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
         
-        # Convert events to Event model
-        event_models = []
-        for event in events:
-            try:
-                event_models.append(Event(
-                    id=event['id'],
-                    timestamp=event['timestamp'],
-                    description=event['description'],
-                    video_id=event['video_id'],
-                    video_filename=event['video_filename'],
-                    llm_summary=event['llm_summary'],
-                    similarity=1.0  # Default similarity for direct database queries
-                ))
-            except Exception as e:
-                logger.error(f"Error converting event to model: {str(e)}", exc_info=True)
-                continue
+        if format == "ndjson":
+            logger.info(f"Streaming events of video: {video_filename}")
+            return StreamingResponse(
+                _ndjson_lines(db.stream_events(video_filename, cursor, limit)),
+                media_type="application/x-ndjson",
+                headers=headers
+            )
         
-        return event_models
+        if entry is None:
+            entry = event_list_cache.get(key, version)
+        if entry is None:
+            logger.info(f"Received request for events of video: {video_filename}")
+            body, extra_headers = await _render_events(db, video_filename, limit, cursor)
+            event_list_cache.put(key, version, body, headers=extra_headers)
+        else:
+            body, extra_headers = entry.body, entry.headers
+        return Response(body, media_type="application/json", headers={**extra_headers, **headers})
     except Exception as e:
         logger.error(f"Error in get_video_events: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -7,6 +7,7 @@ import requests
 import os
 import json
 import sys
+import time
 from pathlib import Path
 import logging
 
@@ -14,7 +15,7 @@ import logging
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
-from event_db import EventDB
+from event_db import open_event_db
 from config import POSTGRES_URL, OPENAI_API_KEY, OPENAI_EMBEDDING_MODEL
 
 # Set up logging
@@ -72,8 +73,13 @@ def test_video_upload(video_path):
             logger.info(f"Upload response status: {response.status_code}")
             
             print(f"Status: {response.status_code}")
-            if response.status_code == 200:
-                result = response.json()
+            if response.status_code == 202:
+                job = response.json()
+                logger.info(f"Upload queued as job {job['job_id']}")
+                print(f"Queued as job {job['job_id']}, waiting for analysis...")
+                result = wait_for_job(job['job_id'])
+                if result is None:
+                    return None
                 logger.info("Upload successful")
                 print("Upload successful!")
                 print(f"Events saved: {result['events_saved']}")
@@ -87,6 +93,19 @@ def test_video_upload(video_path):
         print(f"Exception during upload: {str(e)}")
         return None
 
+def wait_for_job(job_id, poll_interval=2):
+    """Poll an analysis job until it finishes and return its result."""
+    while True:
+        response = requests.get(f"{BASE_URL}/api/video/jobs/{job_id}")
+        job = response.json()
+        if job['status'] == 'completed':
+            return job['result']
+        if job['status'] == 'failed':
+            logger.error(f"Job {job_id} failed: {job['error']}")
+            print(f"Error: {job['error']}")
+            return None
+        time.sleep(poll_interval)
+
 def test_get_events(video_filename):
     """Test retrieving events for a video."""
     logger.info(f"Testing event retrieval for: {video_filename}")
@@ -125,7 +144,9 @@ def test_chat(query, limit=3):
         result = response.json()
         print(f"Found {result['total_results']} relevant events:")
         for event in result['events']:
-            print(f"- {event['description']} (similarity: {event['similarity']:.2f})")
+            # Keyword matches answered from the full-text index have no similarity
+            similarity = "keyword match" if event['similarity'] is None else f"{event['similarity']:.2f}"
+            print(f"- {event['description']} (similarity: {similarity})")
     else:
         print(f"Error: {response.text}")
 
@@ -136,7 +157,7 @@ def test_database_contents(video_filename):
     
     try:
         # Connect to database
-        db = EventDB(
+        db = open_event_db(
             db_url=POSTGRES_URL,
             openai_api_key=OPENAI_API_KEY,
             embedding_model=OPENAI_EMBEDDING_MODEL
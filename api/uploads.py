@@ -0,0 +1,260 @@
+"""
+Streaming and resumable video uploads.
+
+Videos are written to disk in fixed size pieces as they arrive, so memory use
+stays constant regardless of the file size, and hashed incrementally with
+BLAKE2b on the way. Chunked uploads follow an init / PUT chunk at offset /
+finalize protocol; the partial file lives on disk so an interrupted upload
+resumes from the last byte that was written.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+from starlette.concurrency import run_in_threadpool
+from utils.hashing import new_hasher, hash_file
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from a request or file per write
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+def _write_block(f, hasher, block):
+    f.write(block)
+    hasher.update(block)
+
+
+class UploadError(Exception):
+    """Raised when a chunk or finalize request is inconsistent with the upload state."""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+async def save_upload_file(upload_file, destination, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Stream a FastAPI UploadFile to disk without buffering it in memory.
+
+    Parameters:
+        upload_file (UploadFile): The uploaded file.
+        destination (Path): Where to write the file.
+        chunk_size (int): Bytes read per iteration.
+
+    Returns:
+        Tuple[int, str]: Number of bytes written and BLAKE2b hex digest of the content.
+    """
+    hasher = new_hasher()
+    size = 0
+    with open(destination, "wb") as f:
+        while True:
+            block = await upload_file.read(chunk_size)
+            if not block:
+                break
+            # Disk writes and hashing stay off the event loop
+            await run_in_threadpool(_write_block, f, hasher, block)
+            size += len(block)
+    return size, hasher.hexdigest()
+
+
+class ChunkedUpload:
+    def __init__(self, upload_id, filename, size, upload_dir, created_at=None):
+        """
+        State of one resumable upload.
+
+        Parameters:
+            upload_id (str): Unique id of the upload.
+            filename (str): Original filename of the video.
+            size (int): Total expected size in bytes.
+            upload_dir (Path): Directory holding partial uploads.
+            created_at (float, optional): Unix time the upload was created.
+        """
+        self.id = upload_id
+        self.filename = filename
+        self.size = size
+        self.created_at = created_at or time.time()
+        self.part_path = upload_dir / f"{upload_id}.part"
+        self.meta_path = upload_dir / f"{upload_id}.json"
+        self.offset = 0
+        self.hasher = new_hasher()
+        self.lock = asyncio.Lock()
+
+    def to_dict(self):
+        """Returns the public view of the upload."""
+        return {
+            "upload_id": self.id,
+            "filename": self.filename,
+            "size": self.size,
+            "offset": self.offset,
+            "complete": self.offset == self.size
+        }
+
+
+class UploadManager:
+    def __init__(self, upload_dir, expiry_seconds=24 * 3600):
+        """
+        Keeps track of resumable uploads stored under upload_dir.
+
+        Parameters:
+            upload_dir (Path): Directory for partial uploads and their metadata.
+            expiry_seconds (int): Uploads untouched for longer than this are discarded.
+        """
+        self.upload_dir = Path(upload_dir)
+        self.expiry_seconds = expiry_seconds
+        self._uploads = {}
+
+    def create(self, filename, size):
+        """
+        Start a new upload.
+
+        Parameters:
+            filename (str): Original filename of the video.
+            size (int): Total size in bytes.
+
+        Returns:
+            ChunkedUpload: The new upload.
+        """
+        if size <= 0:
+            raise UploadError("Upload size must be positive")
+        self.upload_dir.mkdir(parents=True, exist_ok=True)
+        self.purge_expired()
+
+        upload = ChunkedUpload(uuid.uuid4().hex, os.path.basename(filename), size, self.upload_dir)
+        upload.part_path.touch()
+        with open(upload.meta_path, "w", encoding="utf-8") as f:
+            json.dump({"filename": upload.filename, "size": size, "created_at": upload.created_at}, f)
+        self._uploads[upload.id] = upload
+        logger.info(f"Created upload {upload.id} for {upload.filename} ({size} bytes)")
+        return upload
+
+    async def get(self, upload_id):
+        """
+        Look up an upload, restoring it from disk if this process has not seen it yet.
+
+        Restoring rehashes the partial file in a worker thread.
+
+        Parameters:
+            upload_id (str): Id of the upload.
+
+        Returns:
+            ChunkedUpload: The upload, or None if it does not exist.
+        """
+        upload = self._uploads.get(upload_id)
+        if upload is not None:
+            return upload
+
+        if not upload_id.isalnum():
+            return None
+        meta_path = self.upload_dir / f"{upload_id}.json"
+        part_path = self.upload_dir / f"{upload_id}.part"
+        if not meta_path.exists() or not part_path.exists():
+            return None
+
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        upload = ChunkedUpload(upload_id, meta["filename"], meta["size"], self.upload_dir, meta["created_at"])
+        # Rebuild the running hash from what is already on disk
+        upload.hasher = await run_in_threadpool(hash_file, part_path)
+        upload.offset = part_path.stat().st_size
+        # A concurrent request may have restored the upload meanwhile, keep one state and lock
+        restored = self._uploads.setdefault(upload_id, upload)
+        if restored is upload:
+            logger.info(f"Resumed upload {upload_id} at offset {upload.offset}")
+        return restored
+
+    async def write_chunk(self, upload, offset, stream):
+        """
+        Append a chunk streamed from the request body.
+
+        The chunk must start at the current offset of the upload. If the client
+        disconnects mid-chunk, the bytes received so far are kept and the
+        client resumes from the offset reported by the upload status.
+
+        Parameters:
+            upload (ChunkedUpload): Target upload.
+            offset (int): Byte offset the chunk starts at.
+            stream (AsyncIterator[bytes]): Request body.
+
+        Returns:
+            int: The new offset of the upload.
+        """
+        async with upload.lock:
+            if offset != upload.offset:
+                raise UploadError(f"Expected chunk at offset {upload.offset}, got {offset}", status_code=409)
+
+            with open(upload.part_path, "ab") as f:
+                try:
+                    async for block in stream:
+                        if upload.offset + len(block) > upload.size:
+                            raise UploadError("Chunk exceeds the declared upload size", status_code=413)
+                        await run_in_threadpool(_write_block, f, upload.hasher, block)
+                        upload.offset += len(block)
+                finally:
+                    f.flush()
+            return upload.offset
+
+    async def finalize(self, upload, destination, expected_hash=None, on_complete=None):
+        """
+        Complete an upload and move it into place.
+
+        If on_complete raises, e.g. because the analysis queue is full, the file
+        is moved back and the upload stays resumable, so the client can
+        finalize it again later.
+
+        Parameters:
+            upload (ChunkedUpload): Upload to finalize.
+            destination (Path): Final location of the video.
+            expected_hash (str, optional): BLAKE2b hex digest the client computed.
+            on_complete (Callable[[Path, str], Awaitable], optional): Called with the destination
+                and digest while the upload is still locked.
+
+        Returns:
+            Tuple[str, Any]: BLAKE2b hex digest of the uploaded content and the result of on_complete.
+        """
+        async with upload.lock:
+            if not upload.part_path.exists():
+                raise UploadError(f"Upload {upload.id} was already finalized", status_code=404)
+            if upload.offset != upload.size:
+                raise UploadError(f"Upload incomplete: {upload.offset} of {upload.size} bytes received", status_code=409)
+            digest = upload.hasher.hexdigest()
+            if expected_hash and expected_hash.lower() != digest:
+                raise UploadError("Checksum mismatch", status_code=422)
+
+            os.replace(upload.part_path, destination)
+            result = None
+            if on_complete is not None:
+                try:
+                    result = await on_complete(destination, digest)
+                except BaseException:
+                    os.replace(destination, upload.part_path)
+                    logger.info(f"Kept upload {upload.id} after finalizing it failed")
+                    raise
+            upload.meta_path.unlink(missing_ok=True)
+            self._uploads.pop(upload.id, None)
+            logger.info(f"Finalized upload {upload.id} to {destination}")
+            return digest, result
+
+    def discard(self, upload):
+        """Delete an upload and its partial data."""
+        upload.part_path.unlink(missing_ok=True)
+        upload.meta_path.unlink(missing_ok=True)
+        self._uploads.pop(upload.id, None)
+
+    def purge_expired(self):
+        """Remove uploads that have not been written to within the expiry window."""
+        if not self.upload_dir.exists():
+            return
+        now = time.time()
+        for meta_path in self.upload_dir.glob("*.json"):
+            part_path = meta_path.with_suffix(".part")
+            last_write = part_path.stat().st_mtime if part_path.exists() else meta_path.stat().st_mtime
+            if now - last_write > self.expiry_seconds:
+                logger.info(f"Discarding expired upload {meta_path.stem}")
+                part_path.unlink(missing_ok=True)
+                meta_path.unlink(missing_ok=True)
+                self._uploads.pop(meta_path.stem, None)
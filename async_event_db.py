@@ -0,0 +1,342 @@
+"""
+Async access to the events database for the FastAPI routes.
+
+AsyncEventDB mirrors the read side of EventDB (search and event listing) on
+top of an asyncpg connection pool and the async OpenAI client, so a slow query
+or embeddings request suspends only the request waiting for it instead of the
+event loop. Writes and schema creation stay in EventDB, which the analysis
+workers use from their threads.
+"""
+
+import asyncio
+import json
+import re
+import asyncpg
+from openai import AsyncOpenAI
+from config import (EVENT_STORE, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT, DB_POOL_HEALTH_CHECK_INTERVAL,
+                    OPENAI_EMBEDDING_BATCH_SIZE, VECTOR_INDEX, HNSW_EF_SEARCH, IVFFLAT_PROBES,
+                    SEARCH_MODE, HYBRID_RRF_K, HYBRID_CANDIDATES, EVENT_STREAM_BATCH_SIZE)
+from embedding_cache import EmbeddingCache
+from event_db import (is_keyword_query, lexical_fills_page, lexical_search_sql, hybrid_search_sql,
+                      vector_literal, events_page_sql, events_page_params)
+from utils.logger import setup_logger
+
+logger = setup_logger("async_event_db")
+
+# Shared by every AsyncEventDB of the process
+_pools = {}
+_pools_lock = asyncio.Lock()
+_openai_clients = {}
+
+async def get_async_pool(db_url):
+    """
+    Return the process-wide asyncpg pool for a database URL, creating it on first use.
+
+    Parameters:
+        db_url (str): PostgreSQL connection URL
+
+    Returns:
+        asyncpg.Pool: The shared pool
+    """
+    async with _pools_lock:
+        if db_url not in _pools:
+            _pools[db_url] = await asyncpg.create_pool(
+                db_url,
+                min_size=min(DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE),
+                max_size=DB_POOL_MAX_SIZE,
+                timeout=DB_POOL_TIMEOUT,
+                # Idle connections are closed rather than checked, the pool reconnects on demand
+                max_inactive_connection_lifetime=DB_POOL_HEALTH_CHECK_INTERVAL
+            )
+            logger.info(f"Created async database connection pool (max {DB_POOL_MAX_SIZE} connections)")
+        return _pools[db_url]
+
+async def close_async_pools():
+    """Close all async pools of this process."""
+    async with _pools_lock:
+        for pool in _pools.values():
+            await pool.close()
+        _pools.clear()
+
+def get_async_openai_client(api_key):
+    """Return the process-wide async OpenAI client for an API key."""
+    if api_key not in _openai_clients:
+        _openai_clients[api_key] = AsyncOpenAI(api_key=api_key)
+    return _openai_clients[api_key]
+
+def open_async_event_db(db_url, openai_api_key, embedding_model):
+    """
+    Open the configured event store for async routes.
+
+    Returns:
+        AsyncEventDB or AsyncLocalEventDB: Depending on EVENT_STORE
+    """
+    if EVENT_STORE == "local":
+        from local_event_db import AsyncLocalEventDB
+        return AsyncLocalEventDB(openai_api_key, embedding_model)
+    return AsyncEventDB(db_url, openai_api_key, embedding_model)
+
+def to_asyncpg(sql, params):
+    """
+    Convert a query with psycopg2 %(name)s placeholders to asyncpg's $n placeholders.
+
+    Parameters:
+        sql (str): Query shared with EventDB
+        params (dict): Parameter values by name
+
+    Returns:
+        Tuple[str, list]: The converted query and its positional arguments
+    """
+    names = []
+
+    def placeholder(match):
+        if match.group(1) not in names:
+            names.append(match.group(1))
+        return f"${names.index(match.group(1)) + 1}"
+
+    converted = re.sub(r"%\((\w+)\)s", placeholder, sql)
+    return converted, [params[name] for name in names]
+
+def _event_from_row(row, with_similarity=False):
+    event = {
+        'id': row['id'],
+        'timestamp': row['timestamp'],
+        'description': row['description'],
+        'video_id': row['video_id'],
+        'video_filename': row['video_filename'],
+        'llm_summary': row['llm_summary']
+    }
+    if with_similarity:
+        event['similarity'] = float(row['similarity'])
+    return event
+
+class AsyncEventDB:
+    def __init__(self, db_url, openai_api_key, embedding_model, embedding_batch_size=OPENAI_EMBEDDING_BATCH_SIZE):
+        """
+        Initialize the AsyncEventDB. Connections are borrowed from the shared pool per query.
+
+        Parameters:
+            db_url (str): PostgreSQL connection URL
+            openai_api_key (str): OpenAI API key for generating embeddings
+            embedding_model (str): OpenAI model to use for embeddings
+            embedding_batch_size (int): Maximum number of texts per embeddings request
+        """
+        self.db_url = db_url
+        self.client = get_async_openai_client(openai_api_key)
+        self.embedding_model = embedding_model
+        self.embedding_batch_size = max(1, embedding_batch_size)
+        self.embedding_cache = EmbeddingCache(self)
+
+    async def _pool(self):
+        return await get_async_pool(self.db_url)
+
+    async def _get_embedding(self, text):
+        """
+        Get embedding for text, using the embedding cache.
+
+        Parameters:
+            text (str): Text to generate embedding for
+
+        Returns:
+            list: Embedding vector
+        """
+        embeddings = await self.embedding_cache.get_embeddings_async(
+            self.embedding_model, [text], self._request_embeddings
+        )
+        return embeddings[0]
+
+    async def _request_embeddings(self, texts):
+        """
+        Request embeddings from the API with as few requests as possible.
+
+        Parameters:
+            texts (list): Texts to generate embeddings for
+
+        Returns:
+            list: Embedding vectors in the order of texts
+        """
+        embeddings = []
+        for start in range(0, len(texts), self.embedding_batch_size):
+            response = await self.client.embeddings.create(
+                model=self.embedding_model,
+                input=texts[start:start + self.embedding_batch_size]
+            )
+            embeddings.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+        return embeddings
+
+    async def get_cached_embeddings(self, model, text_hashes):
+        """
+        Look up cached embeddings.
+
+        Parameters:
+            model (str): Embedding model name
+            text_hashes (list): Hashes of the normalized texts
+
+        Returns:
+            dict: Embedding vectors by text hash, for the hashes that are cached
+        """
+        pool = await self._pool()
+        rows = await pool.fetch("""
+            SELECT text_hash, embedding::text AS embedding
+            FROM embedding_cache
+            WHERE model = $1 AND text_hash = ANY($2::text[]);
+        """, model, list(text_hashes))
+        return {row['text_hash']: json.loads(row['embedding']) for row in rows}
+
+    async def save_cached_embeddings(self, model, embeddings):
+        """
+        Store embeddings in the cache table.
+
+        Parameters:
+            model (str): Embedding model name
+            embeddings (dict): Embedding vectors by text hash
+        """
+        pool = await self._pool()
+        await pool.executemany("""
+            INSERT INTO embedding_cache (model, text_hash, embedding)
+            VALUES ($1, $2, $3::text::vector)
+            ON CONFLICT (model, text_hash) DO NOTHING;
+        """, [(model, text_hash, vector_literal(embedding)) for text_hash, embedding in embeddings.items()])
+
+    async def get_events_by_filename(self, video_filename):
+        """
+        Get all events for a specific video filename.
+
+        Parameters:
+            video_filename (str): The video filename to search for
+
+        Returns:
+            list: List of event dictionaries
+        """
+        pool = await self._pool()
+        rows = await pool.fetch("""
+            SELECT id, timestamp, description, video_id, video_filename, llm_summary
+            FROM events
+            WHERE video_filename = $1
+            ORDER BY timestamp;
+        """, video_filename)
+        events = [_event_from_row(row) for row in rows]
+        logger.info(f"Retrieved {len(events)} events for video {video_filename}")
+        return events
+
+    async def get_video_version(self, video_filename):
+        """
+        Get the version of a video's events, bumped by EventDB on every write.
+
+        Parameters:
+            video_filename (str): The video filename
+
+        Returns:
+            int: Version, 0 if the video never had events
+        """
+        pool = await self._pool()
+        version = await pool.fetchval("SELECT version FROM video_versions WHERE video_filename = $1;", video_filename)
+        return version or 0
+
+    async def get_events_page(self, video_filename, limit, after=None):
+        """
+        Get one page of a video's events in (timestamp, id) order.
+
+        Parameters:
+            video_filename (str): The video filename to search for
+            limit (int, optional): Maximum number of events
+            after (tuple, optional): (timestamp, id) of the last event of the previous page
+
+        Returns:
+            list: List of event dictionaries
+        """
+        pool = await self._pool()
+        rows = await pool.fetch(*to_asyncpg(
+            events_page_sql(after is not None, limit is not None), events_page_params(video_filename, after, limit)
+        ))
+        return [_event_from_row(row) for row in rows]
+
+    async def stream_events(self, video_filename, after=None, limit=None, batch_size=EVENT_STREAM_BATCH_SIZE):
+        """
+        Yield a video's events in (timestamp, id) order from a server-side cursor,
+        so only batch_size rows are held in memory at a time.
+
+        Parameters:
+            video_filename (str): The video filename to search for
+            after (tuple, optional): Only events after this (timestamp, id)
+            limit (int, optional): Maximum number of events
+            batch_size (int): Rows prefetched per round trip
+
+        Yields:
+            dict: Event dictionaries
+        """
+        sql, args = to_asyncpg(
+            events_page_sql(after is not None, limit is not None), events_page_params(video_filename, after, limit)
+        )
+        pool = await self._pool()
+        async with pool.acquire() as conn:
+            # asyncpg cursors only exist inside a transaction
+            async with conn.transaction():
+                async for row in conn.cursor(sql, *args, prefetch=batch_size):
+                    yield _event_from_row(row)
+
+    async def search_events(self, query, limit=5, video_filename=None, mode=SEARCH_MODE):
+        """
+        Search events using semantic similarity, optionally fused with full-text rank,
+        like EventDB.search_events.
+
+        Parameters:
+            query (str): The search query
+            limit (int): Maximum number of results to return
+            video_filename (str, optional): Only search the events of this video
+            mode (str): "vector" or "hybrid"
+
+        Returns:
+            list: List of matching event dictionaries with similarity scores (None for full-text matches)
+        """
+        params = {'query': query, 'limit': limit, 'video_filename': video_filename}
+        pool = await self._pool()
+        if mode == "hybrid" and is_keyword_query(query):
+            rows = await pool.fetch(*to_asyncpg(lexical_search_sql(bool(video_filename)), params))
+            if lexical_fills_page(rows, limit):
+                logger.info(f"Answered keyword query from the full-text index ({len(rows)} events)")
+                return [{**_event_from_row(row), 'similarity': None} for row in rows]
+
+        query_embedding = vector_literal(await self._get_embedding(query))
+
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                breadth = max(HYBRID_CANDIDATES, limit) if mode == "hybrid" else limit
+                # Search breadth of the index, only applies to this transaction (scoped searches are exact)
+                if not video_filename and VECTOR_INDEX == "hnsw":
+                    await conn.execute(f"SET LOCAL hnsw.ef_search = {int(max(HNSW_EF_SEARCH, breadth))};")
+                elif not video_filename and VECTOR_INDEX == "ivfflat":
+                    await conn.execute(f"SET LOCAL ivfflat.probes = {int(IVFFLAT_PROBES)};")
+
+                if mode == "hybrid":
+                    rows = await conn.fetch(*to_asyncpg(hybrid_search_sql(bool(video_filename)), {
+                        **params,
+                        'embedding': query_embedding,
+                        'candidates': breadth,
+                        'rrf_k': HYBRID_RRF_K
+                    }))
+                elif video_filename:
+                    rows = await conn.fetch("""
+                        WITH video_events AS MATERIALIZED (
+                            SELECT id, timestamp, description, video_id, video_filename, llm_summary, embedding
+                            FROM events
+                            WHERE video_filename = $1
+                        )
+                        SELECT id, timestamp, description, video_id, video_filename, llm_summary,
+                               1 - (embedding <=> $2::text::vector) AS similarity
+                        FROM video_events
+                        ORDER BY embedding <=> $2::text::vector
+                        LIMIT $3;
+                    """, video_filename, query_embedding, limit)
+                else:
+                    rows = await conn.fetch("""
+                        SELECT id, timestamp, description, video_id, video_filename, llm_summary,
+                               1 - (embedding <=> $1::text::vector) AS similarity
+                        FROM events
+                        ORDER BY embedding <=> $1::text::vector
+                        LIMIT $2;
+                    """, query_embedding, limit)
+
+        events = [_event_from_row(row, with_similarity=True) for row in rows]
+        logger.info(f"Found {len(events)} events matching query" + (f" in {video_filename}" if video_filename else ""))
+        return events
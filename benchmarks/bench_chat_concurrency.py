@@ -0,0 +1,101 @@
+"""
+Chat search throughput under concurrent load, blocking vs async database access.
+
+Runs the chat search for N requests with C requests in flight on one event loop:
+- blocking: EventDB (psycopg2) called directly from the coroutine, as the routes used to
+- async: AsyncEventDB (asyncpg pool, AsyncOpenAI)
+
+A probe task sleeps 10 ms in a loop meanwhile; its overshoot shows how long
+the event loop was stalled for every other request. Queries are repeated, so
+after the first request embeddings come from the embedding cache and the
+numbers reflect the database path.
+
+Usage:
+    python benchmarks/bench_chat_concurrency.py VIDEO_FILENAME [--requests 500] [--concurrency 32]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add parent directory to path so we can import from root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_event_db import AsyncEventDB, close_async_pools
+from event_db import EventDB
+from config import POSTGRES_URL, OPENAI_API_KEY, OPENAI_EMBEDDING_MODEL
+
+QUERIES = ["goal celebration", "people talking", "car driving at night", "dog barking", "music playing"]
+
+def blocking_search(query, video_filename):
+    db = EventDB(POSTGRES_URL, OPENAI_API_KEY, OPENAI_EMBEDDING_MODEL)
+    try:
+        return db.search_events(query, 5, video_filename)
+    finally:
+        db.close()
+
+async def run(mode, video_filename, requests, concurrency):
+    db = AsyncEventDB(POSTGRES_URL, OPENAI_API_KEY, OPENAI_EMBEDDING_MODEL)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            query = QUERIES[i % len(QUERIES)]
+            start = time.perf_counter()
+            if mode == "async":
+                await db.search_events(query, 5, video_filename)
+            else:
+                blocking_search(query, video_filename)
+            latencies.append(time.perf_counter() - start)
+
+    stalls = []
+    done = asyncio.Event()
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            stalls.append(time.perf_counter() - start - 0.01)
+
+    # Warm up pools and the embedding cache
+    for i in range(len(QUERIES)):
+        await one(i)
+    latencies.clear()
+
+    probe_task = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+
+    latencies = np.array(latencies) * 1e3
+    stalls = np.array(stalls or [0.0]) * 1e3
+    return {
+        "throughput": requests / elapsed,
+        "p50": np.percentile(latencies, 50),
+        "p95": np.percentile(latencies, 95),
+        "stall_max": stalls.max()
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description="Chat search throughput, blocking vs async")
+    parser.add_argument("video_filename", help="Video whose events are searched")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    print(f"{'mode':<9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'max loop stall ms':>18}")
+    for mode in ("blocking", "async"):
+        result = await run(mode, args.video_filename, args.requests, args.concurrency)
+        print(f"{mode:<9} {result['throughput']:>8.1f} {result['p50']:>8.1f} {result['p95']:>8.1f} "
+              f"{result['stall_max']:>18.1f}")
+    await close_async_pools()
+
+if __name__ == "__main__":
+    asyncio.run(main())
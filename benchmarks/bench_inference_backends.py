@@ -0,0 +1,148 @@
+"""
+Compare PyTorch, ONNX Runtime and int8 ONNX Runtime inference for YOLO and YAMNet.
+
+For each backend the script reports per-stage latency and checks parity with
+the PyTorch outputs: the share of frames whose YOLO detections match (same
+labels, boxes overlapping with at least a minimum IoU), and the maximum score
+difference and top-1 class agreement for YAMNet. It exits with status 1 if a
+backend is outside the tolerances in TOLERANCES.
+
+Usage:
+    python benchmarks/bench_inference_backends.py [video_path] [--frames 32] [--seconds 120]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+
+# Add parent directory to path so we can import from root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from torch_vggish_yamnet.input_proc import WaveformToInput
+from video_analyzer.inference_backend import load_yolo, load_yamnet
+from video_analyzer.object_detector import YOLO_WEIGHTS
+from video_analyzer.scene_detector import SceneDetector
+from video_analyzer.audio_detector import AudioDetector, SAMPLE_RATE
+
+BACKENDS = [("torch", False), ("onnx", False), ("onnx", True)]
+
+# Parity with PyTorch required of each backend: share of frames whose detections
+# match, minimum IoU of matching boxes, maximum YAMNet score difference and
+# share of YAMNet windows with the same top-1 class
+TOLERANCES = {
+    "onnx": {"frames": 1.0, "iou": 0.9, "score_diff": 1e-3, "top1": 1.0},
+    "onnx-int8": {"frames": 0.9, "iou": 0.7, "score_diff": 0.05, "top1": 0.95}
+}
+
+def load_inputs(video_path, num_frames, seconds):
+    rng = np.random.default_rng(0)
+    if video_path:
+        frames = [frame for _, frame in SceneDetector().extract_scenes_smart(video_path)]
+        frames = [frames[i % len(frames)] for i in range(num_frames)] if frames else []
+        # extract_audio doesn't touch the models, so skip loading Whisper and YAMNet here
+        waveform = AudioDetector.extract_audio(video_path)[:int(seconds * SAMPLE_RATE)]
+    else:
+        frames = [rng.integers(0, 256, (720, 1280, 3), dtype=np.uint8) for _ in range(num_frames)]
+        waveform = (0.1 * rng.standard_normal(int(seconds * SAMPLE_RATE))).astype(np.float32)
+
+    # Log-mel patches for every 1 s window with a 0.5 s hop, as AudioDetector.score_windows builds them
+    converter = WaveformToInput()
+    windows = torch.from_numpy(waveform).unfold(0, SAMPLE_RATE, SAMPLE_RATE // 2)
+    patches = converter.mel_trans_ope(windows).transpose(1, 2)[:, :96].unsqueeze(1)
+    return frames, patches
+
+def run_yolo(model, frames, batch_size=8):
+    """Returns (labels, xyxy boxes) per frame."""
+    detections = []
+    for start in range(0, len(frames), batch_size):
+        for result in model.predict(frames[start:start + batch_size], device="cpu", verbose=False):
+            labels = [model.names[int(cls)] for cls in result.boxes.cls]
+            detections.append((labels, result.boxes.xyxy.cpu().numpy().reshape(-1, 4)))
+    return detections
+
+def box_iou(a, b):
+    """IoU of two xyxy boxes."""
+    width = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    height = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    intersection = width * height
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection
+    return intersection / union if union > 0 else 1.0
+
+def detections_match(detections, reference, min_iou):
+    """
+    Whether two frames' detections agree: the same labels, each box paired with
+    a distinct reference box of its label overlapping it by at least min_iou.
+    """
+    labels, boxes = detections
+    reference_labels, reference_boxes = reference
+    if sorted(labels) != sorted(reference_labels):
+        return False
+    unmatched = list(range(len(reference_labels)))
+    for label, box in zip(labels, boxes):
+        candidates = [(box_iou(box, reference_boxes[i]), i) for i in unmatched if reference_labels[i] == label]
+        iou, best = max(candidates)
+        if iou < min_iou:
+            return False
+        unmatched.remove(best)
+    return True
+
+def run_yamnet(model, patches, batch_size=256):
+    with torch.no_grad():
+        return torch.cat([model(patches[i:i + batch_size])[1] for i in range(0, len(patches), batch_size)])
+
+def timed(func, *args):
+    func(*args)  # warm-up
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Inference backend latency and parity")
+    parser.add_argument("video_path", nargs="?", help="Video to take frames and audio from (default: random data)")
+    parser.add_argument("--frames", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=120)
+    args = parser.parse_args()
+
+    frames, patches = load_inputs(args.video_path, args.frames, args.seconds)
+    print(f"YOLO frames: {len(frames)}, YAMNet windows: {len(patches)}, threads: {torch.get_num_threads()}")
+
+    reference_detections = reference_scores = None
+    failed = []
+    print(f"{'backend':<10} {'yolo s':>8} {'frames match':>13} {'yamnet s':>9} {'max |diff|':>11} {'top-1 agree':>12}  parity")
+    for backend, quantize in BACKENDS:
+        name = f"{backend}{'-int8' if quantize else ''}"
+        try:
+            yolo = load_yolo(YOLO_WEIGHTS, "cpu", backend, quantize)
+            yamnet = load_yamnet(backend, quantize)
+        except ImportError as e:
+            print(f"{name:<10} skipped: {e}")
+            continue
+
+        detections, yolo_seconds = timed(run_yolo, yolo, frames)
+        scores, yamnet_seconds = timed(run_yamnet, yamnet, patches)
+        if reference_detections is None:
+            reference_detections, reference_scores = detections, scores
+
+        tolerance = TOLERANCES.get(name, {"frames": 1.0, "iou": 1.0, "score_diff": 0.0, "top1": 1.0})
+        frames_match = np.mean([
+            detections_match(a, b, tolerance["iou"]) for a, b in zip(detections, reference_detections)
+        ]) if detections else 1.0
+        max_diff = float((scores - reference_scores).abs().max()) if len(scores) else 0.0
+        top1 = float((scores.argmax(1) == reference_scores.argmax(1)).float().mean()) if len(scores) else 1.0
+        ok = (frames_match >= tolerance["frames"] and max_diff <= tolerance["score_diff"]
+              and top1 >= tolerance["top1"])
+        if not ok:
+            failed.append(name)
+        print(f"{name:<10} {yolo_seconds:>8.2f} {frames_match:>13.1%} {yamnet_seconds:>9.2f} {max_diff:>11.4f} "
+              f"{top1:>12.1%}  {'ok' if ok else 'FAIL'}")
+
+    if failed:
+        print(f"Outputs of {', '.join(failed)} differ from PyTorch beyond the tolerance")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Measure the logging overhead per request.
+
+Each simulated request does what a chat request does: constructs a logger
+through setup_logger (as EventDB does) and logs a few lines. The legacy
+implementation, which adds a new FileHandler and StreamHandler on every call,
+is compared with the queue-based setup_logger. Console output is redirected
+to /dev/null so terminal speed doesn't dominate.
+
+Usage:
+    python benchmarks/bench_logging.py [--requests 2000] [--lines 5]
+"""
+
+import argparse
+import contextlib
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path so we can import from root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import logger as queued_logging
+from utils.logger import setup_logger
+
+def legacy_setup_logger(name, log_dir="logs"):
+    """setup_logger as it was: new handlers and a new log file on every call."""
+    log_path = Path(log_dir)
+    log_path.mkdir(exist_ok=True)
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    file_handler = logging.FileHandler(log_path / f"{name}_{timestamp}.log", encoding='utf-8')
+    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    logger.addHandler(file_handler)
+    logger.addHandler(console_handler)
+    return logger
+
+def open_fds():
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return -1
+
+def run(setup, name, log_dir, requests, lines):
+    fds_before = open_fds()
+    latencies = []
+    for i in range(requests):
+        start = time.perf_counter()
+        logger = setup(name, log_dir)
+        for line in range(lines):
+            logger.info(f"request {i} line {line}")
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    logger = logging.getLogger(name)
+    return {
+        "mean_us": 1e6 * sum(latencies) / len(latencies),
+        "p99_us": 1e6 * latencies[int(0.99 * (len(latencies) - 1))],
+        "handlers": len(logger.handlers),
+        "fds_added": open_fds() - fds_before
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Logging overhead per request")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--lines", type=int, default=5, help="Lines logged per request")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as log_dir, open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stderr(devnull):
+            # The legacy version piles up one open file per call; keep the run short enough to stay under ulimit -n
+            legacy = run(legacy_setup_logger, "bench_legacy", log_dir, min(args.requests, 500), args.lines)
+            queued = run(setup_logger, "bench_queued", log_dir, args.requests, args.lines)
+            # Time until the listener thread has written everything out
+            start = time.perf_counter()
+            queued_logging._stop_listener()
+            drain_ms = 1e3 * (time.perf_counter() - start)
+            for handler in logging.getLogger("bench_legacy").handlers:
+                handler.close()
+
+    print(f"{'setup':<8} {'mean us':>9} {'p99 us':>9} {'handlers':>9} {'fds added':>10}")
+    for label, result in (("legacy", legacy), ("queued", queued)):
+        print(f"{label:<8} {result['mean_us']:>9.1f} {result['p99_us']:>9.1f} "
+              f"{result['handlers']:>9} {result['fds_added']:>10}")
+    print(f"Queued records drained by the listener {drain_ms:.1f} ms after the last request")
+
+if __name__ == "__main__":
+    main()
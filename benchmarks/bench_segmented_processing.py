@@ -0,0 +1,65 @@
+"""
+Benchmark segmented parallel processing against a single pass over the whole video.
+
+Runs AnalyzeVideo.process_video once as one unit and then in segmented mode with
+each worker count, with the stage cache disabled. Reports the wall-clock time,
+the speedup and how far the merged results are from the single pass (number of
+shots, sound events and transcript segments). The first segmented run of a
+worker count includes loading the models in every worker.
+
+Usage:
+    python benchmarks/bench_segmented_processing.py video.mp4 [--workers 1 2 4 8] [--segment-seconds 300] [--overlap 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add parent directory to path so we can import from root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import OPENAI_API_KEY, OPENAI_MODEL, OUTPUT_DIR
+from video_analyzer.analyze_video import AnalyzeVideo
+from video_analyzer.stage_cache import StageCache
+from video_analyzer.segmented import process_segmented, video_duration
+
+def summarize(results):
+    return {key: len(results[key]) for key in ("frame_times", "sound_events", "transcript")}
+
+def main():
+    parser = argparse.ArgumentParser(description="Segmented vs single pass video processing")
+    parser.add_argument("video")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--segment-seconds", type=float, default=300)
+    parser.add_argument("--overlap", type=float, default=5)
+    args = parser.parse_args()
+
+    analyzer = AnalyzeVideo(OPENAI_API_KEY, OPENAI_MODEL, OUTPUT_DIR)
+    analyzer.stage_cache = StageCache(max_bytes=0)
+    analyzer.segmented = False
+    duration = video_duration(args.video)
+    print(f"{args.video}: {duration:.0f} s")
+
+    start = time.perf_counter()
+    baseline = analyzer.process_video(args.video)
+    baseline_time = time.perf_counter() - start
+    print(f"{'single pass':>14}: {baseline_time:8.1f} s  {summarize(baseline)}")
+
+    settings = {
+        "scene_mode": analyzer.scene_detector.mode,
+        "extract_captions": analyzer.object_detector.extract_captions,
+        "whisper_model_size": analyzer.audio_detector.whisper_model_size,
+        "speech_gate": analyzer.speech_gate_params
+    }
+    for workers in sorted(set(args.workers)):
+        start = time.perf_counter()
+        results = process_segmented(
+            args.video, duration, settings, analyzer.audio_detector, analyzer.sound_event_params,
+            args.segment_seconds, args.overlap, workers
+        )
+        elapsed = time.perf_counter() - start
+        print(f"{workers:>6} workers: {elapsed:8.1f} s  x{baseline_time / elapsed:4.1f}  {summarize(results)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Recall and latency of vector search over synthetic events.
+
+Loads N synthetic events (clustered random unit vectors, EVENTS_PER_VIDEO per
+video) into a scratch table of the database at DATABASE_URL, then compares for
+random queries:
+- exact search (sequential scan), the ground truth
+- HNSW at several ef_search values
+- IVFFlat at several probes values
+- video-scoped search as EventDB.search_events runs it
+
+Recall@k is the overlap of the top k ids with the exact top k.
+
+Usage:
+    python benchmarks/bench_vector_search.py [--events 1000000] [--dim 1536] [--queries 100] [--keep]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import psycopg2
+
+# Add parent directory to path so we can import from root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import POSTGRES_URL
+
+TABLE = "bench_events"
+EVENTS_PER_VIDEO = 40
+
+def vector_literal(vector):
+    return "[" + ",".join(f"{x:.6f}" for x in vector) + "]"
+
+def load_events(conn, num_events, dim, seed=0, batch=20000):
+    """Create the scratch table and COPY clustered unit vectors into it."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((256, dim)).astype(np.float32)
+    with conn.cursor() as cur:
+        cur.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+        cur.execute(f"DROP TABLE IF EXISTS {TABLE};")
+        cur.execute(f"""
+            CREATE TABLE {TABLE} (
+                id SERIAL PRIMARY KEY,
+                video_filename TEXT NOT NULL,
+                embedding vector({dim})
+            );
+        """)
+        for start in range(0, num_events, batch):
+            count = min(batch, num_events - start)
+            vectors = centers[rng.integers(0, len(centers), count)] + 0.5 * rng.standard_normal((count, dim)).astype(np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            buffer = io.StringIO()
+            for i, vector in enumerate(vectors):
+                buffer.write(f"video_{(start + i) // EVENTS_PER_VIDEO}.mp4\t{vector_literal(vector)}\n")
+            buffer.seek(0)
+            cur.copy_from(buffer, TABLE, columns=("video_filename", "embedding"))
+            print(f"\rLoaded {start + count}/{num_events} events", end="", flush=True)
+        print()
+        cur.execute(f"CREATE INDEX ON {TABLE}(video_filename);")
+        cur.execute(f"ANALYZE {TABLE};")
+    conn.commit()
+    return centers
+
+def make_queries(centers, count, dim, seed=1):
+    rng = np.random.default_rng(seed)
+    queries = centers[rng.integers(0, len(centers), count)] + 0.5 * rng.standard_normal((count, dim)).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+def search(conn, query, k, settings=(), video_filename=None):
+    """Run one top-k query and return (ids, seconds)."""
+    literal = vector_literal(query)
+    with conn.cursor() as cur:
+        for setting in settings:
+            cur.execute(setting)
+        start = time.perf_counter()
+        if video_filename:
+            cur.execute(f"""
+                WITH video_events AS MATERIALIZED (
+                    SELECT id, embedding FROM {TABLE} WHERE video_filename = %s
+                )
+                SELECT id FROM video_events ORDER BY embedding <=> %s::vector LIMIT %s;
+            """, (video_filename, literal, k))
+        else:
+            cur.execute(f"SELECT id FROM {TABLE} ORDER BY embedding <=> %s::vector LIMIT %s;", (literal, k))
+        ids = [row[0] for row in cur.fetchall()]
+        elapsed = time.perf_counter() - start
+    conn.rollback()
+    return ids, elapsed
+
+def evaluate(conn, label, queries, truth, k, settings=(), videos=None):
+    recalls, latencies = [], []
+    for i, query in enumerate(queries):
+        ids, elapsed = search(conn, query, k, settings, videos[i] if videos else None)
+        recalls.append(len(set(ids) & set(truth[i])) / max(1, len(truth[i])))
+        latencies.append(elapsed)
+    latencies = np.array(latencies) * 1e3
+    print(f"{label:<28} {np.mean(recalls):>8.3f} {np.percentile(latencies, 50):>9.2f} {np.percentile(latencies, 95):>9.2f}")
+
+def build_index(conn, kind, options):
+    start = time.perf_counter()
+    with conn.cursor() as cur:
+        cur.execute(f"DROP INDEX IF EXISTS {TABLE}_ann;")
+        cur.execute("SET maintenance_work_mem = '2GB';")
+        cur.execute(f"CREATE INDEX {TABLE}_ann ON {TABLE} USING {kind} (embedding vector_cosine_ops) WITH ({options});")
+    conn.commit()
+    print(f"\nBuilt {kind} ({options}) in {time.perf_counter() - start:.1f} s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Vector search recall and latency")
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch table")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(POSTGRES_URL)
+    try:
+        centers = load_events(conn, args.events, args.dim)
+        queries = make_queries(centers, args.queries, args.dim)
+        num_videos = (args.events + EVENTS_PER_VIDEO - 1) // EVENTS_PER_VIDEO
+        videos = [f"video_{v}.mp4" for v in np.random.default_rng(2).integers(0, num_videos, args.queries)]
+
+        exact = ("SET LOCAL enable_indexscan = off;",)
+        truth = [search(conn, query, args.k, exact)[0] for query in queries]
+        video_truth = [search(conn, query, args.k, exact, video)[0] for query, video in zip(queries, videos)]
+
+        header = f"{'search':<28} {'recall':>8} {'p50 ms':>9} {'p95 ms':>9}"
+        print(header)
+        evaluate(conn, "exact (seq scan)", queries, truth, args.k, exact)
+
+        build_index(conn, "hnsw", "m = 16, ef_construction = 64")
+        print(header)
+        for ef_search in (20, 40, 100, 200):
+            evaluate(conn, f"hnsw ef_search={ef_search}", queries, truth, args.k,
+                     (f"SET LOCAL hnsw.ef_search = {ef_search};",))
+        evaluate(conn, "video-scoped (with hnsw)", queries, video_truth, args.k, videos=videos)
+
+        build_index(conn, "ivfflat", f"lists = {max(1, args.events // 1000)}")
+        print(header)
+        for probes in (1, 10, 40, 100):
+            evaluate(conn, f"ivfflat probes={probes}", queries, truth, args.k,
+                     (f"SET LOCAL ivfflat.probes = {probes};",))
+    finally:
+        if not args.keep:
+            with conn.cursor() as cur:
+                cur.execute(f"DROP TABLE IF EXISTS {TABLE};")
+            conn.commit()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
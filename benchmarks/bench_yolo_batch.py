@@ -0,0 +1,65 @@
+"""
+Benchmark YOLO object detection throughput against batch size.
+
+Frames are taken from the middle of each scene of a video (or random noise
+frames if no video is given), then detected once per batch size. The script
+also checks that every batch size returns exactly the per-frame labels.
+
+Usage:
+    python benchmarks/bench_yolo_batch.py [video_path] [--batch-sizes 1 2 4 8 16] [--frames 64]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add parent directory to path so we can import from root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from video_analyzer.object_detector import ObjectDetector
+from video_analyzer.scene_detector import SceneDetector
+
+def load_frames(video_path, num_frames):
+    if video_path:
+        frames = [frame for _, frame in SceneDetector().extract_scenes_smart(video_path)]
+        # Repeat the scene frames to reach the requested count
+        return [frames[i % len(frames)] for i in range(num_frames)] if frames else []
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, (720, 1280, 3), dtype=np.uint8) for _ in range(num_frames)]
+
+def main():
+    parser = argparse.ArgumentParser(description="YOLO frames/sec by batch size")
+    parser.add_argument("video_path", nargs="?", help="Video to take frames from (default: random frames)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--frames", type=int, default=64)
+    args = parser.parse_args()
+
+    frames = load_frames(args.video_path, args.frames)
+    if not frames:
+        print("No frames extracted")
+        return
+
+    detector = ObjectDetector()
+    print(f"Device: {detector.device}, frames: {len(frames)}, shape: {frames[0].shape}")
+
+    # Warm-up so the first measurement doesn't include lazy initialization
+    detector.batch_size = 1
+    detector.detect_objects_from_frames(frames[:2])
+
+    # Batch size 1 runs first and is the per-frame reference
+    reference = None
+    print(f"{'batch':>6} {'seconds':>9} {'frames/s':>9} {'identical':>10}")
+    for batch_size in sorted(set(args.batch_sizes) | {1}):
+        detector.batch_size = batch_size
+        start = time.perf_counter()
+        labels = detector.detect_objects_from_frames(frames)
+        elapsed = time.perf_counter() - start
+        if reference is None:
+            reference = labels
+        print(f"{batch_size:>6} {elapsed:>9.2f} {len(frames) / elapsed:>9.1f} {str(labels == reference):>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Compare the fast downscaled scene detector with scenedetect's ContentDetector.
+
+Reports, per video, the number of cuts, cut agreement (precision/recall of the
+fast detector against ContentDetector, and against the ground truth for the
+synthetic video) and the frames/sec of each backend.
+
+Usage:
+    python benchmarks/compare_scene_detectors.py [video_path ...] [--width 128] [--frame-step 1] [--threshold 26]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+from scenedetect import detect, ContentDetector
+
+# Add parent directory to path so we can import from root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from video_analyzer.scene_detector import FastSceneDetector
+
+def make_synthetic_video(path, num_scenes=30, fps=25, size=(1280, 720), seed=0):
+    """
+    Write a video of scenes with distinct backgrounds and a moving shape.
+
+    Returns:
+        List[int]: Ground truth cut frame numbers.
+    """
+    rng = np.random.default_rng(seed)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    cuts = []
+    frame_num = 0
+    for scene in range(num_scenes):
+        if scene > 0:
+            cuts.append(frame_num)
+        length = int(rng.integers(30, 150))
+        color = rng.integers(0, 256, 3).tolist()
+        shape_color = rng.integers(0, 256, 3).tolist()
+        background = np.full((size[1], size[0], 3), color, dtype=np.uint8)
+        for i in range(length):
+            frame = background.copy()
+            x = int((i * 7) % (size[0] - 200))
+            cv2.rectangle(frame, (x, 200), (x + 200, 400), shape_color, -1)
+            noise = rng.integers(-8, 9, frame.shape, dtype=np.int16)
+            writer.write(np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8))
+            frame_num += 1
+    writer.release()
+    return cuts
+
+def count_frames(path):
+    cap = cv2.VideoCapture(path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    return total
+
+def agreement(detected, reference, tolerance):
+    """Precision and recall of detected cuts against reference cuts, matching within tolerance frames."""
+    unmatched = list(reference)
+    matched = 0
+    for cut in detected:
+        close = [r for r in unmatched if abs(r - cut) <= tolerance]
+        if close:
+            unmatched.remove(min(close, key=lambda r: abs(r - cut)))
+            matched += 1
+    precision = matched / len(detected) if detected else float(not reference)
+    recall = matched / len(reference) if reference else float(not detected)
+    return precision, recall
+
+def compare(path, fast_detector, ground_truth=None):
+    total_frames = count_frames(path)
+
+    start = time.perf_counter()
+    scene_list = detect(path, ContentDetector())
+    content_seconds = time.perf_counter() - start
+    content_cuts = [scene[0].get_frames() for scene in scene_list[1:]]
+
+    start = time.perf_counter()
+    fast_cuts, _, _, _ = fast_detector.detect(path)
+    fast_seconds = time.perf_counter() - start
+
+    tolerance = max(2, fast_detector.frame_step)
+    print(f"\n{os.path.basename(path)} ({total_frames} frames)")
+    print(f"  ContentDetector: {len(content_cuts):>4} cuts, {total_frames / content_seconds:>8.1f} frames/s")
+    print(f"  Fast detector:   {len(fast_cuts):>4} cuts, {total_frames / fast_seconds:>8.1f} frames/s "
+          f"({content_seconds / fast_seconds:.1f}x)")
+    precision, recall = agreement(fast_cuts, content_cuts, tolerance)
+    print(f"  Fast vs ContentDetector: precision {precision:.2f}, recall {recall:.2f} (±{tolerance} frames)")
+    if ground_truth is not None:
+        for name, cuts in (("ContentDetector", content_cuts), ("Fast detector", fast_cuts)):
+            precision, recall = agreement(cuts, ground_truth, tolerance)
+            print(f"  {name} vs ground truth: precision {precision:.2f}, recall {recall:.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Fast scene detector vs ContentDetector")
+    parser.add_argument("videos", nargs="*", help="Videos to compare on (a synthetic video is always included)")
+    parser.add_argument("--width", type=int, default=128)
+    parser.add_argument("--frame-step", type=int, default=1)
+    parser.add_argument("--threshold", type=float, default=26.0)
+    args = parser.parse_args()
+
+    fast_detector = FastSceneDetector(width=args.width, frame_step=args.frame_step, threshold=args.threshold)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        synthetic_path = os.path.join(tmp_dir, "synthetic.mp4")
+        ground_truth = make_synthetic_video(synthetic_path)
+        compare(synthetic_path, fast_detector, ground_truth)
+
+    for path in args.videos:
+        compare(path, fast_detector)
+
+if __name__ == "__main__":
+    main()
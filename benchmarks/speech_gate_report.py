@@ -0,0 +1,73 @@
+"""
+Report how much audio speech-gated transcription skips and how well it agrees
+with transcribing the full track.
+
+Usage:
+    python benchmarks/speech_gate_report.py video_path [--threshold 0.3] [--pad 0.5] [--merge-gap 2.0]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+# Add parent directory to path so we can import from root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from video_analyzer.audio_detector import AudioDetector, SAMPLE_RATE
+
+def words(transcript):
+    text = " ".join(text for _, _, text in transcript).lower()
+    return re.findall(r"[a-z0-9']+", text)
+
+def word_error_rate(reference, hypothesis):
+    """Word-level Levenshtein distance divided by the reference length."""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            ))
+        previous = current
+    return previous[-1] / len(reference) if reference else float(bool(hypothesis))
+
+def main():
+    parser = argparse.ArgumentParser(description="Speech-gated vs full-track Whisper transcription")
+    parser.add_argument("video_path")
+    parser.add_argument("--threshold", type=float, default=0.3)
+    parser.add_argument("--pad", type=float, default=0.5)
+    parser.add_argument("--merge-gap", type=float, default=2.0)
+    args = parser.parse_args()
+
+    detector = AudioDetector()
+    waveform = detector.extract_audio(args.video_path)
+    duration = len(waveform) / SAMPLE_RATE
+    if duration == 0:
+        print("Video has no audio track")
+        return
+
+    start = time.perf_counter()
+    full = detector.transcribe_audio(waveform)
+    full_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    starts, scores = detector.score_audio(waveform)
+    regions = detector.speech_regions(starts, scores, args.threshold, args.pad, args.merge_gap, duration=duration)
+    gated = detector.transcribe_speech(waveform, regions)
+    gated_seconds = time.perf_counter() - start
+
+    speech_seconds = sum(end - begin for begin, end in regions)
+    full_words, gated_words = words(full), words(gated)
+    print(f"Audio duration:     {duration:.1f} s")
+    print(f"Speech regions:     {len(regions)} covering {speech_seconds:.1f} s")
+    print(f"Audio skipped:      {1 - speech_seconds / duration:.1%}")
+    print(f"Full track:         {full_seconds:.1f} s, {len(full_words)} words")
+    print(f"Speech-gated:       {gated_seconds:.1f} s (including YAMNet), {len(gated_words)} words")
+    print(f"Word error rate vs full track: {word_error_rate(full_words, gated_words):.1%}")
+
+if __name__ == "__main__":
+    main()
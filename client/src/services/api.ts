@@ -1,22 +1,74 @@
 import axios, { type AxiosProgressEvent } from 'axios';
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000';
+const JOB_POLL_INTERVAL_MS = 2000;
 
-export const uploadVideo = async (file: File, onUploadProgress?: (progressEvent: AxiosProgressEvent) => void) => {
-  const formData = new FormData();
-  formData.append('file', file);
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+const waitForJob = async (jobId: string) => {
+  // Analysis runs in a background job; poll until it finishes
+  while (true) {
+    const response = await axios.get(`${API_BASE_URL}/api/video/jobs/${jobId}`);
+    const job = response.data;
+    if (job.status === 'completed') {
+      return job.result;
+    }
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Video analysis failed');
+    }
+    await sleep(JOB_POLL_INTERVAL_MS);
+  }
+};
+
+const UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024;
+const UPLOAD_MAX_RETRIES = 5;
+
+const uploadChunks = async (file: File, onUploadProgress?: (progressEvent: AxiosProgressEvent) => void) => {
+  // Resumable upload: init, PUT chunks at offsets, finalize
+  const init = await axios.post(`${API_BASE_URL}/api/video/uploads`, {
+    filename: file.name,
+    size: file.size,
+  });
+  const uploadId = init.data.upload_id;
+  let offset = 0;
+  let retries = 0;
 
+  while (offset < file.size) {
+    const chunk = file.slice(offset, offset + UPLOAD_CHUNK_SIZE);
+    try {
+      const response = await axios.put(`${API_BASE_URL}/api/video/uploads/${uploadId}`, chunk, {
+        params: { offset },
+        headers: { 'Content-Type': 'application/octet-stream' },
+      });
+      offset = response.data.offset;
+      retries = 0;
+    } catch (error) {
+      if (retries >= UPLOAD_MAX_RETRIES) {
+        throw error;
+      }
+      retries += 1;
+      await sleep(1000 * retries);
+      // Resume from whatever the server actually stored
+      const status = await axios.get(`${API_BASE_URL}/api/video/uploads/${uploadId}`);
+      offset = status.data.offset;
+    }
+    onUploadProgress?.({ loaded: offset, total: file.size } as AxiosProgressEvent);
+  }
+
+  return axios.post(`${API_BASE_URL}/api/video/uploads/${uploadId}/finalize`, {});
+};
+
+export const uploadVideo = async (file: File, onUploadProgress?: (progressEvent: AxiosProgressEvent) => void) => {
   try {
-    const response = await axios.post(`${API_BASE_URL}/api/video/upload`, formData, {
-      headers: {
-        'Content-Type': 'multipart/form-data',
-      },
-      onUploadProgress,
-    });
-    return response.data;
+    const response = await uploadChunks(file, onUploadProgress);
+    return await waitForJob(response.data.job_id);
   } catch (error) {
     if (axios.isAxiosError(error)) {
       console.error('Error uploading video:', error.response?.data || error.message);
+      if (error.response?.status === 429) {
+        const retryAfter = error.response.headers['retry-after'];
+        throw new Error(`The server is busy analyzing other videos, please retry in ${retryAfter || 'a few'} seconds`);
+      }
       throw new Error(error.response?.data?.detail || 'Failed to upload video');
     } else {
       console.error('Unexpected error uploading video:', error);
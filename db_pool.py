@@ -0,0 +1,148 @@
+"""
+Process-wide PostgreSQL connection pool.
+
+EventDB borrows a connection per request instead of opening one, so requests
+skip the TCP/auth handshake. Returned connections stay open for reuse, up to
+the pool's maximum size. Connections that sat idle are health checked before
+being handed out and broken ones are replaced transparently.
+"""
+
+import threading
+import time
+import psycopg2
+from psycopg2 import extensions, pool
+from config import DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT, DB_POOL_HEALTH_CHECK_INTERVAL
+from utils.logger import setup_logger
+
+logger = setup_logger("db_pool")
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the pool timeout."""
+
+class ConnectionPool:
+    def __init__(self, db_url, min_size=DB_POOL_MIN_SIZE, max_size=DB_POOL_MAX_SIZE,
+                 timeout=DB_POOL_TIMEOUT, health_check_interval=DB_POOL_HEALTH_CHECK_INTERVAL):
+        """
+        Initialize the pool.
+
+        Parameters:
+            db_url (str): PostgreSQL connection URL
+            min_size (int): Connections opened up front
+            max_size (int): Maximum number of open connections, all of which are kept for reuse
+            timeout (float): Seconds to wait for a free connection
+            health_check_interval (float): Connections idle longer than this are checked with SELECT 1
+        """
+        self.db_url = db_url
+        self.max_size = max(1, max_size)
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        # Borrowed connections hold a slot, so idle plus borrowed never exceeds max_size.
+        # psycopg2's own pools close returned connections beyond their minimum, this
+        # one keeps every returned connection.
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._lock = threading.Lock()
+        self._idle = []  # (connection, monotonic time it was returned), most recent last
+        self._closed = False
+        for _ in range(max(0, min(min_size, self.max_size))):
+            self._idle.append((psycopg2.connect(db_url), time.monotonic()))
+
+    def getconn(self):
+        """
+        Borrow a healthy connection, waiting up to the pool timeout for one to be free.
+
+        Returns:
+            connection: psycopg2 connection
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeoutError(f"No database connection available within {self.timeout}s")
+        try:
+            with self._lock:
+                if self._closed:
+                    raise pool.PoolError("connection pool is closed")
+                idle = self._idle.pop() if self._idle else None
+            if idle is not None:
+                conn, returned_at = idle
+                if self._is_healthy(conn, returned_at):
+                    return conn
+                logger.warning("Replacing broken database connection")
+                self._close(conn)
+            return psycopg2.connect(self.db_url)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn):
+        """
+        Return a connection to the pool, rolling back any open transaction.
+
+        Parameters:
+            conn (connection): Connection from getconn()
+        """
+        try:
+            close = bool(conn.closed)
+            if not close and conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    close = True
+            with self._lock:
+                if not close and not self._closed:
+                    self._idle.append((conn, time.monotonic()))
+                    return
+            self._close(conn)
+        finally:
+            self._slots.release()
+
+    def _is_healthy(self, conn, returned_at):
+        """Check a connection, running SELECT 1 only if it has been idle for a while."""
+        if conn.closed:
+            return False
+        if time.monotonic() - returned_at < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def closeall(self):
+        """Close every idle connection of the pool; borrowed ones are closed when returned."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._close(conn)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(db_url):
+    """
+    Return the process-wide pool for a database URL, creating it on first use.
+
+    Parameters:
+        db_url (str): PostgreSQL connection URL
+
+    Returns:
+        ConnectionPool: The shared pool
+    """
+    with _pools_lock:
+        if db_url not in _pools:
+            _pools[db_url] = ConnectionPool(db_url)
+            logger.info(f"Created database connection pool (max {_pools[db_url].max_size} connections)")
+        return _pools[db_url]
+
+def close_pools():
+    """Close all pools of this process."""
+    with _pools_lock:
+        for db_pool in _pools.values():
+            db_pool.closeall()
+        _pools.clear()
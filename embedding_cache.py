@@ -0,0 +1,186 @@
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+import numpy as np
+from config import EMBEDDING_CACHE_ENABLED, EMBEDDING_CACHE_MEMORY_ENTRIES
+from utils.logger import setup_logger
+
+logger = setup_logger("embedding_cache")
+
+def normalize_text(text):
+    """Normalize Unicode and whitespace so trivially different texts share an embedding."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+def text_hash(text):
+    """Return the BLAKE2b hex digest of a normalized text."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=32).hexdigest()
+
+class EmbeddingCache:
+    """
+    Two-tier cache of text embeddings keyed by (embedding model, normalized text hash).
+
+    The first tier is an in-process LRU shared by every EventDB of the process,
+    the second is the embedding_cache table, so embeddings survive restarts
+    and are shared between workers. Only texts missing from both tiers are
+    sent to the embeddings API.
+    """
+
+    # The memory tier and counters are shared by every instance in the process
+    _lock = threading.Lock()
+    _memory = OrderedDict()
+    _memory_hits = 0
+    _db_hits = 0
+    _misses = 0
+
+    def __init__(self, db, enabled=EMBEDDING_CACHE_ENABLED, max_memory_entries=EMBEDDING_CACHE_MEMORY_ENTRIES):
+        """
+        Initialize the cache on top of an EventDB.
+
+        Parameters:
+            db (EventDB): Database holding the cache table
+            enabled (bool): Whether embeddings are cached at all
+            max_memory_entries (int): Size of the in-process LRU (0 only uses the table)
+        """
+        self.db = db
+        self.enabled = enabled
+        self.max_memory_entries = max_memory_entries
+
+    def get_embeddings(self, model, texts, compute):
+        """
+        Return embeddings for texts, computing only the ones that are not cached.
+
+        Parameters:
+            model (str): Embedding model name
+            texts (list): Texts to embed
+            compute (Callable[[list], list]): Embeds a list of texts with the API
+
+        Returns:
+            list: Embedding vectors in the order of texts
+        """
+        texts = [normalize_text(text) for text in texts]
+        if not self.enabled:
+            return compute(texts)
+
+        keys, found, missing = self._lookup_memory(model, texts)
+        db_found = {}
+        if missing:
+            try:
+                db_found = self.db.get_cached_embeddings(model, missing)
+            except Exception as e:
+                # The API is still there if the cache table is not
+                logger.error(f"Embedding cache lookup failed: {e}")
+
+        computed = {}
+        to_compute = self._to_compute(keys, texts, found, db_found)
+        if to_compute:
+            computed = dict(zip(to_compute.keys(), compute(list(to_compute.values()))))
+            try:
+                self.db.save_cached_embeddings(model, computed)
+            except Exception as e:
+                logger.error(f"Embedding cache store failed: {e}")
+
+        return self._finish(model, keys, found, db_found, computed)
+
+    async def get_embeddings_async(self, model, texts, compute):
+        """
+        Like get_embeddings, for an AsyncEventDB and an async compute function.
+
+        Parameters:
+            model (str): Embedding model name
+            texts (list): Texts to embed
+            compute (Callable[[list], Awaitable[list]]): Embeds a list of texts with the API
+
+        Returns:
+            list: Embedding vectors in the order of texts
+        """
+        texts = [normalize_text(text) for text in texts]
+        if not self.enabled:
+            return await compute(texts)
+
+        keys, found, missing = self._lookup_memory(model, texts)
+        db_found = {}
+        if missing:
+            try:
+                db_found = await self.db.get_cached_embeddings(model, missing)
+            except Exception as e:
+                logger.error(f"Embedding cache lookup failed: {e}")
+
+        computed = {}
+        to_compute = self._to_compute(keys, texts, found, db_found)
+        if to_compute:
+            computed = dict(zip(to_compute.keys(), await compute(list(to_compute.values()))))
+            try:
+                await self.db.save_cached_embeddings(model, computed)
+            except Exception as e:
+                logger.error(f"Embedding cache store failed: {e}")
+
+        return self._finish(model, keys, found, db_found, computed)
+
+    def _lookup_memory(self, model, texts):
+        """Returns the text keys, the embeddings found in memory and the keys to look up in the table."""
+        keys = [text_hash(text) for text in texts]
+        found = {}
+        with EmbeddingCache._lock:
+            for key in keys:
+                vector = EmbeddingCache._memory.get((model, key))
+                if vector is not None:
+                    EmbeddingCache._memory.move_to_end((model, key))
+                    found[key] = vector
+        missing = list(dict.fromkeys(key for key in keys if key not in found))
+        return keys, found, missing
+
+    @staticmethod
+    def _to_compute(keys, texts, found, db_found):
+        """Returns the texts found in neither tier by key."""
+        return {key: text for key, text in zip(keys, texts) if key not in found and key not in db_found}
+
+    def _finish(self, model, keys, found, db_found, computed):
+        """Updates the memory tier and the counters and returns the embeddings in key order."""
+        memory_hits = len(found)
+        self._remember(model, {**db_found, **computed})
+        with EmbeddingCache._lock:
+            EmbeddingCache._memory_hits += memory_hits
+            EmbeddingCache._db_hits += len(db_found)
+            EmbeddingCache._misses += len(computed)
+
+        vectors = {**found, **db_found, **computed}
+        return [np.asarray(vectors[key], dtype=np.float32).tolist() for key in keys]
+
+    def _remember(self, model, vectors):
+        """Add embeddings to the in-process LRU, evicting the least recently used ones."""
+        if self.max_memory_entries <= 0 or not vectors:
+            return
+        with EmbeddingCache._lock:
+            for key, vector in vectors.items():
+                # float32 arrays take a fraction of the memory of lists of Python floats
+                EmbeddingCache._memory[(model, key)] = np.asarray(vector, dtype=np.float32)
+                EmbeddingCache._memory.move_to_end((model, key))
+            while len(EmbeddingCache._memory) > self.max_memory_entries:
+                EmbeddingCache._memory.popitem(last=False)
+
+    @classmethod
+    def clear_memory(cls):
+        """Drop the in-process tier."""
+        with cls._lock:
+            cls._memory.clear()
+
+    @classmethod
+    def stats(cls):
+        """
+        Return hit/miss counters of this process.
+
+        Returns:
+            dict: Hits per tier, misses, hit rate and size of the memory tier
+        """
+        with cls._lock:
+            memory_hits, db_hits, misses = cls._memory_hits, cls._db_hits, cls._misses
+            memory_entries = len(cls._memory)
+        total = memory_hits + db_hits + misses
+        return {
+            "memory_hits": memory_hits,
+            "db_hits": db_hits,
+            "misses": misses,
+            "hit_rate": (memory_hits + db_hits) / total if total else 0.0,
+            "memory_entries": memory_entries
+        }
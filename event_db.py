@@ -1,28 +1,305 @@
 import os
+import re
+import uuid
+import json
+import threading
 import psycopg2
-from psycopg2.extras import Json
+from psycopg2.extras import Json, execute_values
 from datetime import datetime
 import numpy as np
 from openai import OpenAI
+from config import (EVENT_STORE, OPENAI_EMBEDDING_BATCH_SIZE, VECTOR_INDEX, HNSW_M, HNSW_EF_CONSTRUCTION, HNSW_EF_SEARCH,
+                    IVFFLAT_LISTS, IVFFLAT_PROBES, SEARCH_MODE, HYBRID_RRF_K, HYBRID_CANDIDATES,
+                    LEXICAL_FAST_PATH_MAX_TERMS, EVENT_STREAM_BATCH_SIZE)
+from db_pool import get_pool
+from embedding_cache import EmbeddingCache
 from utils.logger import setup_logger
 
-class EventDB:
-    def __init__(self, db_url, openai_api_key, embedding_model):
+# Shared by every EventDB of the process
+_openai_clients = {}
+_clients_lock = threading.Lock()
+_initialized_schemas = set()
+_schema_lock = threading.Lock()
+
+def get_openai_client(api_key):
+    """
+    Return the process-wide OpenAI client for an API key.
+    
+    The client keeps its HTTP connection pool, so reusing it avoids a TLS handshake per request.
+    """
+    with _clients_lock:
+        if api_key not in _openai_clients:
+            _openai_clients[api_key] = OpenAI(api_key=api_key)
+        return _openai_clients[api_key]
+
+def init_schema(db_url, openai_api_key, embedding_model):
+    """Create the tables and indexes once, e.g. at application startup."""
+    db = open_event_db(db_url, openai_api_key, embedding_model)
+    db.close()
+
+def open_event_db(db_url, openai_api_key, embedding_model):
+    """
+    Open the configured event store.
+    
+    Returns:
+        EventDB or LocalEventDB: EventDB for EVENT_STORE=postgres, LocalEventDB for EVENT_STORE=local
+    """
+    if EVENT_STORE == "local":
+        from local_event_db import LocalEventDB
+        return LocalEventDB(openai_api_key, embedding_model)
+    return EventDB(db_url, openai_api_key, embedding_model)
+
+def is_keyword_query(query, max_terms=LEXICAL_FAST_PATH_MAX_TERMS):
+    """
+    Decide whether a query is a short keyword query worth answering from the full-text index alone.
+    
+    Parameters:
+        query (str): The search query
+        max_terms (int): Maximum number of words
+        
+    Returns:
+        bool: True for queries like "explosion" or "red car", False for questions and sentences
+    """
+    words = re.findall(r"[\w'-]+", query)
+    return 0 < len(words) <= max_terms and "?" not in query
+
+def lexical_fills_page(matches, limit):
+    """
+    Decide whether the full-text matches of a keyword query can be returned without the vector ranking.
+    
+    Short phrases like "people dancing" look like keyword queries too. Only a full
+    page of events containing every word is taken as the answer; with fewer, the
+    query goes through hybrid search so semantically related events fill the page.
+    
+    Parameters:
+        matches (list): Full-text matches, at most limit of them
+        limit (int): Number of results requested
+        
+    Returns:
+        bool: True if the matches answer the query
+    """
+    return 0 < limit <= len(matches)
+
+def _search_source(scoped):
+    """FROM clause of the search queries, restricted to one video's rows when scoped."""
+    if scoped:
+        # OFFSET 0 keeps the planner from flattening the subquery and filtering an ANN scan afterwards
+        return """(
+            SELECT * FROM events WHERE video_filename = %(video_filename)s OFFSET 0
+        ) AS candidates"""
+    return "events AS candidates"
+
+def lexical_search_sql(scoped):
+    """
+    Full-text search ranked by ts_rank_cd (cover density, a BM25-like rank that rewards
+    terms appearing close together). Every word of the query must match.
+    
+    Parameters: %(query)s, %(limit)s and, if scoped, %(video_filename)s.
+    """
+    return f"""
+        SELECT id, timestamp, description, video_id, video_filename, llm_summary,
+               ts_rank_cd(search_tsv, q) AS rank
+        FROM {_search_source(scoped)}, websearch_to_tsquery('english', %(query)s) AS q
+        WHERE search_tsv @@ q
+        ORDER BY rank DESC, timestamp
+        LIMIT %(limit)s;
+    """
+
+def hybrid_search_sql(scoped):
+    """
+    Reciprocal rank fusion of the vector and full-text rankings: each event scores
+    sum(1 / (k + rank)) over the rankings it appears in.
+    
+    Parameters: %(embedding)s (pgvector text), %(query)s, %(candidates)s, %(rrf_k)s,
+    %(limit)s and, if scoped, %(video_filename)s.
+    """
+    source = _search_source(scoped)
+    return f"""
+        WITH vector_ranked AS (
+            SELECT id, row_number() OVER (ORDER BY distance) AS rank
+            FROM (
+                SELECT id, embedding <=> %(embedding)s::text::vector AS distance
+                FROM {source}
+                ORDER BY embedding <=> %(embedding)s::text::vector
+                LIMIT %(candidates)s
+            ) AS nearest
+        ),
+        lexical_ranked AS (
+            SELECT id, row_number() OVER (ORDER BY text_rank DESC) AS rank
+            FROM (
+                SELECT id, ts_rank_cd(search_tsv, q) AS text_rank
+                FROM {source}, websearch_to_tsquery('english', %(query)s) AS q
+                WHERE search_tsv @@ q
+                ORDER BY text_rank DESC
+                LIMIT %(candidates)s
+            ) AS matches
+        ),
+        fused AS (
+            SELECT id, SUM(1.0 / (%(rrf_k)s::float8 + rank)) AS score
+            FROM (SELECT * FROM vector_ranked UNION ALL SELECT * FROM lexical_ranked) AS ranked
+            GROUP BY id
+        )
+        SELECT e.id, e.timestamp, e.description, e.video_id, e.video_filename, e.llm_summary,
+               1 - (e.embedding <=> %(embedding)s::text::vector) AS similarity
+        FROM fused
+        JOIN events e USING (id)
+        ORDER BY fused.score DESC
+        LIMIT %(limit)s;
+    """
+
+def events_page_sql(after, limit):
+    """
+    Keyset pagination query over a video's events in (timestamp, id) order.
+    
+    The row comparison lets idx_events_video_timestamp seek straight to the
+    first row of the page, unlike OFFSET which reads and discards the rows before it.
+    
+    Parameters: %(video_filename)s, plus %(after_timestamp)s and %(after_id)s / %(limit)s if requested.
+    """
+    return f"""
+        SELECT id, timestamp, description, video_id, video_filename, llm_summary
+        FROM events
+        WHERE video_filename = %(video_filename)s
+        {"AND (timestamp, id) > (%(after_timestamp)s, %(after_id)s)" if after else ""}
+        ORDER BY timestamp, id
+        {"LIMIT %(limit)s" if limit else ""};
+    """
+
+def events_page_params(video_filename, after=None, limit=None):
+    """Parameters of events_page_sql."""
+    params = {'video_filename': video_filename, 'limit': limit}
+    if after is not None:
+        params['after_timestamp'], params['after_id'] = after
+    return params
+
+def vector_literal(embedding):
+    """Format an embedding in pgvector's text format."""
+    return "[" + ",".join(str(float(x)) for x in embedding) + "]"
+
+class EmbeddingMixin:
+    """
+    Embedding requests and moment validation shared by the event stores.
+    
+    Subclasses set client, embedding_model, embedding_batch_size, embedding_cache and logger.
+    """
+    
+    def _get_embedding(self, text):
+        """
+        Get embedding for text using OpenAI's API.
+        
+        Parameters:
+            text (str): Text to generate embedding for
+            
+        Returns:
+            list: Embedding vector
+        """
+        return self._get_embeddings([text])[0]
+    
+    def _get_embeddings(self, texts):
+        """
+        Get embeddings for several texts, only calling the API for texts not in the embedding cache.
+        
+        Parameters:
+            texts (list): Texts to generate embeddings for
+            
+        Returns:
+            list: Embedding vectors in the order of texts
+        """
+        return self.embedding_cache.get_embeddings(self.embedding_model, texts, self._request_embeddings)
+    
+    def _request_embeddings(self, texts):
+        """
+        Request embeddings from the API with as few requests as possible.
+        
+        Parameters:
+            texts (list): Texts to generate embeddings for
+            
+        Returns:
+            list: Embedding vectors in the order of texts
+        """
+        embeddings = []
+        for start in range(0, len(texts), self.embedding_batch_size):
+            response = self.client.embeddings.create(
+                model=self.embedding_model,
+                input=texts[start:start + self.embedding_batch_size]
+            )
+            # The API returns one item per input, tagged with its position in the batch
+            embeddings.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+        return embeddings
+    
+    def _moment_rows(self, llm_analysis):
+        """
+        Validate the moments of an LLM analysis, logging and skipping invalid ones.
+        
+        Parameters:
+            llm_analysis (dict): The LLM analysis containing moments
+            
+        Returns:
+            list: (timestamp seconds, description, summary) tuples of the valid moments
+        """
+        rows = []
+        
+        for i, moment in enumerate(llm_analysis["moments"]):
+            try:
+                # Check for required fields
+                required_fields = ["start_time", "end_time", "description"]
+                missing_fields = [field for field in required_fields if field not in moment]
+                if missing_fields:
+                    self.logger.warning(f"Moment {i} is missing required fields: {missing_fields}, skipping")
+                    continue
+                
+                description = moment["description"]
+                if not isinstance(description, str) or not description.strip():
+                    self.logger.warning(f"Moment {i} has an empty description, skipping")
+                    continue
+                
+                # Use start_time directly as seconds (float)
+                timestamp_seconds = float(moment["start_time"])
+                self.logger.debug(f"Processing moment {i}: start_time={moment['start_time']} (type={type(moment['start_time'])}) -> timestamp_seconds={timestamp_seconds}")
+                
+                rows.append((timestamp_seconds, description, moment.get("summary")))  # summary is optional
+                
+            except (ValueError, TypeError) as e:
+                # Catch errors related to timestamp conversion
+                self.logger.error(f"Timestamp conversion error for moment {i}: {e}", exc_info=True)
+                continue
+        return rows
+
+class EventDB(EmbeddingMixin):
+    def __init__(self, db_url, openai_api_key, embedding_model, embedding_batch_size=OPENAI_EMBEDDING_BATCH_SIZE):
         """
-        Initialize the EventDB with database connection and OpenAI client.
+        Initialize the EventDB with a pooled database connection and a shared OpenAI client.
+        
+        Connections come from a process-wide pool and the schema is created
+        once per process, so constructing an EventDB per request is cheap.
         
         Parameters:
             db_url (str): PostgreSQL connection URL
             openai_api_key (str): OpenAI API key for generating embeddings
             embedding_model (str): OpenAI model to use for embeddings
+            embedding_batch_size (int): Maximum number of texts per embeddings request
         """
         self.logger = setup_logger("event_db")
-        self.conn = psycopg2.connect(db_url)
-        self.client = OpenAI(api_key=openai_api_key)
+        self.pool = get_pool(db_url)
+        self.conn = self.pool.getconn()
+        self.client = get_openai_client(openai_api_key)
         self.embedding_model = embedding_model
+        self.embedding_batch_size = max(1, embedding_batch_size)
+        self.embedding_cache = EmbeddingCache(self)
         
-        # Create the table if it doesn't exist
-        self._create_tables()
+        # Create the tables if this process hasn't done so yet
+        try:
+            self._ensure_schema(db_url)
+        except Exception:
+            self.close()
+            raise
+    
+    def _ensure_schema(self, db_url):
+        """Run the schema DDL the first time a database is used in this process."""
+        with _schema_lock:
+            if db_url not in _initialized_schemas:
+                self._create_tables()
+                _initialized_schemas.add(db_url)
     
     def _create_tables(self):
         """Create necessary tables and extensions if they don't exist."""
@@ -45,25 +322,124 @@ class EventDB:
                 -- Create index on video_id and video_filename for faster lookups
                 CREATE INDEX IF NOT EXISTS idx_events_video_id ON events(video_id);
                 CREATE INDEX IF NOT EXISTS idx_events_video_filename ON events(video_filename);
+                -- Keyset pagination of a video's events in (timestamp, id) order
+                CREATE INDEX IF NOT EXISTS idx_events_video_timestamp ON events(video_filename, timestamp, id);
+                
+                -- Full-text search over descriptions (weighted higher) and summaries
+                ALTER TABLE events ADD COLUMN IF NOT EXISTS search_tsv tsvector
+                    GENERATED ALWAYS AS (
+                        setweight(to_tsvector('english', description), 'A') ||
+                        setweight(to_tsvector('english', coalesce(llm_summary, '')), 'B')
+                    ) STORED;
+                CREATE INDEX IF NOT EXISTS idx_events_search_tsv ON events USING GIN (search_tsv);
+                
+                -- Full analysis results keyed by the content hash of the video
+                CREATE TABLE IF NOT EXISTS analysis_cache (
+                    content_hash TEXT PRIMARY KEY,
+                    video_filename TEXT NOT NULL,
+                    llm_analysis JSONB NOT NULL,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    last_used_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                );
+                CREATE INDEX IF NOT EXISTS idx_analysis_cache_last_used ON analysis_cache(last_used_at);
+                
+                -- Embeddings keyed by model and the hash of the normalized text
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    model TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    embedding vector NOT NULL,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    PRIMARY KEY (model, text_hash)
+                );
+                
+                -- Bumped whenever a video's events change, used as the ETag of its event listing
+                CREATE TABLE IF NOT EXISTS video_versions (
+                    video_filename TEXT PRIMARY KEY,
+                    version BIGINT NOT NULL DEFAULT 1,
+                    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                );
+                -- Video whose analysis the events came from, NULL if they weren't saved from one
+                ALTER TABLE video_versions ADD COLUMN IF NOT EXISTS content_hash TEXT;
             """)
+            self._create_vector_index(cur)
             self.conn.commit()
             self.logger.info("Database tables and indexes created/verified")
     
-    def _get_embedding(self, text):
+    def _create_vector_index(self, cur, rebuild=False):
         """
-        Get embedding for text using OpenAI's API.
+        Create the configured approximate nearest neighbour index on event embeddings.
+        
+        Only one kind of index is kept, so switching VECTOR_INDEX drops the other one.
         
         Parameters:
-            text (str): Text to generate embedding for
+            cur (cursor): Cursor of the schema transaction
+            rebuild (bool): Drop and recreate the index, e.g. so IVFFlat lists fit data loaded since
+        """
+        for kind in ("hnsw", "ivfflat"):
+            if kind != VECTOR_INDEX or rebuild:
+                cur.execute(f"DROP INDEX IF EXISTS idx_events_embedding_{kind};")
+        if VECTOR_INDEX == "hnsw":
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_events_embedding_hnsw ON events
+                USING hnsw (embedding vector_cosine_ops) WITH (m = %s, ef_construction = %s);
+            """, (HNSW_M, HNSW_EF_CONSTRUCTION))
+        elif VECTOR_INDEX == "ivfflat":
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_events_embedding_ivfflat ON events
+                USING ivfflat (embedding vector_cosine_ops) WITH (lists = %s);
+            """, (IVFFLAT_LISTS,))
+    
+    def rebuild_vector_index(self):
+        """Recreate the embedding index from the current rows."""
+        with self.conn.cursor() as cur:
+            self._create_vector_index(cur, rebuild=True)
+        self.conn.commit()
+        self.logger.info(f"Rebuilt {VECTOR_INDEX} index on event embeddings")
+    
+    def _bump_version(self, cur, video_filename, content_hash=None):
+        """
+        Increase the version of a video in the transaction that changes its events,
+        recording the content hash of the video the events now describe.
+        """
+        cur.execute("""
+            INSERT INTO video_versions (video_filename, content_hash) VALUES (%s, %s)
+            ON CONFLICT (video_filename)
+            DO UPDATE SET version = video_versions.version + 1, content_hash = EXCLUDED.content_hash,
+                          updated_at = now();
+        """, (video_filename, content_hash))
+    
+    def get_video_content_hash(self, video_filename):
+        """
+        Get the content hash of the video whose analysis a filename's events were saved from.
+        
+        Returns:
+            str: The hash, or None if unknown (e.g. events saved one by one)
+        """
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute("SELECT content_hash FROM video_versions WHERE video_filename = %s;", (video_filename,))
+                row = cur.fetchone()
+                return row[0] if row else None
+        finally:
+            self.conn.rollback()
+    
+    def get_video_version(self, video_filename):
+        """
+        Get the version of a video's events.
+        
+        Parameters:
+            video_filename (str): The video filename
             
         Returns:
-            list: Embedding vector
+            int: Version, 0 if the video never had events
         """
-        response = self.client.embeddings.create(
-            model=self.embedding_model,
-            input=text
-        )
-        return response.data[0].embedding
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute("SELECT version FROM video_versions WHERE video_filename = %s;", (video_filename,))
+                row = cur.fetchone()
+                return row[0] if row else 0
+        finally:
+            self.conn.rollback()
     
     def save_event(self, timestamp, description, video_id, video_filename, llm_summary=None):
         """
@@ -88,17 +464,31 @@ class EventDB:
             """, (timestamp, description, video_id, video_filename, embedding, llm_summary))
             
             event_id = cur.fetchone()[0]
+            self._bump_version(cur, video_filename)
             self.conn.commit()
             self.logger.debug(f"Saved event {event_id} for video {video_filename}")
             return event_id
 
-    def save_llm_analysis(self, llm_analysis, video_filename):
+    def _replace_events(self, cur, video_filename, content_hash=None):
         """
-        Save multiple events from LLM analysis to the database.
+        Start replacing a video's events in the current transaction.
+        
+        Bumping the version first locks the video's version row, so concurrent
+        writers of the video (e.g. a worker that lost its lease and the one that
+        reclaimed the job) take turns, and each DELETE sees the events the
+        previous writer committed.
+        """
+        self._bump_version(cur, video_filename, content_hash)
+        cur.execute("DELETE FROM events WHERE video_filename = %s;", (video_filename,))
+    
+    def save_llm_analysis(self, llm_analysis, video_filename, content_hash=None):
+        """
+        Save the events from LLM analysis to the database, replacing any earlier events of the video.
         
         Parameters:
             llm_analysis (dict): The LLM analysis containing moments
             video_filename (str): Original filename of the video
+            content_hash (str, optional): Content hash of the analyzed video, recorded for the analysis cache
             
         Returns:
             list: List of saved event IDs
@@ -108,43 +498,184 @@ class EventDB:
             return []
             
         video_id = os.path.splitext(video_filename)[0]
-        saved_ids = []
+        rows = self._moment_rows(llm_analysis)
         
-        for i, moment in enumerate(llm_analysis["moments"]):
-            try:
-                # Check for required fields
-                required_fields = ["start_time", "end_time", "description"]
-                missing_fields = [field for field in required_fields if field not in moment]
-                if missing_fields:
-                    self.logger.warning(f"Moment {i} is missing required fields: {missing_fields}, skipping")
-                    continue
-                
-                # Use start_time directly as seconds (float)
-                timestamp_seconds = float(moment["start_time"])
-                self.logger.debug(f"Processing moment {i}: start_time={moment['start_time']} (type={type(moment['start_time'])}) -> timestamp_seconds={timestamp_seconds}")
-                
-                # Save event
-                event_id = self.save_event(
-                    timestamp=timestamp_seconds,
-                    description=moment["description"],
-                    video_id=video_id,
-                    video_filename=video_filename,
-                    llm_summary=moment.get("summary")  # Optional field
-                )
-                saved_ids.append(event_id)
-                
-            except (ValueError, TypeError) as e:
-                # Catch errors related to timestamp conversion
-                self.logger.error(f"Timestamp conversion error for moment {i}: {e}", exc_info=True)
-                continue
-            except Exception as e:
-                # Catch any other general exceptions during saving
-                self.logger.error(f"Error saving moment {i}: {e}", exc_info=True)
-                continue
+        if not rows:
+            self.logger.info(f"Saved 0 events to database for video {video_filename}")
+            return []
+        
+        # One batched embeddings request, then the delete and a multi-row insert in a single transaction
+        try:
+            embeddings = self._get_embeddings([description for _, description, _ in rows])
+            with self.conn.cursor() as cur:
+                self._replace_events(cur, video_filename, content_hash)
+                results = execute_values(cur, """
+                    INSERT INTO events (timestamp, description, video_id, video_filename, embedding, llm_summary)
+                    VALUES %s
+                    RETURNING id;
+                """, [
+                    (timestamp, description, video_id, video_filename, embedding, summary)
+                    for (timestamp, description, summary), embedding in zip(rows, embeddings)
+                ], template="(%s, %s, %s, %s, %s::vector, %s)", page_size=len(rows), fetch=True)
+                saved_ids = [row[0] for row in results]
+            self.conn.commit()
+        except Exception as e:
+            self.conn.rollback()
+            self.logger.error(f"Error saving {len(rows)} moments for video {video_filename}: {e}", exc_info=True)
+            return []
             
         self.logger.info(f"Saved {len(saved_ids)} events to database for video {video_filename}")
         return saved_ids
     
+    def copy_events(self, source_filename, video_filename, content_hash):
+        """
+        Copy all events of one video to another filename, reusing the stored embeddings.
+        
+        The copies replace any earlier events of the target filename. Nothing is
+        copied unless the source's events were saved from the video with the given
+        content hash, e.g. when another video has been uploaded under its name since.
+        
+        Parameters:
+            source_filename (str): Filename whose events are copied
+            video_filename (str): Filename the copies are saved under
+            content_hash (str): Content hash of the video the events must describe
+            
+        Returns:
+            list: List of new event IDs
+        """
+        video_id = os.path.splitext(video_filename)[0]
+        with self.conn.cursor() as cur:
+            self._replace_events(cur, video_filename, content_hash)
+            cur.execute("""
+                INSERT INTO events (timestamp, description, video_id, video_filename, embedding, llm_summary)
+                SELECT timestamp, description, %s, %s, embedding, llm_summary
+                FROM events
+                WHERE video_filename = %s AND EXISTS (
+                    SELECT 1 FROM video_versions WHERE video_filename = %s AND content_hash = %s
+                )
+                ORDER BY timestamp, id
+                RETURNING id;
+            """, (video_id, video_filename, source_filename, source_filename, content_hash))
+            event_ids = [row[0] for row in cur.fetchall()]
+            if event_ids:
+                self.conn.commit()
+            else:
+                # Nothing to copy, keep the target's events until save_llm_analysis replaces them
+                self.conn.rollback()
+        self.logger.info(f"Copied {len(event_ids)} events from {source_filename} to {video_filename}")
+        return event_ids
+    
+    def get_cached_analysis(self, content_hash):
+        """
+        Look up a cached analysis and mark it as recently used.
+        
+        Parameters:
+            content_hash (str): Content hash of the video
+            
+        Returns:
+            dict: {'video_filename', 'llm_analysis'} or None if not cached
+        """
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                UPDATE analysis_cache
+                SET last_used_at = now()
+                WHERE content_hash = %s
+                RETURNING video_filename, llm_analysis;
+            """, (content_hash,))
+            row = cur.fetchone()
+            self.conn.commit()
+        if row is None:
+            return None
+        return {'video_filename': row[0], 'llm_analysis': row[1]}
+    
+    def save_cached_analysis(self, content_hash, video_filename, llm_analysis, max_entries):
+        """
+        Store an analysis under the content hash of its video, evicting the least recently used entries.
+        
+        Parameters:
+            content_hash (str): Content hash of the video
+            video_filename (str): Filename the analysis was saved under
+            llm_analysis (dict): The LLM analysis
+            max_entries (int): Maximum number of cached analyses to keep
+            
+        Returns:
+            int: Number of evicted entries
+        """
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO analysis_cache (content_hash, video_filename, llm_analysis)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (content_hash) DO UPDATE
+                SET video_filename = EXCLUDED.video_filename,
+                    llm_analysis = EXCLUDED.llm_analysis,
+                    last_used_at = now();
+            """, (content_hash, video_filename, Json(llm_analysis)))
+            cur.execute("""
+                DELETE FROM analysis_cache
+                WHERE content_hash IN (
+                    SELECT content_hash FROM analysis_cache
+                    ORDER BY last_used_at DESC
+                    OFFSET %s
+                );
+            """, (max_entries,))
+            evicted = cur.rowcount
+            self.conn.commit()
+        if evicted:
+            self.logger.info(f"Evicted {evicted} analyses from the cache")
+        return evicted
+    
+    def get_analysis_cache_size(self):
+        """Return the number of cached analyses."""
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT count(*) FROM analysis_cache;")
+            return cur.fetchone()[0]
+    
+    def get_cached_embeddings(self, model, text_hashes):
+        """
+        Look up cached embeddings.
+        
+        Parameters:
+            model (str): Embedding model name
+            text_hashes (list): Hashes of the normalized texts
+            
+        Returns:
+            dict: Embedding vectors by text hash, for the hashes that are cached
+        """
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute("""
+                    SELECT text_hash, embedding::text
+                    FROM embedding_cache
+                    WHERE model = %s AND text_hash = ANY(%s);
+                """, (model, list(text_hashes)))
+                rows = cur.fetchall()
+        finally:
+            # Read-only, but don't leave the connection idle (or aborted) in a transaction
+            self.conn.rollback()
+        # pgvector's text format '[0.1,0.2,...]' parses as JSON
+        return {text_hash: json.loads(embedding) for text_hash, embedding in rows}
+    
+    def save_cached_embeddings(self, model, embeddings):
+        """
+        Store embeddings in the cache table.
+        
+        Parameters:
+            model (str): Embedding model name
+            embeddings (dict): Embedding vectors by text hash
+        """
+        try:
+            with self.conn.cursor() as cur:
+                execute_values(cur, """
+                    INSERT INTO embedding_cache (model, text_hash, embedding)
+                    VALUES %s
+                    ON CONFLICT (model, text_hash) DO NOTHING;
+                """, [(model, text_hash, list(embedding)) for text_hash, embedding in embeddings.items()],
+                    template="(%s, %s, %s::vector)")
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+    
     def get_events_by_video_id(self, video_id):
         """
         Get all events for a specific video ID.
@@ -207,59 +738,204 @@ class EventDB:
             self.logger.info(f"Retrieved {len(events)} events for video {video_filename}")
             return events
     
+    def get_events_page(self, video_filename, limit, after=None):
+        """
+        Get one page of a video's events in (timestamp, id) order.
+        
+        Parameters:
+            video_filename (str): The video filename to search for
+            limit (int): Maximum number of events
+            after (tuple, optional): (timestamp, id) of the last event of the previous page
+            
+        Returns:
+            list: List of event dictionaries
+        """
+        return list(self.iter_events(video_filename, after, limit))
+    
+    def iter_events(self, video_filename, after=None, limit=None, batch_size=EVENT_STREAM_BATCH_SIZE):
+        """
+        Iterate over a video's events in (timestamp, id) order through a server-side cursor,
+        fetching batch_size rows per round trip instead of the whole result at once.
+        
+        Parameters:
+            video_filename (str): The video filename to search for
+            after (tuple, optional): Only events after this (timestamp, id)
+            limit (int, optional): Maximum number of events
+            batch_size (int): Rows per round trip
+            
+        Yields:
+            dict: Event dictionaries
+        """
+        sql = events_page_sql(after is not None, limit is not None)
+        try:
+            with self.conn.cursor(name=f"events_{uuid.uuid4().hex}") as cur:
+                cur.itersize = batch_size
+                cur.execute(sql, events_page_params(video_filename, after, limit))
+                for row in cur:
+                    yield {
+                        'id': row[0],
+                        'timestamp': row[1],
+                        'description': row[2],
+                        'video_id': row[3],
+                        'video_filename': row[4],
+                        'llm_summary': row[5]
+                    }
+        finally:
+            self.conn.rollback()
+    
     def close(self):
-        """Close the database connection."""
-        self.conn.close()
-        self.logger.info("Database connection closed") 
+        """Return the database connection to the pool."""
+        if self.conn is not None:
+            self.pool.putconn(self.conn)
+            self.conn = None
+            self.logger.debug("Database connection returned to the pool")
 
-    def search_events(self, query, limit=5):
+
+    def search_events(self, query, limit=5, video_filename=None, mode=SEARCH_MODE):
         """
-        Search events using semantic similarity.
+        Search events using semantic similarity, optionally fused with full-text rank.
+        
+        In hybrid mode, short keyword queries whose words all appear in at least
+        limit events are answered from the full-text index without an embeddings
+        request; other queries fuse the vector and full-text rankings.
+        
+        Across all videos the approximate nearest neighbour index is used. Search
+        within one video reads that video's events through the video_filename
+        index and ranks them exactly: a video has few events, and filtering the
+        results of an ANN scan afterwards could return fewer than limit of them.
         
         Parameters:
             query (str): The search query
             limit (int): Maximum number of results to return
+            video_filename (str, optional): Only search the events of this video
+            mode (str): "vector" or "hybrid"
             
         Returns:
-            list: List of matching event dictionaries with similarity scores
+            list: List of matching event dictionaries with similarity scores (None for full-text matches)
         """
+        params = {'query': query, 'limit': limit, 'video_filename': video_filename}
+        if mode == "hybrid" and is_keyword_query(query):
+            events = self.lexical_search(params)
+            if lexical_fills_page(events, limit):
+                self.logger.info(f"Answered keyword query from the full-text index ({len(events)} events)")
+                return events
+        
         # Generate embedding for the query
         query_embedding = self._get_embedding(query)
         
-        with self.conn.cursor() as cur:
-            cur.execute("""
-                SELECT 
-                    id, 
-                    timestamp, 
-                    description, 
-                    video_id, 
-                    video_filename, 
-                    llm_summary,
-                    1 - (embedding <=> %s::vector) as similarity
-                FROM events
-                ORDER BY embedding <=> %s::vector
-                LIMIT %s;
-            """, (query_embedding, query_embedding, limit))
+        try:
+            with self.conn.cursor() as cur:
+                if mode == "hybrid":
+                    candidates = max(HYBRID_CANDIDATES, limit)
+                    self._set_search_breadth(cur, video_filename, candidates)
+                    cur.execute(hybrid_search_sql(bool(video_filename)), {
+                        **params,
+                        'embedding': vector_literal(query_embedding),
+                        'candidates': candidates,
+                        'rrf_k': HYBRID_RRF_K
+                    })
+                elif video_filename:
+                    cur.execute("""
+                        WITH video_events AS MATERIALIZED (
+                            SELECT id, timestamp, description, video_id, video_filename, llm_summary, embedding
+                            FROM events
+                            WHERE video_filename = %s
+                        )
+                        SELECT 
+                            id, 
+                            timestamp, 
+                            description, 
+                            video_id, 
+                            video_filename, 
+                            llm_summary,
+                            1 - (embedding <=> %s::vector) as similarity
+                        FROM video_events
+                        ORDER BY embedding <=> %s::vector
+                        LIMIT %s;
+                    """, (video_filename, query_embedding, query_embedding, limit))
+                else:
+                    self._set_search_breadth(cur, video_filename, limit)
+                    cur.execute("""
+                        SELECT 
+                            id, 
+                            timestamp, 
+                            description, 
+                            video_id, 
+                            video_filename, 
+                            llm_summary,
+                            1 - (embedding <=> %s::vector) as similarity
+                        FROM events
+                        ORDER BY embedding <=> %s::vector
+                        LIMIT %s;
+                    """, (query_embedding, query_embedding, limit))
+                rows = cur.fetchall()
+        finally:
+            self.conn.rollback()
             
-            events = []
-            for row in cur.fetchall():
-                events.append({
-                    'id': row[0],
-                    'timestamp': row[1],
-                    'description': row[2],
-                    'video_id': row[3],
-                    'video_filename': row[4],
-                    'llm_summary': row[5],
-                    'similarity': float(row[6])
-                })
-            self.logger.info(f"Found {len(events)} events matching query")
-            return events
+        events = []
+        for row in rows:
+            events.append({
+                'id': row[0],
+                'timestamp': row[1],
+                'description': row[2],
+                'video_id': row[3],
+                'video_filename': row[4],
+                'llm_summary': row[5],
+                'similarity': float(row[6])
+            })
+        self.logger.info(f"Found {len(events)} events matching query" + (f" in {video_filename}" if video_filename else ""))
+        return events
+
+    def _set_search_breadth(self, cur, video_filename, limit):
+        """Set the ANN search breadth for the current transaction (scoped searches are exact)."""
+        if video_filename:
+            return
+        if VECTOR_INDEX == "hnsw":
+            cur.execute("SET LOCAL hnsw.ef_search = %s;", (max(HNSW_EF_SEARCH, limit),))
+        elif VECTOR_INDEX == "ivfflat":
+            cur.execute("SET LOCAL ivfflat.probes = %s;", (IVFFLAT_PROBES,))
+    
+    def lexical_search(self, params):
+        """
+        Full-text search requiring every query word to match.
+        
+        Parameters:
+            params (dict): 'query', 'limit' and 'video_filename' (None searches all videos)
+            
+        Returns:
+            list: Matching event dictionaries, best ranked first, with similarity None
+        """
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute(lexical_search_sql(bool(params['video_filename'])), params)
+                rows = cur.fetchall()
+        finally:
+            self.conn.rollback()
+        return [{
+            'id': row[0],
+            'timestamp': row[1],
+            'description': row[2],
+            'video_id': row[3],
+            'video_filename': row[4],
+            'llm_summary': row[5],
+            'similarity': None
+        } for row in rows]
 
     def reset_database(self):
         """Drop and recreate all tables."""
         with self.conn.cursor() as cur:
             # Drop existing tables
             cur.execute("DROP TABLE IF EXISTS events;")
+            cur.execute("DROP TABLE IF EXISTS analysis_cache;")
+            cur.execute("DROP TABLE IF EXISTS embedding_cache;")
+            # Versions are kept and bumped, so ETags of listings from before the reset don't match
+            cur.execute("""
+                DO $$ BEGIN
+                    IF to_regclass('video_versions') IS NOT NULL THEN
+                        UPDATE video_versions SET version = version + 1, content_hash = NULL, updated_at = now();
+                    END IF;
+                END $$;
+            """)
             self.conn.commit()
             self.logger.info("Dropped existing tables")
             
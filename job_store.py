@@ -0,0 +1,295 @@
+"""
+Analysis jobs in a Postgres table, shared by the API and a fleet of workers.
+
+With JOB_BACKEND = "postgres" the API inserts jobs into the jobs table of the
+events database instead of running them in its own threads, and any number of
+worker.py processes, on any host that reaches the database and the upload
+directory, run them. No broker is involved:
+- Workers claim the oldest claimable job with SELECT ... FOR UPDATE SKIP LOCKED,
+  so concurrent workers neither wait for nor claim the same row.
+- A claim is a lease the worker renews with heartbeats while the job runs. A job
+  whose lease expired (its worker crashed or lost the database) is claimed again
+  by another worker, and failed after JOB_MAX_ATTEMPTS claims.
+- Workers write the stage they are in and the result to the row, where the
+  API's /jobs endpoints read it. A worker whose heartbeat finds the job
+  reclaimed stops it before saving anything (see LeaseLostError).
+"""
+
+import socket
+import threading
+import uuid
+from contextlib import contextmanager
+from psycopg2.extras import Json
+from config import ANALYSIS_QUEUE_SIZE, JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS
+from db_pool import get_pool
+from utils.logger import setup_logger
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+# Columns of a job as returned by get, timestamps as Unix time like api.jobs.Job
+_JOB_COLUMNS = """
+    id, status, description, stage, attempts, result, error,
+    EXTRACT(EPOCH FROM created_at)::float8, EXTRACT(EPOCH FROM started_at)::float8,
+    EXTRACT(EPOCH FROM finished_at)::float8
+"""
+
+# Schema is created once per process and database
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+class LeaseLostError(Exception):
+    """Raised into a running job whose lease expired and was claimed by another worker."""
+
+def new_worker_id():
+    """Id of a worker process, readable in the jobs table."""
+    return f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+
+class JobStore:
+    def __init__(self, db_url, max_queue_size=ANALYSIS_QUEUE_SIZE, lease_seconds=JOB_LEASE_SECONDS,
+                 max_attempts=JOB_MAX_ATTEMPTS):
+        """
+        Initialize the JobStore on the process-wide connection pool.
+
+        Parameters:
+            db_url (str): PostgreSQL connection URL
+            max_queue_size (int): Queued jobs beyond this are rejected
+            lease_seconds (float): How long a claim or heartbeat keeps a job
+            max_attempts (int): Claims of a job before an expired lease fails it
+        """
+        self.pool = get_pool(db_url)
+        self.max_queue_size = max_queue_size
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.logger = setup_logger("job_store")
+        with _schema_lock:
+            if db_url not in _schema_ready:
+                self._create_tables()
+                _schema_ready.add(db_url)
+
+    @contextmanager
+    def _transaction(self):
+        """Borrow a connection and commit on success; the pool rolls back on errors."""
+        conn = self.pool.getconn()
+        try:
+            with conn.cursor() as cur:
+                yield cur
+            conn.commit()
+        finally:
+            self.pool.putconn(conn)
+
+    def _create_tables(self):
+        """Create the jobs and job_workers tables if they don't exist."""
+        with self._transaction() as cur:
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload JSONB NOT NULL,
+                    description TEXT,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    stage TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker_id TEXT,
+                    lease_expires_at TIMESTAMPTZ,
+                    result JSONB,
+                    error TEXT,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    started_at TIMESTAMPTZ,
+                    heartbeat_at TIMESTAMPTZ,
+                    finished_at TIMESTAMPTZ
+                );
+                -- Claims scan unfinished jobs in submission order
+                CREATE INDEX IF NOT EXISTS idx_jobs_unfinished ON jobs(created_at)
+                    WHERE status IN ('queued', 'running');
+
+                -- Workers announce themselves while polling, for queue statistics
+                CREATE TABLE IF NOT EXISTS job_workers (
+                    worker_id TEXT PRIMARY KEY,
+                    started_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    last_seen_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                );
+            """)
+
+    def submit(self, kind, payload, description=None):
+        """
+        Queue a job.
+
+        Parameters:
+            kind (str): What the worker runs, e.g. "analyze_video"
+            payload (dict): JSON arguments of the job
+            description (str, optional): Human readable label (e.g. the video filename)
+
+        Returns:
+            dict: The queued job, see get
+        """
+        job_id = uuid.uuid4().hex
+        with self._transaction() as cur:
+            cur.execute("""
+                INSERT INTO jobs (id, kind, payload, description) VALUES (%s, %s, %s, %s);
+            """, (job_id, kind, Json(payload), description))
+        return self.get(job_id)
+
+    def get(self, job_id):
+        """
+        Returns the public view of a job, like api.jobs.Job.to_dict, or None.
+        """
+        with self._transaction() as cur:
+            cur.execute(f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id = %s;", (job_id,))
+            row = cur.fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row[0],
+            "status": row[1],
+            "description": row[2],
+            "stage": row[3],
+            "attempts": row[4],
+            "result": row[5],
+            "error": row[6],
+            "created_at": row[7],
+            "started_at": row[8],
+            "finished_at": row[9]
+        }
+
+    def is_full(self):
+        """Returns True if a submit would exceed the queue size."""
+        with self._transaction() as cur:
+            cur.execute("SELECT count(*) FROM jobs WHERE status = 'queued';")
+            return cur.fetchone()[0] >= self.max_queue_size
+
+    def retry_after(self, default=30):
+        """
+        Estimate in seconds until a queue slot frees up, from recent job durations and live workers.
+        """
+        with self._transaction() as cur:
+            cur.execute("""
+                SELECT avg(EXTRACT(EPOCH FROM finished_at - started_at))::float8
+                FROM (
+                    SELECT started_at, finished_at FROM jobs
+                    WHERE status = 'completed'
+                    ORDER BY finished_at DESC
+                    LIMIT 20
+                ) AS recent;
+            """)
+            average = cur.fetchone()[0]
+            workers = self._live_workers(cur)
+        if average is None:
+            return default
+        return max(1, int(average / max(1, workers)))
+
+    def _live_workers(self, cur):
+        cur.execute("""
+            SELECT count(*) FROM job_workers
+            WHERE last_seen_at > now() - make_interval(secs => %s);
+        """, (self.lease_seconds,))
+        return cur.fetchone()[0]
+
+    def stats(self):
+        """
+        Returns queue depth and worker utilization across the fleet, like api.jobs.JobQueue.stats.
+        """
+        counts = {QUEUED: 0, RUNNING: 0, COMPLETED: 0, FAILED: 0}
+        with self._transaction() as cur:
+            cur.execute("SELECT status, count(*) FROM jobs GROUP BY status;")
+            counts.update(dict(cur.fetchall()))
+            cur.execute("SELECT count(*) FROM jobs WHERE status = 'running' AND lease_expires_at > now();")
+            busy = cur.fetchone()[0]
+            workers = self._live_workers(cur)
+        return {
+            "queue_depth": counts[QUEUED],
+            "max_queue_size": self.max_queue_size,
+            "workers": workers,
+            "busy_workers": busy,
+            "utilization": min(1.0, busy / workers) if workers else 0.0,
+            "jobs": counts
+        }
+
+    def claim(self, worker_id):
+        """
+        Claim the oldest queued job, or a running job whose lease expired.
+
+        Expired jobs that used up their attempts are failed first.
+
+        Parameters:
+            worker_id (str): Id of the claiming worker
+
+        Returns:
+            dict: id, kind, payload, description and attempts of the job, or None if there is nothing to do
+        """
+        params = {'worker_id': worker_id, 'lease': self.lease_seconds, 'max_attempts': self.max_attempts}
+        with self._transaction() as cur:
+            cur.execute("""
+                INSERT INTO job_workers (worker_id) VALUES (%(worker_id)s)
+                ON CONFLICT (worker_id) DO UPDATE SET last_seen_at = now();
+            """, params)
+            cur.execute("""
+                UPDATE jobs
+                SET status = 'failed', finished_at = now(),
+                    error = 'Worker lost after ' || attempts || ' attempts (last: ' || worker_id || ')'
+                WHERE status = 'running' AND lease_expires_at < now() AND attempts >= %(max_attempts)s
+                RETURNING id;
+            """, params)
+            for (job_id,) in cur.fetchall():
+                self.logger.warning(f"Job {job_id} failed, its lease expired {self.max_attempts} times")
+            cur.execute("""
+                UPDATE jobs
+                SET status = 'running', worker_id = %(worker_id)s, attempts = attempts + 1,
+                    stage = NULL, started_at = now(), heartbeat_at = now(),
+                    lease_expires_at = now() + make_interval(secs => %(lease)s)
+                WHERE id = (
+                    SELECT id FROM jobs
+                    WHERE status = 'queued' OR (status = 'running' AND lease_expires_at < now())
+                    ORDER BY created_at
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, kind, payload, description, attempts;
+            """, params)
+            row = cur.fetchone()
+        if row is None:
+            return None
+        if row[4] > 1:
+            self.logger.warning(f"Reclaimed job {row[0]} (attempt {row[4]})")
+        return {"id": row[0], "kind": row[1], "payload": row[2], "description": row[3], "attempts": row[4]}
+
+    def heartbeat(self, job_id, worker_id, stage=None):
+        """
+        Renew the lease of a running job, optionally recording its stage.
+
+        Returns:
+            bool: False if the job is no longer this worker's (its lease expired and it was reclaimed)
+        """
+        with self._transaction() as cur:
+            cur.execute("""
+                UPDATE jobs
+                SET heartbeat_at = now(), lease_expires_at = now() + make_interval(secs => %s),
+                    stage = COALESCE(%s, stage)
+                WHERE id = %s AND worker_id = %s AND status = 'running';
+            """, (self.lease_seconds, stage, job_id, worker_id))
+            renewed = cur.rowcount == 1
+            cur.execute("UPDATE job_workers SET last_seen_at = now() WHERE worker_id = %s;", (worker_id,))
+        return renewed
+
+    def finish(self, job_id, worker_id, result=None, error=None):
+        """
+        Record the outcome of a job: completed with a result, or failed with an error.
+
+        Returns:
+            bool: False if the job was reclaimed by another worker, whose outcome wins
+        """
+        with self._transaction() as cur:
+            cur.execute("""
+                UPDATE jobs
+                SET status = %s, result = %s, error = %s, finished_at = now(), lease_expires_at = NULL
+                WHERE id = %s AND worker_id = %s AND status = 'running';
+            """, (FAILED if error is not None else COMPLETED, Json(result) if result is not None else None,
+                  error, job_id, worker_id))
+            return cur.rowcount == 1
+
+    def unregister_worker(self, worker_id):
+        """Remove a worker that shut down from the statistics."""
+        with self._transaction() as cur:
+            cur.execute("DELETE FROM job_workers WHERE worker_id = %s;", (worker_id,))
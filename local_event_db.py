@@ -0,0 +1,674 @@
+"""
+Embedded, file-backed event store for single-node installs without Postgres.
+
+LocalEventDB has the same interface as EventDB. Events live in a store
+directory:
+- events.<generation>.jsonl: append-only log of event metadata, each video's version and
+  the content hash its events were saved from, and analysis cache records
+- embeddings.<generation>.f32: contiguous float32 matrix of L2-normalized embeddings, one row per event
+- meta.json: embedding dimension and the current generation
+
+The matrix is memory-mapped, so cosine similarity is a single matrix-vector
+product and top-k an argpartition. Each video's rows are tracked as ranges, so
+a video-scoped search only multiplies its own rows. Writes append to both
+files; saving a video's analysis again logs a replace record that drops its
+earlier rows. Compaction rewrites the files so every video occupies one
+contiguous range and dropped rows and superseded cache records disappear. The store is meant to be used by a
+single process (its API threads and analysis workers share one instance), so
+it refuses to open with JOB_BACKEND=postgres, whose worker processes would each
+load their own copy and never see each other's writes.
+
+Usage:
+    python local_event_db.py stats
+    python local_event_db.py compact
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+import numpy as np
+from config import (LOCAL_STORE_DIR, LOCAL_STORE_EMBEDDING_DIM, LOCAL_STORE_COMPACT_RATIO,
+                    OPENAI_EMBEDDING_BATCH_SIZE, SEARCH_MODE, HYBRID_RRF_K, HYBRID_CANDIDATES, JOB_BACKEND)
+from embedding_cache import EmbeddingCache
+from event_db import EmbeddingMixin, get_openai_client, is_keyword_query, lexical_fills_page
+from utils.logger import setup_logger
+
+logger = setup_logger("local_event_db")
+
+def tokenize(text):
+    """Lowercase words of a text."""
+    return [word.lower() for word in re.findall(r"[\w'-]+", text)]
+
+class LocalVectorStore:
+    def __init__(self, store_dir, dim=LOCAL_STORE_EMBEDDING_DIM):
+        """
+        Open (or create) a store directory and load its events.
+
+        Parameters:
+            store_dir (Path): Directory holding the store files
+            dim (int): Embedding dimension of a new store
+        """
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+
+        meta_path = self.store_dir / "meta.json"
+        if meta_path.exists():
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        else:
+            meta = {"dim": dim, "generation": 0}
+            self._write_meta(meta)
+        self.dim = meta["dim"]
+        self.generation = meta["generation"]
+        self._load()
+
+    def _paths(self, generation=None):
+        generation = self.generation if generation is None else generation
+        return (self.store_dir / f"events.{generation}.jsonl",
+                self.store_dir / f"embeddings.{generation}.f32")
+
+    def _write_meta(self, meta):
+        # Replace atomically: meta.json decides which generation of files is current
+        tmp_path = self.store_dir / "meta.json.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.store_dir / "meta.json")
+
+    def _load(self):
+        """Replay the log into memory and map the embedding matrix."""
+        self.events = []            # Event dicts in row order, including dropped ones
+        self.dead = set()           # Rows dropped by a replace record, kept until compaction
+        self.ranges = {}            # video_filename -> [(start, end), ...] of matrix rows
+        self.versions = {}          # video_filename -> version, bumped by every append and reset
+        self.versioned = set()      # Videos whose version the log records explicitly
+        self.content_hashes = {}    # video_filename -> hash of the video its events were saved from
+        self.analyses = {}          # content_hash -> analysis cache entry
+        self.superseded = 0         # Log records made obsolete by later ones
+        self.next_id = 1
+
+        log_path, matrix_path = self._paths()
+        log_path.touch()
+        matrix_path.touch()
+        with open(log_path, "rb") as f:
+            data = f.read()
+        complete = data.rfind(b"\n") + 1
+        if complete != len(data):
+            # Torn write at the end of the log: the record was never acknowledged, and
+            # later appends must not be glued onto it
+            with open(log_path, "r+b") as f:
+                f.truncate(complete)
+        for line in data[:complete].decode("utf-8").splitlines():
+            if line:
+                self._apply(json.loads(line))
+
+        # Rows written without their log records (interrupted append) are dropped
+        rows = len(self.events)
+        if matrix_path.stat().st_size != rows * self.dim * 4:
+            with open(matrix_path, "r+b") as f:
+                f.truncate(rows * self.dim * 4)
+        self._map()
+
+    def _apply(self, record):
+        kind = record.pop("type")
+        if kind == "event":
+            row = len(self.events)
+            self.events.append(record)
+            ranges = self.ranges.setdefault(record["video_filename"], [])
+            if ranges and ranges[-1][1] == row:
+                ranges[-1] = (ranges[-1][0], row + 1)
+            else:
+                ranges.append((row, row + 1))
+            self.next_id = max(self.next_id, record["id"] + 1)
+            self.versions[record["video_filename"]] = self.versions.get(record["video_filename"], 0) + 1
+        elif kind == "replace":
+            # The video's earlier events are superseded by the ones that follow
+            for start, end in self.ranges.pop(record["video_filename"], []):
+                self.dead.update(range(start, end))
+                self.superseded += end - start
+        elif kind == "version":
+            # Authoritative over the count of events before it, which older logs relied on
+            if record["video_filename"] in self.versioned:
+                self.superseded += 1
+            self.versioned.add(record["video_filename"])
+            self.versions[record["video_filename"]] = record["version"]
+        elif kind == "source":
+            if record["video_filename"] in self.content_hashes:
+                self.superseded += 1
+            self.content_hashes[record["video_filename"]] = record["content_hash"]
+        elif kind == "analysis":
+            if record["content_hash"] in self.analyses:
+                self.superseded += 1
+            self.analyses[record["content_hash"]] = record
+        elif kind == "analysis_used":
+            entry = self.analyses.get(record["content_hash"])
+            if entry is not None:
+                entry["last_used_at"] = record["last_used_at"]
+            self.superseded += 1
+        elif kind == "analysis_evicted":
+            # Both the eviction record and the evicted entry's record are obsolete now
+            if self.analyses.pop(record["content_hash"], None) is not None:
+                self.superseded += 1
+            self.superseded += 1
+
+    def _map(self):
+        _, matrix_path = self._paths()
+        rows = len(self.events)
+        if rows:
+            self.matrix = np.memmap(matrix_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+        else:
+            self.matrix = np.zeros((0, self.dim), dtype=np.float32)
+
+    def _append_log(self, records):
+        log_path, _ = self._paths()
+        data = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+        # Unbuffered, so nothing is left to be flushed after a failed write is cut off
+        with open(log_path, "ab", buffering=0) as f:
+            size = f.seek(0, os.SEEK_END)
+            try:
+                view = memoryview(data)
+                while view:
+                    view = view[f.write(view):]
+                os.fsync(f.fileno())
+            except BaseException:
+                # Drop a partly written append, later records would make it look acknowledged
+                f.truncate(size)
+                raise
+
+    def append_events(self, events, embeddings, records=()):
+        """
+        Append events and their embeddings.
+
+        Parameters:
+            events (list): Event dicts without ids
+            embeddings (list): One embedding per event
+            records (iterable): Log records written in the same append, ahead of the events
+
+        Returns:
+            list: Ids of the new events
+        """
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(events), self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.maximum(norms, 1e-12)
+
+        with self._lock:
+            first_id = self.next_id
+            records = list(records)
+            event_records = []
+            for event in events:
+                event_records.append({"type": "event", "id": self.next_id, **event})
+                self.next_id += 1
+            records.extend(event_records)
+            # After the events, whose replay counts up the version of logs without version records
+            for video_filename in dict.fromkeys(event["video_filename"] for event in events):
+                records.append({"type": "version", "video_filename": video_filename,
+                                "version": self.versions.get(video_filename, 0) + 1})
+
+            # Embeddings first: rows without a log record are discarded on load
+            _, matrix_path = self._paths()
+            try:
+                with open(matrix_path, "ab") as f:
+                    f.write(vectors.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._append_log(records)
+            except BaseException:
+                # Rows without log records would be taken for the next append's events
+                with open(matrix_path, "r+b") as f:
+                    f.truncate(len(self.events) * self.dim * 4)
+                self.next_id = first_id
+                raise
+            for record in records:
+                self._apply(dict(record))
+            self._map()
+            return [record["id"] for record in event_records]
+
+    def _rows(self, video_filename):
+        """Matrix rows of a video as an index array. Caller holds the lock."""
+        ranges = self.ranges.get(video_filename, [])
+        if not ranges:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate([np.arange(start, end) for start, end in ranges])
+
+    def live_events(self):
+        """Return the event dicts of all videos in row order, without dropped ones."""
+        with self._lock:
+            if not self.dead:
+                return list(self.events)
+            return [event for row, event in enumerate(self.events) if row not in self.dead]
+
+    def events_for(self, video_filename):
+        """Return the event dicts of a video in row order."""
+        with self._lock:
+            return [self.events[row] for row in self._rows(video_filename)]
+
+    def embeddings_for(self, video_filename):
+        """Return the event dicts of a video and their normalized embeddings."""
+        with self._lock:
+            rows = self._rows(video_filename)
+            return [self.events[row] for row in rows], np.asarray(self.matrix[rows])
+
+    def search(self, query_embedding, limit, video_filename=None):
+        """
+        Rank events by cosine similarity to a query embedding.
+
+        Parameters:
+            query_embedding (list): Query embedding
+            limit (int): Maximum number of results
+            video_filename (str, optional): Only rank the events of this video
+
+        Returns:
+            list: (event dict, similarity) pairs, most similar first
+        """
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        with self._lock:
+            # Compaction swaps in new objects, so this snapshot stays consistent without the lock
+            matrix, events = self.matrix, self.events
+            if video_filename:
+                rows = self._rows(video_filename)
+            elif self.dead:
+                rows = np.setdiff1d(np.arange(len(events)), np.fromiter(self.dead, dtype=np.int64))
+            else:
+                rows = None
+        candidates = matrix if rows is None else matrix[rows]
+
+        if len(candidates) == 0 or limit <= 0:
+            return []
+        scores = candidates @ query
+        k = min(limit, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(events[rows[i] if rows is not None else i], float(scores[i])) for i in top]
+
+    def put_analysis(self, content_hash, video_filename, llm_analysis, max_entries):
+        """Cache an analysis and evict the least recently used ones beyond max_entries. Returns the eviction count."""
+        with self._lock:
+            now = time.time()
+            record = {"type": "analysis", "content_hash": content_hash, "video_filename": video_filename,
+                      "llm_analysis": llm_analysis, "created_at": now, "last_used_at": now}
+            records = [record]
+            by_use = sorted(self.analyses.values(), key=lambda e: e["last_used_at"], reverse=True)
+            keep = [e for e in by_use if e["content_hash"] != content_hash][:max(0, max_entries - 1)]
+            keep_hashes = {e["content_hash"] for e in keep} | {content_hash}
+            evicted = [h for h in self.analyses if h not in keep_hashes]
+            records.extend({"type": "analysis_evicted", "content_hash": h} for h in evicted)
+            self._append_log(records)
+            for r in records:
+                self._apply(dict(r))
+            return len(evicted)
+
+    def get_analysis(self, content_hash):
+        """Return a cached analysis entry and mark it as recently used, or None."""
+        with self._lock:
+            entry = self.analyses.get(content_hash)
+            if entry is None:
+                return None
+            record = {"type": "analysis_used", "content_hash": content_hash, "last_used_at": time.time()}
+            self._append_log([record])
+            self._apply(dict(record))
+            return entry
+
+    def fragmentation(self):
+        """Ratio of extra video ranges and superseded records to live entries, 0 when compact."""
+        with self._lock:
+            extra_ranges = sum(len(r) - 1 for r in self.ranges.values())
+            live = max(1, len(self.events) - len(self.dead) + len(self.analyses))
+            return (extra_ranges + self.superseded) / live
+
+    def compact(self):
+        """
+        Rewrite the store so every video is one contiguous range and obsolete records are gone.
+
+        The new generation is written next to the current one and switched to by
+        replacing meta.json, so a crash leaves either the old or the new store.
+        """
+        with self._lock:
+            generation = self.generation + 1
+            log_path, matrix_path = self._paths(generation)
+            with open(matrix_path, "wb") as matrix_file, open(log_path, "w", encoding="utf-8") as log_file:
+                for video_filename, ranges in self.ranges.items():
+                    for start, end in ranges:
+                        matrix_file.write(np.ascontiguousarray(self.matrix[start:end]).tobytes())
+                        for event in self.events[start:end]:
+                            log_file.write(json.dumps({"type": "event", **event}) + "\n")
+                for video_filename, version in self.versions.items():
+                    log_file.write(json.dumps({"type": "version", "video_filename": video_filename,
+                                               "version": version}) + "\n")
+                for video_filename, content_hash in self.content_hashes.items():
+                    log_file.write(json.dumps({"type": "source", "video_filename": video_filename,
+                                               "content_hash": content_hash}) + "\n")
+                for entry in self.analyses.values():
+                    log_file.write(json.dumps({"type": "analysis", **entry}) + "\n")
+                for f in (matrix_file, log_file):
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            old_paths = self._paths()
+            self._write_meta({"dim": self.dim, "generation": generation})
+            self.generation = generation
+            # Drop the mapping of the old matrix before deleting it
+            self.matrix = None
+            self._load()
+            for path in old_paths:
+                path.unlink(missing_ok=True)
+            logger.info(f"Compacted event store to generation {generation} ({len(self.events)} events)")
+
+    def maybe_compact(self, ratio=LOCAL_STORE_COMPACT_RATIO):
+        """Compact when fragmentation exceeds ratio (0 disables automatic compaction)."""
+        if ratio > 0 and self.fragmentation() > ratio:
+            self.compact()
+
+    def reset(self):
+        """Delete all events and cached analyses."""
+        with self._lock:
+            versions = self.versions
+            self.matrix = None
+            for path in self._paths():
+                path.unlink(missing_ok=True)
+            self._load()
+            # Keep counting, so listings from before the reset don't look current after a restart either
+            records = [{"type": "version", "video_filename": video_filename, "version": version + 1}
+                       for video_filename, version in versions.items()]
+            if records:
+                self._append_log(records)
+                for record in records:
+                    self._apply(dict(record))
+
+    def stats(self):
+        """Return the size and fragmentation of the store."""
+        with self._lock:
+            return {
+                "store_dir": str(self.store_dir),
+                "generation": self.generation,
+                "dim": self.dim,
+                "events": len(self.events) - len(self.dead),
+                "videos": len(self.ranges),
+                "cached_analyses": len(self.analyses),
+                "fragmentation": self.fragmentation()
+            }
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def check_single_process(job_backend=JOB_BACKEND):
+    """
+    Refuse configurations where several processes would write to the store.
+
+    Raises:
+        RuntimeError: With JOB_BACKEND=postgres, analysis runs in worker.py processes
+    """
+    if job_backend == "postgres":
+        raise RuntimeError(
+            "EVENT_STORE=local cannot be used with JOB_BACKEND=postgres: the local store is "
+            "single-process, use EVENT_STORE=postgres or JOB_BACKEND=memory"
+        )
+
+def get_store(store_dir=LOCAL_STORE_DIR):
+    """Return the process-wide store for a directory, loading it on first use."""
+    check_single_process()
+    with _stores_lock:
+        key = str(Path(store_dir).resolve())
+        if key not in _stores:
+            _stores[key] = LocalVectorStore(store_dir)
+            logger.info(f"Opened local event store {key} ({_stores[key].stats()['events']} events)")
+        return _stores[key]
+
+class LocalEventDB(EmbeddingMixin):
+    def __init__(self, openai_api_key, embedding_model, store_dir=LOCAL_STORE_DIR,
+                 embedding_batch_size=OPENAI_EMBEDDING_BATCH_SIZE):
+        """
+        Initialize the LocalEventDB on the process-wide store of a directory.
+
+        Parameters:
+            openai_api_key (str): OpenAI API key for generating embeddings
+            embedding_model (str): OpenAI model to use for embeddings
+            store_dir (Path): Directory holding the store files
+            embedding_batch_size (int): Maximum number of texts per embeddings request
+        """
+        self.logger = logger
+        self.store = get_store(store_dir)
+        self.client = get_openai_client(openai_api_key)
+        self.embedding_model = embedding_model
+        self.embedding_batch_size = max(1, embedding_batch_size)
+        # Only the in-process tier: the store keeps no embedding cache table
+        self.embedding_cache = EmbeddingCache(self)
+
+    @staticmethod
+    def _source_record(video_filename, content_hash):
+        return {"type": "source", "video_filename": video_filename, "content_hash": content_hash}
+
+    @classmethod
+    def _replace_records(cls, video_filename, content_hash):
+        """Log records that make an append replace a video's events, like EventDB._replace_events."""
+        return [{"type": "replace", "video_filename": video_filename}, cls._source_record(video_filename, content_hash)]
+
+    def save_event(self, timestamp, description, video_id, video_filename, llm_summary=None):
+        """Save an event with its embedding. Returns the event id."""
+        embedding = self._get_embedding(description)
+        return self.store.append_events([{
+            "timestamp": timestamp, "description": description, "video_id": video_id,
+            "video_filename": video_filename, "llm_summary": llm_summary
+        }], [embedding], [self._source_record(video_filename, None)])[0]
+
+    def save_llm_analysis(self, llm_analysis, video_filename, content_hash=None):
+        """
+        Save the events of an LLM analysis with one batched embeddings request and one append,
+        replacing any earlier events of the video.
+
+        Parameters:
+            llm_analysis (dict): The LLM analysis containing moments
+            video_filename (str): Original filename of the video
+            content_hash (str, optional): Content hash of the analyzed video, recorded for the analysis cache
+
+        Returns:
+            list: List of saved event IDs
+        """
+        if not llm_analysis or "moments" not in llm_analysis:
+            self.logger.warning("No moments found in LLM analysis")
+            return []
+
+        video_id = os.path.splitext(video_filename)[0]
+        rows = self._moment_rows(llm_analysis)
+        if not rows:
+            return []
+        try:
+            embeddings = self._get_embeddings([description for _, description, _ in rows])
+            saved_ids = self.store.append_events([
+                {"timestamp": timestamp, "description": description, "video_id": video_id,
+                 "video_filename": video_filename, "llm_summary": summary}
+                for timestamp, description, summary in rows
+            ], embeddings, self._replace_records(video_filename, content_hash))
+        except Exception as e:
+            self.logger.error(f"Error saving {len(rows)} moments for video {video_filename}: {e}", exc_info=True)
+            return []
+        self.logger.info(f"Saved {len(saved_ids)} events to local store for video {video_filename}")
+        self.store.maybe_compact()
+        return saved_ids
+
+    def copy_events(self, source_filename, video_filename, content_hash):
+        """
+        Copy all events of one video to another filename, reusing the stored embeddings,
+        if they were saved from the video with the given content hash. The copies replace
+        any earlier events of the target filename.
+        """
+        with self.store._lock:
+            if self.get_video_content_hash(source_filename) != content_hash:
+                return []
+            events, embeddings = self.store.embeddings_for(source_filename)
+            if not events:
+                return []
+            video_id = os.path.splitext(video_filename)[0]
+            saved_ids = self.store.append_events([
+                {**{k: v for k, v in event.items() if k != "id"}, "video_id": video_id, "video_filename": video_filename}
+                for event in events
+            ], embeddings, self._replace_records(video_filename, content_hash))
+        self.store.maybe_compact()
+        return saved_ids
+
+    def get_video_content_hash(self, video_filename):
+        """Get the content hash of the video whose analysis a filename's events were saved from, or None."""
+        return self.store.content_hashes.get(video_filename)
+
+    def get_cached_analysis(self, content_hash):
+        """Look up a cached analysis. Returns {'video_filename', 'llm_analysis'} or None."""
+        entry = self.store.get_analysis(content_hash)
+        if entry is None:
+            return None
+        return {'video_filename': entry['video_filename'], 'llm_analysis': entry['llm_analysis']}
+
+    def save_cached_analysis(self, content_hash, video_filename, llm_analysis, max_entries):
+        """Store an analysis, evicting the least recently used entries. Returns the eviction count."""
+        return self.store.put_analysis(content_hash, video_filename, llm_analysis, max_entries)
+
+    def get_analysis_cache_size(self):
+        return len(self.store.analyses)
+
+    def get_cached_embeddings(self, model, text_hashes):
+        return {}
+
+    def save_cached_embeddings(self, model, embeddings):
+        pass
+
+    def get_events_by_video_id(self, video_id):
+        """Get all events for a specific video ID, ordered by timestamp."""
+        events = [dict(e) for e in self.store.live_events() if e["video_id"] == video_id]
+        return sorted(events, key=lambda e: e["timestamp"])
+
+    def get_events_by_filename(self, video_filename):
+        """Get all events for a specific video filename, ordered by timestamp."""
+        events = [dict(e) for e in self.store.events_for(video_filename)]
+        return sorted(events, key=lambda e: e["timestamp"])
+
+    def get_video_version(self, video_filename):
+        """Get the version of a video's events, 0 if the video never had events."""
+        return self.store.versions.get(video_filename, 0)
+
+    def get_events_page(self, video_filename, limit, after=None):
+        """Get one page of a video's events in (timestamp, id) order, like EventDB.get_events_page."""
+        return list(self.iter_events(video_filename, after, limit))
+
+    def iter_events(self, video_filename, after=None, limit=None, batch_size=None):
+        """Iterate over a video's events in (timestamp, id) order, like EventDB.iter_events."""
+        events = sorted(self.store.events_for(video_filename), key=lambda e: (e["timestamp"], e["id"]))
+        if after is not None:
+            after = (float(after[0]), int(after[1]))
+            events = [e for e in events if (e["timestamp"], e["id"]) > after]
+        for event in events[:limit]:
+            yield dict(event)
+
+    def lexical_search(self, query, limit, video_filename=None):
+        """
+        Keyword search requiring every query word to appear in the description or summary.
+
+        Events are ranked by how often the words occur, description matches counting double.
+
+        Returns:
+            list: Matching event dicts, best first, with similarity None
+        """
+        words = tokenize(query)
+        events = self.store.events_for(video_filename) if video_filename else self.store.live_events()
+        matches = []
+        for event in events:
+            description = tokenize(event["description"])
+            summary = tokenize(event.get("llm_summary") or "")
+            if all(word in description or word in summary for word in words):
+                score = sum(2 * description.count(word) + summary.count(word) for word in words)
+                matches.append((score, event))
+        matches.sort(key=lambda match: (-match[0], match[1]["timestamp"]))
+        return [{**event, 'similarity': None} for _, event in matches[:limit]]
+
+    def search_events(self, query, limit=5, video_filename=None, mode=SEARCH_MODE):
+        """
+        Search events using cosine similarity, optionally fused with keyword rank, like EventDB.search_events.
+
+        Parameters:
+            query (str): The search query
+            limit (int): Maximum number of results to return
+            video_filename (str, optional): Only search the events of this video
+            mode (str): "vector" or "hybrid"
+
+        Returns:
+            list: List of matching event dictionaries with similarity scores (None for keyword matches)
+        """
+        if mode == "hybrid" and is_keyword_query(query):
+            events = self.lexical_search(query, limit, video_filename)
+            if lexical_fills_page(events, limit):
+                self.logger.info(f"Answered keyword query from descriptions ({len(events)} events)")
+                return events
+
+        query_embedding = self._get_embedding(query)
+        if mode != "hybrid":
+            events = [{**event, 'similarity': similarity}
+                      for event, similarity in self.store.search(query_embedding, limit, video_filename)]
+            self.logger.info(f"Found {len(events)} events matching query")
+            return events
+
+        # Reciprocal rank fusion of the vector and keyword rankings
+        candidates = max(HYBRID_CANDIDATES, limit)
+        nearest = self.store.search(query_embedding, candidates, video_filename)
+        similarities = {event["id"]: similarity for event, similarity in nearest}
+        scores, by_id = {}, {}
+        for ranking in ([event for event, _ in nearest], self.lexical_search(query, candidates, video_filename)):
+            for rank, event in enumerate(ranking, start=1):
+                scores[event["id"]] = scores.get(event["id"], 0.0) + 1.0 / (HYBRID_RRF_K + rank)
+                by_id.setdefault(event["id"], event)
+        top = sorted(scores, key=scores.get, reverse=True)[:limit]
+        events = [{**by_id[event_id], 'similarity': similarities.get(event_id)} for event_id in top]
+        self.logger.info(f"Found {len(events)} events matching query")
+        return events
+
+    def close(self):
+        """Nothing to release, the store is shared by the process."""
+
+    def rebuild_vector_index(self):
+        """The store has no index to rebuild; compacting makes every video one contiguous range."""
+        self.store.compact()
+
+    def reset_database(self):
+        """Delete all events and cached analyses."""
+        self.store.reset()
+
+class AsyncLocalEventDB:
+    def __init__(self, openai_api_key, embedding_model, store_dir=LOCAL_STORE_DIR):
+        """
+        AsyncEventDB interface for the local store. Calls run in a worker thread,
+        since they block on the embeddings API.
+        """
+        self.db = LocalEventDB(openai_api_key, embedding_model, store_dir)
+
+    async def get_events_by_filename(self, video_filename):
+        return await asyncio.to_thread(self.db.get_events_by_filename, video_filename)
+
+    async def get_video_version(self, video_filename):
+        return self.db.get_video_version(video_filename)
+
+    async def get_events_page(self, video_filename, limit, after=None):
+        return await asyncio.to_thread(self.db.get_events_page, video_filename, limit, after)
+
+    async def stream_events(self, video_filename, after=None, limit=None):
+        # The store is in memory, so there is nothing to fetch incrementally
+        for event in await asyncio.to_thread(self.db.get_events_page, video_filename, limit, after):
+            yield event
+
+    async def search_events(self, query, limit=5, video_filename=None, mode=SEARCH_MODE):
+        return await asyncio.to_thread(self.db.search_events, query, limit, video_filename, mode)
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or compact the local event store.")
+    parser.add_argument("command", choices=["stats", "compact"])
+    parser.add_argument("--store-dir", default=str(LOCAL_STORE_DIR))
+    args = parser.parse_args()
+
+    store = get_store(args.store_dir)
+    if args.command == "compact":
+        store.compact()
+    print(json.dumps(store.stats(), indent=2))
+
+if __name__ == "__main__":
+    main()
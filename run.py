@@ -2,9 +2,11 @@ import os
 import sys
 import json
 from video_analyzer.analyze_video import AnalyzeVideo
-from event_db import EventDB
+from event_db import open_event_db
+from analysis_cache import AnalysisCache
 from config import OPENAI_API_KEY, OPENAI_MODEL, OPENAI_EMBEDDING_MODEL, POSTGRES_URL, OUTPUT_DIR
 from utils.logger import setup_logger
+from utils.hashing import hash_file
 
 def main():
     # Setup logger first so we can use it for all messages
@@ -22,17 +24,31 @@ def main():
     
     # Initialize video analyzer and database
     analyzer = AnalyzeVideo(OPENAI_API_KEY, OPENAI_MODEL, OUTPUT_DIR)
-    db = EventDB(
+    db = open_event_db(
         db_url=POSTGRES_URL,
         openai_api_key=OPENAI_API_KEY,
         embedding_model=OPENAI_EMBEDDING_MODEL
     )
     
+    cache = AnalysisCache(db)
+    
     try:
-        # Process video
         video_filename = os.path.basename(video_path)
+        
+        # Reuse a previous analysis of the same content if there is one
+        content_hash = hash_file(video_path).hexdigest()
+        cached = cache.lookup(content_hash)
+        if cached is not None:
+            logger.info(f"Found cached analysis of {cached['video_filename']}")
+            print("\nLLM Analysis (cached):")
+            print(json.dumps(cached['llm_analysis'], indent=2))
+            saved_ids = cache.link_events(cached, video_filename, content_hash)
+            logger.info(f"{len(saved_ids)} events available for {video_filename}")
+            return
+        
+        # Process video
         logger.info(f"Starting analysis of video: {video_filename}")
-        results = analyzer.process_video(video_path)
+        results = analyzer.process_video(video_path, content_hash)
         
         # Get LLM analysis
         logger.info("Getting LLM analysis of video")
@@ -44,8 +60,10 @@ def main():
         
         # Save events to database
         logger.info("Saving events to database")
-        saved_ids = db.save_llm_analysis(llm_analysis, video_filename)
+        saved_ids = db.save_llm_analysis(llm_analysis, video_filename, content_hash)
         logger.info(f"Successfully saved {len(saved_ids)} events to database")
+        if saved_ids:
+            cache.store(content_hash, video_filename, llm_analysis)
         
     except Exception as e:
         logger.error("An error occurred during video processing", exc_info=True)
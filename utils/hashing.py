@@ -0,0 +1,30 @@
+import hashlib
+
+# Bytes read per iteration when hashing files
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def new_hasher():
+    """
+    Create the hash object used to identify video content.
+    
+    Returns:
+        hashlib.blake2b: Empty BLAKE2b hash with a 32 byte digest.
+    """
+    return hashlib.blake2b(digest_size=32)
+
+def hash_file(path, chunk_size=HASH_CHUNK_SIZE):
+    """
+    Hash a file with constant memory.
+    
+    Parameters:
+        path (str): Path to the file
+        chunk_size (int): Bytes read per iteration
+        
+    Returns:
+        hashlib.blake2b: Hash object fed with the file contents
+    """
+    hasher = new_hasher()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(block)
+    return hasher
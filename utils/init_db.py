@@ -0,0 +1,31 @@
+"""
+Script to create the database tables and indexes.
+Run it once before starting workers against a new database; the API also does this at startup.
+Pass --reindex to rebuild the embedding index, e.g. after bulk loading events into an IVFFlat index.
+"""
+
+import sys
+import os
+
+# Add parent directory to path so we can import from root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_db import init_schema, open_event_db
+from config import POSTGRES_URL, OPENAI_API_KEY, OPENAI_EMBEDDING_MODEL
+
+def main():
+    print("Creating database schema...")
+    init_schema(POSTGRES_URL, OPENAI_API_KEY, OPENAI_EMBEDDING_MODEL)
+    print("Database schema is up to date!")
+    
+    if "--reindex" in sys.argv[1:]:
+        print("Rebuilding embedding index...")
+        db = open_event_db(POSTGRES_URL, OPENAI_API_KEY, OPENAI_EMBEDDING_MODEL)
+        try:
+            db.rebuild_vector_index()
+        finally:
+            db.close()
+        print("Embedding index rebuilt!")
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,141 @@
-import os
+import atexit
+import contextvars
 import logging
-from datetime import datetime
+import logging.handlers
+import os
+import queue
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+from config import LOG_MAX_BYTES, LOG_BACKUP_COUNT
+
+# Id of the job (or request) being processed, attached to every record logged in its context
+_correlation_id = contextvars.ContextVar("correlation_id", default=None)
+
+_lock = threading.Lock()
+_queue = queue.SimpleQueue()
+_listener = None
+_dispatcher = None
+
+
+class _CorrelationFilter(logging.Filter):
+    """
+    Adds the current correlation id to records.
+
+    Attached to the QueueHandler, so it runs on the thread that logs, in the
+    context where the id is set, before the record is queued.
+    """
+
+    def filter(self, record):
+        correlation_id = _correlation_id.get()
+        record.correlation = f"[{correlation_id}] " if correlation_id else ""
+        return True
+
+
+class _Dispatcher(logging.Handler):
+    """Writes each record to the console and to the log file of its logger."""
+
+    def __init__(self):
+        super().__init__()
+        self.console = logging.StreamHandler()
+        self.console.setFormatter(logging.Formatter('%(levelname)s: %(correlation)s%(message)s'))
+        self.files = {}
+
+    def add_file(self, name, log_path):
+        # Processes sharing log_dir (segment and compose workers) rotate only their own files
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_path / f"{name}_{os.getpid()}.log",
+            maxBytes=LOG_MAX_BYTES,
+            backupCount=LOG_BACKUP_COUNT,
+            encoding='utf-8'
+        )
+        file_handler.setFormatter(logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(correlation)s%(message)s'
+        ))
+        self.files[name] = file_handler
+
+    def emit(self, record):
+        self.console.handle(record)
+        file_handler = self.files.get(record.name)
+        if file_handler is not None:
+            file_handler.handle(record)
+
+    def close(self):
+        self.console.close()
+        for file_handler in self.files.values():
+            file_handler.close()
+        super().close()
+
+
+def _stop_listener():
+    """Flush queued records and close the log files at exit."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _dispatcher.close()
+            _listener = None
+
 
 def setup_logger(name, log_dir="logs"):
     """
-    Set up a logger with both file and console handlers.
-    
+    Set up a logger with both file and console output.
+
+    Calling this again for the same name returns the configured logger without
+    adding handlers. Records are put on a queue and formatted and written by a
+    background listener thread, so logging never blocks on disk I/O. Each logger
+    writes to logs/<name>_<pid>.log, rotated by size; a file per process keeps
+    rotation safe when several processes log to the same directory.
+
     Parameters:
         name (str): Name of the logger
         log_dir (str): Directory to store log files
-        
+
     Returns:
         logging.Logger: Configured logger instance
     """
-    # Create logs directory if it doesn't exist
-    log_path = Path(log_dir)
-    log_path.mkdir(exist_ok=True)
-    
-    # Create logger
+    global _listener, _dispatcher
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    
-    # Create formatters
-    file_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    console_formatter = logging.Formatter(
-        '%(levelname)s: %(message)s'
-    )
-    
-    # Create and configure file handler
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    file_handler = logging.FileHandler(
-        log_path / f"{name}_{timestamp}.log",
-        encoding='utf-8'
-    )
-    file_handler.setLevel(logging.INFO)
-    file_handler.setFormatter(file_formatter)
-    
-    # Create and configure console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(console_formatter)
-    
-    # Add handlers to logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    
-    return logger 
\ No newline at end of file
+    with _lock:
+        if getattr(logger, "_queue_configured", False):
+            return logger
+
+        if _listener is None:
+            _dispatcher = _Dispatcher()
+            _listener = logging.handlers.QueueListener(_queue, _dispatcher)
+            _listener.start()
+            atexit.register(_stop_listener)
+
+        # Create logs directory if it doesn't exist
+        log_path = Path(log_dir)
+        log_path.mkdir(exist_ok=True)
+        _dispatcher.add_file(name, log_path)
+
+        queue_handler = logging.handlers.QueueHandler(_queue)
+        queue_handler.addFilter(_CorrelationFilter())
+        logger.addHandler(queue_handler)
+        logger.setLevel(logging.INFO)
+        # The listener already writes to the console, don't repeat records through the root logger
+        logger.propagate = False
+        logger._queue_configured = True
+    return logger
+
+
+@contextmanager
+def correlation_id(value):
+    """
+    Tag every record logged inside the block with an id, e.g. the id of a job.
+
+    Parameters:
+        value (str): The correlation id
+    """
+    token = _correlation_id.set(value)
+    try:
+        yield
+    finally:
+        _correlation_id.reset(token)
+
+
+def get_correlation_id():
+    """Return the correlation id of the current context, or None."""
+    return _correlation_id.get()
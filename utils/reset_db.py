@@ -9,12 +9,12 @@ import os
 # Add parent directory to path so we can import from root
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from event_db import EventDB
+from event_db import open_event_db
 from config import POSTGRES_URL, OPENAI_API_KEY, OPENAI_EMBEDDING_MODEL
 
 def main():
     print("Connecting to database...")
-    db = EventDB(POSTGRES_URL, OPENAI_API_KEY, OPENAI_EMBEDDING_MODEL)
+    db = open_event_db(POSTGRES_URL, OPENAI_API_KEY, OPENAI_EMBEDDING_MODEL)
     
     print("Resetting database...")
     db.reset_database()
@@ -7,17 +7,39 @@ from pathlib import Path
 try:
     from .scene_detector import SceneDetector
     from .object_detector import ObjectDetector
-    from .audio_detector import AudioDetector
+    from .audio_detector import AudioDetector, SAMPLE_RATE
     from .prompts import PROMPT_TEMPLATE
+    from .stage_cache import StageCache
+    from .segmented import process_segmented, video_duration
 except ImportError:
     # If that fails, try absolute imports (when running directly)
     sys.path.append(str(Path(__file__).parent.parent))
     from scene_detector import SceneDetector
     from object_detector import ObjectDetector
-    from audio_detector import AudioDetector
+    from audio_detector import AudioDetector, SAMPLE_RATE
     from prompts import PROMPT_TEMPLATE
+    from stage_cache import StageCache
+    from segmented import process_segmented, video_duration
 
+import cv2
+import numpy as np
 from openai import OpenAI
+from utils.hashing import hash_file
+from config import (SPEECH_GATED_TRANSCRIPTION, SPEECH_GATE_THRESHOLD, SPEECH_GATE_PAD, SPEECH_GATE_MERGE_GAP,
+                    SEGMENTED_PROCESSING, SEGMENTED_MIN_DURATION, SEGMENT_SECONDS, SEGMENT_OVERLAP, SEGMENT_WORKERS)
+
+# Bump when the output format of a stage changes to invalidate old cache entries
+SCENES_VERSION = "scenedetect-content-v1"
+YAMNET_VERSION = "yamnet-v1"
+SEGMENTED_VERSION = "segmented-v1"
+
+def encode_frames(frames_info):
+    """Losslessly PNG-compress (timestamp, frame) pairs for the stage cache."""
+    return [(t, cv2.imencode(".png", frame)[1].tobytes()) for t, frame in frames_info]
+
+def decode_frames(encoded):
+    """Inverse of encode_frames."""
+    return [(t, cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)) for t, data in encoded]
 
 class AnalyzeVideo:
     def __init__(self, api_key, model_name, output_dir):
@@ -37,10 +59,53 @@ class AnalyzeVideo:
         self.output_dir = output_dir
         # Initialize OpenAI client
         self.client = OpenAI(api_key=self.api_key)
+        # Per-stage results cached by video content and parameters
+        self.stage_cache = StageCache()
+        self.sound_event_params = {"top_k": 3, "threshold": 0.5}
+        # Transcribe only YAMNet speech regions if enabled
+        self.speech_gate_params = {
+            "threshold": SPEECH_GATE_THRESHOLD,
+            "pad": SPEECH_GATE_PAD,
+            "merge_gap": SPEECH_GATE_MERGE_GAP
+        } if SPEECH_GATED_TRANSCRIPTION else None
+        # Split long videos into segments processed in parallel (see video_analyzer.segmented)
+        self.segmented = SEGMENTED_PROCESSING
+
+    def process_video(self, video_path, content_hash=None, progress=None):
+        """
+        Runs scene detection, object detection, captioning, sound event detection and transcription.
+        
+        Each stage result is cached on disk by (video hash, stage, model, parameters),
+        so re-running with a changed parameter only recomputes the affected stages.
+        Videos of at least SEGMENTED_MIN_DURATION are processed in parallel segments
+        if segmented processing is enabled.
+        
+        Parameters:
+            video_path (str): Path to the input video file
+            content_hash (str, optional): BLAKE2b hex digest of the video, computed if not given
+            progress (Callable[[str], None], optional): Called with the name of each stage as it starts
+            
+        Returns:
+            dict: Frame times, object labels, captions, sound events and transcript
+        """
+        report = progress or (lambda stage: None)
+        if content_hash is None and self.stage_cache.enabled:
+            content_hash = hash_file(video_path).hexdigest()
+        cache = self.stage_cache
+
+        if self.segmented:
+            duration = video_duration(video_path)
+            if duration >= SEGMENTED_MIN_DURATION:
+                report("segmented")
+                return self.process_video_segmented(video_path, content_hash, duration)
 
-    def process_video(self, video_path):
         # 1. Extract frames from scenes
-        frames_info = self.scene_detector.extract_scenes_smart(video_path)
+        report("scenes")
+        frames_info, scenes_key = cache.get_or_compute(
+            content_hash, "scenes", SCENES_VERSION, {"mode": self.scene_detector.mode},
+            lambda: self.scene_detector.extract_scenes_smart(video_path),
+            encode=encode_frames, decode=decode_frames
+        )
         
         # Handle case where no frames are extracted (e.g., very short video with no scene changes)
         if not frames_info:
@@ -50,13 +115,55 @@ class AnalyzeVideo:
             frame_times, frames = map(list, zip(*frames_info))
         
         # 2. Process frames for object detection and captions
-        object_labels = self.object_detector.detect_objects_from_frames(frames)
-        captions = self.object_detector.generate_captions_from_frames(frames)
+        # Keyed on the scenes entry since their input is the extracted frames
+        report("objects")
+        object_labels, _ = cache.get_or_compute(
+            content_hash, "objects", self.object_detector.model_key, {"frames": scenes_key},
+            lambda: self.object_detector.detect_objects_from_frames(frames)
+        )
+        if self.object_detector.extract_captions:
+            report("captions")
+            captions, _ = cache.get_or_compute(
+                content_hash, "captions", self.object_detector.caption_key,
+                {"frames": scenes_key, "max_new_tokens": self.object_detector.caption_engine.max_new_tokens},
+                lambda: self.object_detector.generate_captions_from_frames(frames)
+            )
+        else:
+            captions = None
+
+        # 3. Process audio, decoding it once into memory and only if a stage is not cached
+        audio = {}
+        def waveform():
+            if "waveform" not in audio:
+                audio["waveform"] = self.audio_detector.extract_audio(video_path)
+            return audio["waveform"]
 
-        # 3. Process audio
-        audio_file = self.audio_detector.extract_audio(video_path)
-        sound_events = self.audio_detector.detect_sound_events(audio_file)
-        transcript = self.audio_detector.transcribe_audio(audio_file)
+        # YAMNet scores are shared by sound event detection and the speech gate
+        def yamnet_scores():
+            if "scores" not in audio:
+                audio["scores"] = self.audio_detector.score_audio(waveform())
+            return audio["scores"]
+
+        report("sound_events")
+        sound_events, _ = cache.get_or_compute(
+            content_hash, "sound_events", f"{YAMNET_VERSION}:{self.audio_detector.yamnet_key}", self.sound_event_params,
+            lambda: self.audio_detector.events_from_scores(*yamnet_scores(), **self.sound_event_params)
+        )
+
+        def transcribe():
+            if self.speech_gate_params is None:
+                return self.audio_detector.transcribe_audio(waveform())
+            duration = len(waveform()) / SAMPLE_RATE
+            regions = self.audio_detector.speech_regions(*yamnet_scores(), duration=duration, **self.speech_gate_params)
+            return self.audio_detector.transcribe_speech(waveform(), regions)
+
+        report("transcript")
+        transcript, _ = cache.get_or_compute(
+            content_hash, "transcript", self.audio_detector.whisper_key,
+            {"language": "en", "speech_gate": self.speech_gate_params,
+             "yamnet": self.audio_detector.yamnet_key if self.speech_gate_params else None},
+            transcribe
+        )
 
         return {
             "frame_times": frame_times,
@@ -66,6 +173,49 @@ class AnalyzeVideo:
             "transcript": transcript
         }
 
+    def process_video_segmented(self, video_path, content_hash, duration):
+        """
+        Runs all stages per time segment in a pool of worker processes and merges the results.
+        
+        The merged results are cached as a single stage, since segments don't
+        line up with the per-stage cache entries of process_video.
+        
+        Parameters:
+            video_path (str): Path to the input video file
+            content_hash (str): BLAKE2b hex digest of the video (None disables caching)
+            duration (float): Length of the video in seconds
+            
+        Returns:
+            dict: Frame times, object labels, captions, sound events and transcript, like process_video
+        """
+        settings = {
+            "scene_mode": self.scene_detector.mode,
+            "extract_captions": self.object_detector.extract_captions,
+            "whisper_model_size": self.audio_detector.whisper_model_size,
+            "speech_gate": self.speech_gate_params
+        }
+        models = [SEGMENTED_VERSION, SCENES_VERSION, self.object_detector.model_key,
+                  f"{YAMNET_VERSION}:{self.audio_detector.yamnet_key}", self.audio_detector.whisper_key]
+        params = {
+            **settings,
+            "segment_seconds": SEGMENT_SECONDS,
+            "overlap": SEGMENT_OVERLAP,
+            "sound_events": self.sound_event_params,
+            "language": "en"
+        }
+        if self.object_detector.extract_captions:
+            models.append(self.object_detector.caption_key)
+            params["max_new_tokens"] = self.object_detector.caption_engine.max_new_tokens
+
+        results, _ = self.stage_cache.get_or_compute(
+            content_hash, "segmented", "|".join(models), params,
+            lambda: process_segmented(
+                video_path, duration, settings, self.audio_detector, self.sound_event_params,
+                SEGMENT_SECONDS, SEGMENT_OVERLAP, SEGMENT_WORKERS
+            )
+        )
+        return results
+
     def get_summary_as_json(self, results, video_path, save=True):
         # Get video filename without extension
         video_filename = os.path.splitext(os.path.basename(video_path))[0]
@@ -1,13 +1,30 @@
+import ffmpeg
+import numpy as np
 import torch
 import whisper
 import librosa
 from typing import List, Dict
-from moviepy import VideoFileClip
-from torch_vggish_yamnet import yamnet
 from torch_vggish_yamnet.input_proc import WaveformToInput
+from torch_vggish_yamnet.params import CommonParams
 import os
 from pathlib import Path
-from config import OUTPUT_DIR
+from config import YAMNET_BATCH_SIZE
+from video_analyzer.model_registry import model_registry
+from video_analyzer.inference_backend import backend_name, load_yamnet
+
+
+SAMPLE_RATE = 16000  # Rate both YAMNet and Whisper expect
+
+# YAMNet classes whose score gates Whisper in speech-gated transcription
+SPEECH_CLASS_INDICES = [
+    0,  # Speech
+    1,  # Child speech, kid speaking
+    2,  # Conversation
+    3,  # Narration, monologue
+    4,  # Babbling
+    5,  # Speech synthesizer
+    6,  # Shout
+]
 
 
 class AudioDetector:
@@ -19,22 +36,25 @@ class AudioDetector:
             whisper_model_size (str): Whisper model size to load (default "small").
         """
 
-        self.whisper_model = whisper.load_model(whisper_model_size)
-        self.yamnet_model = self.load_yamnet_model()
+        self.whisper_model_size = whisper_model_size
+        self.whisper_key = f"whisper:{whisper_model_size}"
+        self.whisper_model = model_registry.get(
+            self.whisper_key, lambda: whisper.load_model(whisper_model_size)
+        )
+        self.yamnet_key = f"yamnet:{backend_name()}"
+        self.yamnet_model = model_registry.get(self.yamnet_key, self.load_yamnet_model)
         self.converter = WaveformToInput()
-        self.class_names = self.load_class_names()
+        self.class_names = model_registry.get("yamnet:class_map", self.load_class_names)
         
     def load_yamnet_model(self):
         """
-        Loads the pretrained YAMNet model.
+        Loads the pretrained YAMNet model for the configured inference backend.
 
         Returns:
-            torch.nn.Module: YAMNet model in evaluation mode.
+            torch.nn.Module: YAMNet model in evaluation mode (or its ONNX Runtime equivalent).
         """
 
-        model = yamnet.yamnet(pretrained=True)
-        model.eval()
-        return model
+        return load_yamnet()
         
     def load_class_names(self):
         """
@@ -52,37 +72,100 @@ class AudioDetector:
         class_names = [line.split(',')[2] for line in lines]
         return class_names
 
-    def extract_audio(self, video_path, output_wav="audio.wav"):
+    @staticmethod
+    def extract_audio(video_path, start=None, duration=None):
         """
-        Extracts audio track from video file and saves as WAV.
+        Decodes the audio track of a video once into memory.
+
+        ffmpeg downmixes and resamples to 16 kHz mono float32 and pipes the raw
+        samples back, so no temporary WAV is written and concurrent jobs don't
+        share any file. The same buffer feeds both YAMNet and Whisper. Needs no
+        models, so it can be called on the class.
 
         Parameters:
             video_path (str): Path to the input video file.
-            output_wav (str): Name of output WAV file (default "audio.wav").
+            start (float, optional): Second to start at, sample 0 of the result is this time.
+            duration (float, optional): Seconds to decode (default: up to the end).
 
         Returns:
-            str: Path to the extracted audio WAV file.
+            np.ndarray: Mono 16 kHz float32 waveform (empty if the video has no audio track).
         """
-        # Use the configured output directory
-        output_path = OUTPUT_DIR / output_wav
-        
-        # Create output directory if it doesn't exist
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        probe = ffmpeg.probe(video_path, select_streams="a")
+        if not probe.get("streams"):
+            return np.zeros(0, dtype=np.float32)
+
+        # As an input option -ss seeks, decoding only the requested range
+        input_options = {}
+        if start:
+            input_options["ss"] = start
+        if duration is not None:
+            input_options["t"] = duration
+        out, _ = (
+            ffmpeg
+            .input(video_path, **input_options)
+            .output("pipe:", format="f32le", acodec="pcm_f32le", ac=1, ar=SAMPLE_RATE, vn=None)
+            .run(capture_stdout=True, capture_stderr=True)
+        )
+        return np.frombuffer(out, dtype=np.float32)
+
+    def load_waveform(self, audio):
+        """
+        Returns audio as a 16 kHz mono float32 array.
+
+        Parameters:
+            audio (Union[np.ndarray, str]): Waveform from extract_audio, or a path to an audio file.
+
+        Returns:
+            np.ndarray: Mono 16 kHz float32 waveform.
+        """
+        if isinstance(audio, (str, os.PathLike)):
+            audio, _ = librosa.load(audio, sr=SAMPLE_RATE, mono=True)
+        return np.asarray(audio, dtype=np.float32)
+
+    def score_windows(self, waveform, sr=16000, window_size=16000, hop_size=8000, batch_size=YAMNET_BATCH_SIZE):
+        """
+        Runs YAMNet over all 1 s windows (0.5 s hop) of a waveform in large batches.
+
+        The windows are framed in one shot as a strided view, turned into log-mel
+        patches with one batched spectrogram call and scored batch by batch.
 
-        video = VideoFileClip(video_path)
-        try:
-            video.audio.write_audiofile(str(output_path), fps=16000, logger=None)
-        finally:
-            video.close() # Explicitly close the video clip to release the file handle
-            
-        return str(output_path)
+        Parameters:
+            waveform (torch.Tensor): Mono 16 kHz waveform [T].
+            sr (int): Sample rate of the waveform.
+            window_size (int): Window length in samples (default 1 s).
+            hop_size (int): Hop between windows in samples (default 0.5 s).
+            batch_size (int): Number of windows per YAMNet forward pass.
+
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor]: Window start times in seconds [W] and class scores [W, classes].
+        """
+        num_windows = len(range(0, len(waveform) - window_size, hop_size))
+        if num_windows == 0:
+            return torch.zeros(0), torch.zeros(0, len(self.class_names))
+
+        windows = waveform.unfold(0, window_size, hop_size)[:num_windows]  # [W, window_size]
+        starts = torch.arange(num_windows, dtype=torch.float64) * hop_size / sr
+
+        # Same processing as WaveformToInput, batched over windows: one 96 frame patch per window
+        patch_frames = int(round(CommonParams.PATCH_WINDOW_IN_SECONDS / CommonParams.STFT_HOP_LENGTH_SECONDS))
+
+        scores = []
+        with model_registry.use(self.yamnet_key), torch.no_grad():
+            for batch_start in range(0, num_windows, batch_size):
+                batch = windows[batch_start:batch_start + batch_size]
+                log_mel = self.converter.mel_trans_ope(batch)  # [B, mels, frames]
+                patches = log_mel.transpose(1, 2)[:, :patch_frames].unsqueeze(1)  # [B, 1, frames, mels]
+                _, batch_scores = self.yamnet_model(patches)
+                scores.append(batch_scores)
+
+        return starts, torch.cat(scores)
 
-    def detect_sound_events(self, audio_path, top_k=3, threshold=0.5):
+    def detect_sound_events(self, audio, top_k=3, threshold=0.5):
         """
         Detects sound events in audio using YAMNet with a confidence threshold.
 
         Parameters:
-            audio_path (str): Path to input audio WAV file.
+            audio (Union[np.ndarray, str]): 16 kHz mono waveform from extract_audio, or a path to an audio file.
             top_k (int): Number of top class predictions to consider per window (default 3).
             threshold (float): Minimum confidence score to include a detected label (default 0.5).
 
@@ -90,46 +173,157 @@ class AudioDetector:
             List[Dict]: List of detected events with timestamps and labels.
         """
 
-        waveform_np, sr = librosa.load(audio_path, sr=16000, mono=True)
-        waveform = torch.tensor(waveform_np, dtype=torch.float32)
+        starts, scores = self.score_audio(audio)
+        return self.events_from_scores(starts, scores, top_k, threshold)
 
-        window_size = 16000  # 1s
-        hop_size = 8000      # 0.5s overlap
-        results = []
+    def score_audio(self, audio):
+        """
+        Runs YAMNet over all windows of an audio track.
+
+        Parameters:
+            audio (Union[np.ndarray, str]): 16 kHz mono waveform from extract_audio, or a path to an audio file.
 
-        for i, start in enumerate(range(0, len(waveform) - window_size, hop_size)):
-            chunk = waveform[start:start + window_size].unsqueeze(0)  # [1, T]
-            input_tensor = self.converter(chunk, sr)
-            _, scores = self.yamnet_model(input_tensor)
-            mean_scores = scores.squeeze(0)  # [classes]
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor]: Window start times in seconds [W] and class scores [W, classes].
+        """
+        waveform = torch.from_numpy(self.load_waveform(audio))
+        return self.score_windows(waveform, SAMPLE_RATE)
+
+    def events_from_scores(self, starts, scores, top_k=3, threshold=0.5):
+        """
+        Turns per-window class scores into labelled events.
 
-            top_indices = torch.topk(mean_scores, k=top_k).indices
+        Top-k selection and thresholding run as tensor ops over all windows;
+        only the surviving labels are converted to Python objects.
 
-            timestamp = round(start / sr, 2)
+        Parameters:
+            starts (torch.Tensor): Window start times in seconds [W].
+            scores (torch.Tensor): Class scores [W, classes].
+            top_k (int): Number of top class predictions to consider per window.
+            threshold (float): Minimum confidence score to include a detected label.
+
+        Returns:
+            List[Dict]: List of detected events with timestamps and labels.
+        """
+        if len(scores) == 0:
+            return []
+
+        top_scores, top_indices = torch.topk(scores, k=top_k, dim=1)
+        keep = top_scores > threshold
+        windows_with_labels = keep.any(dim=1).nonzero().squeeze(1).tolist()
+
+        top_scores = top_scores.tolist()
+        top_indices = top_indices.tolist()
+        keep = keep.tolist()
+        starts = starts.tolist()
+
+        results = []
+        for w in windows_with_labels:
             labels = [
-                {"label": self.class_names[i], "confidence": float(mean_scores[i])}
-                for i in top_indices if mean_scores[i] > threshold
+                {"label": self.class_names[i], "confidence": score}
+                for i, score, kept in zip(top_indices[w], top_scores[w], keep[w]) if kept
             ]
-
-            if labels:
-                results.append({"time": timestamp, "labels": labels})
+            results.append({"time": round(starts[w], 2), "labels": labels})
 
         return results
 
 
-    def transcribe_audio(self, audio_path):
+    def transcribe_audio(self, audio):
         """
         Use OpenAI's whisper model to transcribe speech to text.
         
         Parameters:
-            audio_path (str): Path to input audio WAV file.
+            audio (Union[np.ndarray, str]): 16 kHz mono waveform from extract_audio, or a path to an audio file.
 
         Returns:
             List[Tuple[float, float, str]]: List of (start time, end time, text) segments.
         """
-        r = self.whisper_model.transcribe(audio_path, language="en")
+        if not isinstance(audio, (str, os.PathLike)):
+            audio = self.load_waveform(audio)
+            if len(audio) == 0:
+                return []
+
+        with model_registry.use(self.whisper_key):
+            r = self.whisper_model.transcribe(audio, language="en")
         segments = r.get("segments", [])
         
         results = [(s["start"], s["end"], s["text"]) for s in segments]
         
         return results
+
+    def speech_regions(self, starts, scores, threshold=0.3, pad=0.5, merge_gap=2.0,
+                       window_seconds=1.0, duration=None):
+        """
+        Merges YAMNet windows that contain speech into padded regions.
+
+        Parameters:
+            starts (torch.Tensor): Window start times in seconds [W].
+            scores (torch.Tensor): YAMNet class scores (logits) [W, classes].
+            threshold (float): Minimum speech probability for a window to count as speech.
+            pad (float): Seconds added before and after each region.
+            merge_gap (float): Regions closer than this many seconds are merged.
+            window_seconds (float): Length of a YAMNet window.
+            duration (float, optional): Length of the audio, regions are clipped to it.
+
+        Returns:
+            List[Tuple[float, float]]: (start, end) seconds of speech regions in video time.
+        """
+        if len(scores) == 0:
+            return []
+
+        speech_prob = torch.sigmoid(scores[:, SPEECH_CLASS_INDICES]).max(dim=1).values
+        speech_starts = starts[speech_prob >= threshold].tolist()
+
+        regions = []
+        for start in speech_starts:
+            region_start = max(0.0, start - pad)
+            region_end = start + window_seconds + pad
+            if duration is not None:
+                region_end = min(duration, region_end)
+            if regions and region_start - regions[-1][1] <= merge_gap:
+                regions[-1][1] = max(regions[-1][1], region_end)
+            else:
+                regions.append([region_start, region_end])
+        return [tuple(region) for region in regions]
+
+    def transcribe_speech(self, audio, regions, gap_seconds=0.5):
+        """
+        Transcribes only the given speech regions and maps the segments back to video time.
+
+        The regions are concatenated, separated by short silences, and sent to
+        Whisper as one buffer.
+
+        Parameters:
+            audio (Union[np.ndarray, str]): 16 kHz mono waveform from extract_audio, or a path to an audio file.
+            regions (List[Tuple[float, float]]): (start, end) seconds to transcribe, e.g. from speech_regions.
+            gap_seconds (float): Silence inserted between regions.
+
+        Returns:
+            List[Tuple[float, float, str]]: List of (start time, end time, text) segments in video time.
+        """
+        waveform = self.load_waveform(audio)
+        if len(waveform) == 0 or not regions:
+            return []
+
+        silence = np.zeros(int(gap_seconds * SAMPLE_RATE), dtype=np.float32)
+        pieces = []
+        offsets = []  # (start in concatenated audio, start in video, length) in seconds
+        position = 0.0
+        for start, end in regions:
+            piece = waveform[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)]
+            if len(piece) == 0:
+                continue
+            offsets.append((position, start, len(piece) / SAMPLE_RATE))
+            pieces.extend([piece, silence])
+            position += (len(piece) + len(silence)) / SAMPLE_RATE
+        if not pieces:
+            return []
+
+        def to_video_time(t):
+            for concat_start, video_start, length in reversed(offsets):
+                if t >= concat_start:
+                    return video_start + min(t - concat_start, length)
+            return offsets[0][1]
+
+        segments = self.transcribe_audio(np.concatenate(pieces))
+        return [(to_video_time(start), to_video_time(end), text) for start, end, text in segments]
@@ -0,0 +1,93 @@
+import cv2
+import torch
+from PIL import Image
+from transformers import AutoProcessor, AutoModelForVision2Seq
+
+
+# Known caption models, from most descriptive to cheapest
+CAPTION_MODELS = {
+    "blip2": "Salesforce/blip2-flan-t5-xl",
+    "blip-large": "Salesforce/blip-image-captioning-large",
+    "blip-base": "Salesforce/blip-image-captioning-base",
+}
+
+
+def select_dtype(device, requested="auto"):
+    """
+    Picks the inference dtype for a device.
+
+    float16 is only fast on GPUs; on CPU bfloat16 is used when the processor has
+    native support (AVX512-BF16 or AMX), otherwise float32.
+
+    Parameters:
+        device (str): 'cuda' or 'cpu'.
+        requested (str): 'auto' or an explicit torch dtype name such as 'float32'.
+
+    Returns:
+        torch.dtype: The dtype to load the model with.
+    """
+    if requested != "auto":
+        return getattr(torch, requested)
+    if device == "cuda":
+        return torch.float16
+    try:
+        if torch.cpu._is_avx512_bf16_supported() or torch.cpu._is_amx_tile_supported():
+            return torch.bfloat16
+    except AttributeError:
+        pass
+    return torch.float32
+
+
+class CaptionEngine:
+    def __init__(self, model_name=CAPTION_MODELS["blip2"], device="cpu", dtype="auto",
+                 batch_size=8, max_new_tokens=30):
+        """
+        Initializes a batched image captioning model.
+
+        Any image-to-text model supported by transformers' AutoModelForVision2Seq
+        can be used, e.g. the smaller BLIP models on CPU-only nodes.
+
+        Parameters:
+            model_name (str): Hugging Face model id or a key of CAPTION_MODELS.
+            device (str): 'cuda' or 'cpu'.
+            dtype (str): 'auto' or a torch dtype name.
+            batch_size (int): Number of frames per generate call.
+            max_new_tokens (int): Upper bound on the caption length in tokens.
+        """
+        self.model_name = CAPTION_MODELS.get(model_name, model_name)
+        self.device = device
+        self.dtype = select_dtype(device, dtype)
+        self.batch_size = max(1, batch_size)
+        self.max_new_tokens = max_new_tokens
+
+        self.processor = AutoProcessor.from_pretrained(self.model_name)
+        self.model = AutoModelForVision2Seq.from_pretrained(
+            self.model_name, torch_dtype=self.dtype
+        ).to(self.device)
+        self.model.eval()
+
+    def caption(self, frames):
+        """
+        Generates one caption per frame.
+
+        Parameters:
+            frames (List[np.ndarray]): BGR image frames.
+
+        Returns:
+            List[str]: Captions in frame order.
+        """
+        captions = []
+        for start in range(0, len(frames), self.batch_size):
+            images = [
+                Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+                for frame in frames[start:start + self.batch_size]
+            ]
+            inputs = self.processor(images=images, return_tensors="pt").to(self.device)
+            inputs["pixel_values"] = inputs["pixel_values"].to(self.dtype)
+            with torch.inference_mode():
+                outputs = self.model.generate(**inputs, max_new_tokens=self.max_new_tokens)
+            captions.extend(
+                caption.strip()
+                for caption in self.processor.batch_decode(outputs, skip_special_tokens=True)
+            )
+        return captions
@@ -0,0 +1,223 @@
+"""
+Pluggable inference backends for the detectors.
+
+With INFERENCE_BACKEND = "torch" the models run in eager PyTorch. With "onnx"
+YOLO and YAMNet are exported to ONNX once (next to the PyTorch weights in
+models/), optionally int8 dynamically quantized (INFERENCE_QUANTIZE), and run
+with ONNX Runtime on CPU. Only MatMul and Gemm layers are quantized, the
+convolutions stay fp32.
+
+Usage:
+    python -m video_analyzer.inference_backend export [--quantize]
+"""
+
+import argparse
+import os
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from config import INFERENCE_BACKEND, INFERENCE_QUANTIZE, ONNX_MODEL_DIR
+
+
+def backend_name(backend=INFERENCE_BACKEND, quantize=INFERENCE_QUANTIZE):
+    """Returns a label of the backend, used in model registry and stage cache keys."""
+    if backend == "onnx":
+        return "onnx-int8" if quantize else "onnx"
+    return "torch"
+
+
+def _import_onnxruntime():
+    try:
+        import onnxruntime
+    except ImportError as e:
+        raise ImportError(
+            "INFERENCE_BACKEND=onnx requires the onnx and onnxruntime packages"
+        ) from e
+    return onnxruntime
+
+
+def quantize_onnx(model_path, output_path):
+    """
+    Applies int8 dynamic quantization to the MatMul and Gemm layers of an ONNX model.
+
+    Weights are stored as int8 and activations are quantized on the fly,
+    which needs no calibration data. Convolutions are left in fp32: dynamically
+    quantized they become ConvInteger nodes, which the CPU execution provider
+    either doesn't implement for int8 weights or runs slower than fp32.
+
+    Parameters:
+        model_path (str): fp32 ONNX model.
+        output_path (str): Where to write the quantized model.
+
+    Returns:
+        str: output_path.
+    """
+    _import_onnxruntime()
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    quantize_dynamic(str(model_path), str(output_path), weight_type=QuantType.QInt8,
+                     op_types_to_quantize=["MatMul", "Gemm"])
+    return str(output_path)
+
+
+def yolo_onnx_path(weights, quantize=INFERENCE_QUANTIZE, onnx_dir=ONNX_MODEL_DIR):
+    """
+    Returns the ONNX export of YOLO weights, exporting it on first use.
+
+    Parameters:
+        weights (str): Path to the PyTorch .pt weights.
+        quantize (bool): Return the int8 dynamically quantized model.
+        onnx_dir (Path): Directory for exported models.
+
+    Returns:
+        str: Path to the ONNX model.
+    """
+    from ultralytics import YOLO
+
+    onnx_dir = Path(onnx_dir)
+    onnx_dir.mkdir(parents=True, exist_ok=True)
+    stem = Path(weights).stem
+    fp32_path = onnx_dir / f"{stem}.onnx"
+    if not fp32_path.exists():
+        # Dynamic axes so batched predictions and rectangular letterboxing work
+        exported = YOLO(weights).export(format="onnx", dynamic=True, simplify=True)
+        if Path(exported).resolve() != fp32_path.resolve():
+            os.replace(exported, fp32_path)
+    if not quantize:
+        return str(fp32_path)
+
+    int8_path = onnx_dir / f"{stem}.int8.onnx"
+    if not int8_path.exists():
+        quantize_onnx(fp32_path, int8_path)
+    return str(int8_path)
+
+
+def load_yolo(weights, device, backend=INFERENCE_BACKEND, quantize=INFERENCE_QUANTIZE):
+    """
+    Loads YOLO for the configured backend.
+
+    ultralytics runs .onnx weights through ONNX Runtime with the same pre- and
+    post-processing as the PyTorch model.
+
+    Parameters:
+        weights (str): Path to the PyTorch .pt weights.
+        device (str): 'cuda' or 'cpu'.
+        backend (str): 'torch' or 'onnx'.
+        quantize (bool): Use the int8 model with the onnx backend.
+
+    Returns:
+        ultralytics.YOLO: The model.
+    """
+    from ultralytics import YOLO
+
+    if backend == "onnx":
+        _import_onnxruntime()
+        return YOLO(yolo_onnx_path(weights, quantize), task="detect")
+    return YOLO(weights).to(device)
+
+
+def export_yamnet_onnx(model, quantize=INFERENCE_QUANTIZE, onnx_dir=ONNX_MODEL_DIR):
+    """
+    Returns the ONNX export of YAMNet, exporting it on first use.
+
+    Parameters:
+        model (torch.nn.Module): The PyTorch YAMNet model.
+        quantize (bool): Return the int8 dynamically quantized model.
+        onnx_dir (Path): Directory for exported models.
+
+    Returns:
+        str: Path to the ONNX model.
+    """
+    onnx_dir = Path(onnx_dir)
+    onnx_dir.mkdir(parents=True, exist_ok=True)
+    fp32_path = onnx_dir / "yamnet.onnx"
+    if not fp32_path.exists():
+        # One 0.96 s log-mel patch per window: [batch, 1, 96 frames, 64 mel bands]
+        dummy = torch.zeros(1, 1, 96, 64)
+        # The TorchScript exporter: the quantizer's shape inference rejects the dynamo export
+        torch.onnx.export(
+            model, dummy, str(fp32_path),
+            input_names=["patches"], output_names=["embedding", "scores"],
+            dynamic_axes={"patches": {0: "batch"}, "embedding": {0: "batch"}, "scores": {0: "batch"}},
+            opset_version=17, dynamo=False
+        )
+    if not quantize:
+        return str(fp32_path)
+
+    int8_path = onnx_dir / "yamnet.int8.onnx"
+    if not int8_path.exists():
+        quantize_onnx(fp32_path, int8_path)
+    return str(int8_path)
+
+
+class OnnxYamnet:
+    def __init__(self, model_path, num_threads=None):
+        """
+        YAMNet running on ONNX Runtime, called like the PyTorch module.
+
+        Parameters:
+            model_path (str): Path to the exported ONNX model.
+            num_threads (int, optional): Intra-op threads (defaults to torch's thread count).
+        """
+        onnxruntime = _import_onnxruntime()
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = num_threads or torch.get_num_threads()
+        self.session = onnxruntime.InferenceSession(
+            model_path, options, providers=["CPUExecutionProvider"]
+        )
+
+    def __call__(self, patches):
+        """
+        Parameters:
+            patches (torch.Tensor): Log-mel patches [N, 1, 96, 64].
+
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor]: Embeddings and class scores, like YAMNet.forward.
+        """
+        embedding, scores = self.session.run(
+            None, {"patches": patches.detach().cpu().numpy().astype(np.float32)}
+        )
+        return torch.from_numpy(embedding), torch.from_numpy(scores)
+
+    def eval(self):
+        return self
+
+
+def load_yamnet(backend=INFERENCE_BACKEND, quantize=INFERENCE_QUANTIZE):
+    """
+    Loads YAMNet for the configured backend.
+
+    Returns:
+        Callable: Model called as model(patches) -> (embedding, scores).
+    """
+    from torch_vggish_yamnet import yamnet
+
+    model = yamnet.yamnet(pretrained=True)
+    model.eval()
+    if backend == "onnx":
+        return OnnxYamnet(export_yamnet_onnx(model, quantize))
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export YOLO and YAMNet to ONNX.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export = subparsers.add_parser("export", help="Export models (and their int8 variants)")
+    export.add_argument("--quantize", action="store_true", help="Also write int8 dynamically quantized models")
+    args = parser.parse_args()
+
+    from video_analyzer.object_detector import YOLO_WEIGHTS
+    from torch_vggish_yamnet import yamnet
+
+    print(f"YOLO: {yolo_onnx_path(YOLO_WEIGHTS, quantize=False)}")
+    yamnet_model = yamnet.yamnet(pretrained=True).eval()
+    print(f"YAMNet: {export_yamnet_onnx(yamnet_model, quantize=False)}")
+    if args.quantize:
+        print(f"YOLO int8: {yolo_onnx_path(YOLO_WEIGHTS, quantize=True)}")
+        print(f"YAMNet int8: {export_yamnet_onnx(yamnet_model, quantize=True)}")
+
+
+if __name__ == "__main__":
+    main()
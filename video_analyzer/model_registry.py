@@ -0,0 +1,118 @@
+"""
+Process-wide registry of loaded models.
+
+Loading YOLO, Whisper and YAMNet takes longer than analyzing a short clip, so
+each model is loaded once per process and shared between all analyzers and
+concurrent jobs. The registry also records how long every load took so the
+API can report readiness.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class ModelRegistry:
+    def __init__(self):
+        """
+        Initialize an empty registry.
+        """
+        self._lock = threading.Lock()
+        self._models = {}
+        self._load_times = {}
+        self._load_locks = {}
+        self._use_locks = {}
+
+    def get(self, name, loader):
+        """
+        Returns the model registered under name, loading it on first use.
+
+        Concurrent callers asking for the same model wait for a single load
+        instead of loading it several times.
+
+        Parameters:
+            name (str): Unique key of the model (should include anything that changes the weights, e.g. size or device).
+            loader (Callable[[], Any]): Function that loads and returns the model.
+
+        Returns:
+            Any: The shared model instance.
+        """
+        if name in self._models:
+            return self._models[name]
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        with load_lock:
+            if name not in self._models:
+                start = time.perf_counter()
+                model = loader()
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self._models[name] = model
+                    self._load_times[name] = elapsed
+
+        return self._models[name]
+
+    @contextmanager
+    def use(self, name):
+        """
+        Context manager serializing inference on a shared model.
+
+        Models such as the ultralytics predictor keep per-call state and are not
+        safe to call from several threads at once.
+
+        Parameters:
+            name (str): Key the model was registered under.
+        """
+        with self._lock:
+            use_lock = self._use_locks.setdefault(name, threading.RLock())
+        with use_lock:
+            yield
+
+    def is_loaded(self, name):
+        """
+        Returns True if the model has already been loaded.
+        """
+        return name in self._models
+
+    def status(self):
+        """
+        Returns the loaded models and their load durations.
+
+        Returns:
+            Dict[str, Dict]: Mapping of model name to {"loaded": bool, "load_seconds": float}.
+        """
+        with self._lock:
+            return {
+                name: {"loaded": True, "load_seconds": round(seconds, 3)}
+                for name, seconds in self._load_times.items()
+            }
+
+    def clear(self):
+        """
+        Drops all loaded models (mainly useful for freeing memory).
+        """
+        with self._lock:
+            self._models.clear()
+            self._load_times.clear()
+            self._load_locks.clear()
+            self._use_locks.clear()
+
+
+model_registry = ModelRegistry()
+
+
+def warm_up_models():
+    """
+    Loads every model used by AnalyzeVideo into the shared registry.
+
+    Returns:
+        Dict[str, Dict]: Registry status after the warm-up.
+    """
+    from video_analyzer.object_detector import ObjectDetector
+    from video_analyzer.audio_detector import AudioDetector
+
+    ObjectDetector()
+    AudioDetector()
+    return model_registry.status()
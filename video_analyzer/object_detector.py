@@ -1,22 +1,41 @@
 import os
 import cv2
 import torch
-from ultralytics import YOLO
-from transformers import Blip2Processor, Blip2ForConditionalGeneration
+from video_analyzer.model_registry import model_registry
+from video_analyzer.inference_backend import backend_name, load_yolo
+from video_analyzer.caption_engine import CaptionEngine, select_dtype
+from config import YOLO_BATCH_SIZE, CAPTION_MODEL, CAPTION_DTYPE, CAPTION_BATCH_SIZE, CAPTION_MAX_NEW_TOKENS
+
+
+YOLO_WEIGHTS = "models/yolov8l.pt"
 
 
 class ObjectDetector:
-    def __init__(self, extract_captions=False):
+    def __init__(self, extract_captions=False, batch_size=YOLO_BATCH_SIZE):
+        """
+        Initializes ObjectDetector with YOLO and optionally a caption model.
+
+        Parameters:
+            extract_captions (bool): Whether to load the caption model (CAPTION_MODEL) and generate captions (default False).
+            batch_size (int): Number of frames per YOLO forward pass.
+        """
+        self.batch_size = max(1, batch_size)
         self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        self.model = YOLO("models/yolov8l.pt").to(self.device)     # small & fast
+        self.model_key = f"yolo:{YOLO_WEIGHTS}:{self.device}:{backend_name()}"
+        self.model = model_registry.get(
+            self.model_key, lambda: load_yolo(YOLO_WEIGHTS, self.device)     # small & fast
+        )
 
         self.extract_captions = extract_captions        
         if self.extract_captions:
-            # Added BLIP2 model for captioning
-            self.blip_processor = Blip2Processor.from_pretrained("Salesforce/blip2-flan-t5-xl")
-            self.blip_model = Blip2ForConditionalGeneration.from_pretrained(
-                "Salesforce/blip2-flan-t5-xl", torch_dtype=torch.float16
-            ).to(self.device)
+            # BLIP-2 by default; smaller BLIP models keep captions affordable on CPU
+            dtype = select_dtype(self.device, CAPTION_DTYPE)
+            self.caption_key = f"caption:{CAPTION_MODEL}:{self.device}:{str(dtype).replace('torch.', '')}"
+            self.caption_engine = model_registry.get(
+                self.caption_key,
+                lambda: CaptionEngine(CAPTION_MODEL, self.device, CAPTION_DTYPE,
+                                      CAPTION_BATCH_SIZE, CAPTION_MAX_NEW_TOKENS)
+            )
 
     def read_frames_from_path(self, directory_path):
         """
@@ -49,25 +68,28 @@ class ObjectDetector:
             List[List[str]]: List of detected object class names per frame.
         """
         detections = []
-        for frame in frames:
-            results = self.model.predict(frame, device=self.device, verbose=False)[0]
-            labels = [self.model.names[int(cls)] for cls in results.boxes.cls]
-            detections.append(labels)
+        with model_registry.use(self.model_key):
+            # The predictor letterboxes a list of frames and stacks them into one input tensor,
+            # so each batch is a single forward pass
+            for start in range(0, len(frames), self.batch_size):
+                batch = list(frames[start:start + self.batch_size])
+                for results in self.model.predict(batch, device=self.device, verbose=False):
+                    labels = [self.model.names[int(cls)] for cls in results.boxes.cls]
+                    detections.append(labels)
         return detections
 
     def generate_captions_from_frames(self, frames):
         """
-        Use BLIP to generate captions.
+        Use the caption engine (BLIP-2 or a smaller BLIP model) to generate captions in batches.
+
+        Parameters:
+            frames (List[np.ndarray]): A list of image frames (as NumPy arrays).
+
+        Returns:
+            List[str]: One caption per frame, or None if captions are disabled.
         """
         if not self.extract_captions:
             return None
         
-        captions = []
-        for frame in frames:
-            from PIL import Image
-            image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-            inputs = self.blip_processor(image, return_tensors="pt").to(self.device)
-            outputs = self.blip_model.generate(**inputs)
-            caption = self.blip_processor.decode(outputs[0], skip_special_tokens=True)
-            captions.append(caption)
-        return captions
+        with model_registry.use(self.caption_key):
+            return self.caption_engine.caption(frames)
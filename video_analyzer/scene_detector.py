@@ -1,11 +1,236 @@
 import os
 import cv2
+import numpy as np
+from collections import deque
 from datetime import datetime
-from scenedetect import detect, AdaptiveDetector, ContentDetector, split_video_ffmpeg
+from scenedetect import detect, AdaptiveDetector, ContentDetector, FrameTimecode, split_video_ffmpeg
+from config import SCENE_DETECTION_MODE
 
 
+# Width frames are downscaled to for content detection (scenedetect's default)
+DETECTION_WIDTH = 256
+
+
+class MidSceneBuffer:
+    def __init__(self, capacity=16, max_cut_delay=30):
+        """
+        Bounded buffer of full resolution frames around the middle of the current scene.
+
+        The midpoint of a scene that is still running only moves forward, so frames
+        before it can be dropped. The remaining frames are thinned out evenly
+        whenever the buffer is full, which bounds memory regardless of scene length.
+
+        Parameters:
+            capacity (int): Maximum number of frames kept.
+            max_cut_delay (int): Frames a detector may report a cut after it happened.
+        """
+        self.capacity = capacity
+        self.max_cut_delay = max_cut_delay
+        self.frames = deque()  # (frame_num, frame)
+        self.scene_start = 0
+        self.stride = 1
+
+    def add(self, frame_num, frame):
+        """Offer the next decoded frame."""
+        if (frame_num - self.scene_start) % self.stride == 0:
+            self.frames.append((frame_num, frame))
+
+        # Cuts can be reported late, so keep some slack before the running midpoint
+        midpoint = self.scene_start + max(0, frame_num - self.scene_start - self.max_cut_delay) / 2.0
+        while len(self.frames) > 1 and self.frames[1][0] <= midpoint:
+            self.frames.popleft()
+
+        if len(self.frames) > self.capacity:
+            self.frames = deque(list(self.frames)[::2])
+            self.stride *= 2
+
+    def take(self, scene_end):
+        """
+        Close the current scene and return the buffered frame closest to its middle.
+
+        Parameters:
+            scene_end (int): First frame number of the next scene.
+
+        Returns:
+            np.ndarray: The frame, or None if nothing was buffered.
+        """
+        middle = self.scene_start + (scene_end - self.scene_start) / 2.0
+        in_scene = [(num, frame) for num, frame in self.frames if num < scene_end]
+        best = min(in_scene, key=lambda item: abs(item[0] - middle))[1] if in_scene else None
+
+        # Frames read after the cut belong to the next scene
+        self.frames = deque((num, frame) for num, frame in self.frames if num >= scene_end)
+        self.scene_start = scene_end
+        self.stride = 1
+        return best
+
+
+def mid_scene_frames(cuts, captured, buffer, total_frames, fps):
+    """
+    Pair the frames captured for each scene with the time of the scene's middle.
+
+    Parameters:
+        cuts (List[int]): Frame numbers of the detected cuts.
+        captured (List[np.ndarray]): Frame taken from the buffer at each cut.
+        buffer (MidSceneBuffer): Buffer holding the frames of the last scene.
+        total_frames (int): Number of frames in the video.
+        fps (float): Frame rate of the video.
+
+    Returns:
+        List[Tuple[float, np.ndarray]]: (timestamp, frame) pairs.
+    """
+    # Like scenedetect.detect, a video without cuts yields no scenes
+    if not cuts:
+        return []
+    captured = captured + [buffer.take(total_frames)]
+
+    boundaries = [0] + cuts + [total_frames]
+    frames = []
+    for start, end, frame in zip(boundaries[:-1], boundaries[1:], captured):
+        if frame is not None:
+            frames.append((start / fps + (end - start) / fps / 2.0, frame))
+    return frames
+
+
+class _MergeFilter:
+    """
+    Minimum scene length as enforced by scenedetect's FlashFilter in MERGE mode.
+
+    Frames above the threshold closer together than min_scene_len (e.g. the
+    shaky seconds around a flash or an explosion) make one cut, placed at the
+    last of them once the picture has settled.
+    """
+
+    def __init__(self, min_scene_len, start):
+        self.min_scene_len = min_scene_len
+        self.last_above = start
+        self.merge_start = None
+        self.enabled = False  # Merging starts after the first cut
+
+    def update(self, frame_num, above):
+        """Returns the frame number of the cut this frame completes, or None."""
+        length_met = frame_num - self.last_above >= self.min_scene_len
+        if above:
+            self.last_above = frame_num
+        if self.merge_start is not None:
+            if length_met and not above and self.last_above - self.merge_start >= self.min_scene_len:
+                self.merge_start = None
+                return self.last_above
+            return None
+        if not above:
+            return None
+        if length_met:
+            self.enabled = True
+            return frame_num
+        if self.enabled:
+            self.merge_start = frame_num
+        return None
+
+
+class FastSceneDetector:
+    def __init__(self, width=128, frame_step=1, threshold=26.0, min_scene_len=15):
+        """
+        Experimental lightweight content detector working on small HSV frames.
+
+        The video is decoded sequentially and every sampled frame is shrunk to a
+        hundred-odd pixels wide before comparing it with the previous sample. On
+        consecutive frames the score tracks ContentDetector's closely, so the threshold
+        is on the same scale, and cuts closer than min_scene_len are merged the same way.
+        Decoding dominates the cost, so this is not faster than ContentDetector at
+        frame_step 1 (benchmarks/compare_scene_detectors.py measures about 0.8x on 720p),
+        and larger steps gain little speed for the cuts they miss.
+
+        Parameters:
+            width (int): Width in pixels sampled frames are downscaled to. At 64 pixels some
+                cuts score well below ContentDetector's.
+            frame_step (int): Compare every n-th frame, skipping the others with grab(). Frames
+                further apart differ more under camera motion, so raise the threshold with it.
+            threshold (float): Mean absolute HSV difference (0-255) that counts as a cut.
+            min_scene_len (int): Minimum scene length in frames.
+        """
+        self.width = width
+        self.frame_step = max(1, frame_step)
+        self.threshold = threshold
+        self.min_scene_len = min_scene_len
+
+    def detect(self, video_path, buffer=None, start=0.0, end=None):
+        """
+        Find scene cuts, optionally capturing mid-scene frames in the same pass.
+
+        Parameters:
+            video_path (str): Path to the input video file.
+            buffer (MidSceneBuffer, optional): Receives every sampled full resolution frame.
+            start (float): Second to start decoding at.
+            end (float, optional): Second to stop decoding at (default: end of the video).
+
+        Returns:
+            Tuple[List[int], List[np.ndarray], int, float]: Cut frame numbers, frames taken from the
+                buffer at each cut, number of frames in the video (the end frame if end is given) and its frame rate.
+        """
+        cap = None
+        try:
+            cap = cv2.VideoCapture(video_path)
+            fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+            cuts = []
+            captured = []
+            prev = None
+            frame_num = int(round(start * fps))
+            end_frame = None if end is None else int(round(end * fps))
+            flash_filter = _MergeFilter(self.min_scene_len, frame_num)
+            size = None
+            if frame_num > 0:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
+
+            while end_frame is None or frame_num < end_frame:
+                # Decode without converting the frames we skip
+                if frame_num % self.frame_step != 0:
+                    if not cap.grab():
+                        break
+                    frame_num += 1
+                    continue
+
+                ret, frame = cap.read()
+                if not ret:
+                    break
+
+                if size is None:
+                    height = max(1, round(frame.shape[0] * self.width / frame.shape[1]))
+                    size = (min(self.width, frame.shape[1]), height)
+                small = cv2.cvtColor(cv2.resize(frame, size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2HSV)
+                small = small.astype(np.int16)
+
+                if prev is not None:
+                    # Average over pixels of the per-channel absolute difference, then over H, S and V
+                    score = np.abs(small - prev).mean()
+                    cut = flash_filter.update(frame_num, score >= self.threshold)
+                    if cut is not None:
+                        cuts.append(cut)
+                        if buffer is not None:
+                            # A merged cut is reported up to min_scene_len frames late, the buffer's
+                            # max_cut_delay must cover that
+                            captured.append(buffer.take(cut))
+                prev = small
+
+                if buffer is not None:
+                    buffer.add(frame_num, frame)
+                frame_num += 1
+
+            return cuts, captured, frame_num, fps
+        finally:
+            if cap is not None:
+                cap.release()
+
 
 class SceneDetector:
+    def __init__(self, mode=SCENE_DETECTION_MODE):
+        """
+        Parameters:
+            mode (str): How extract_scenes_smart finds scenes and their frames: "single_pass" captures
+                frames while ContentDetector runs, "two_pass" detects first and then seeks to every scene,
+                "fast" uses the experimental FastSceneDetector on downscaled frames (default from config).
+        """
+        self.mode = mode
+
     def extract_scenes_by_diff(self, video_path, frame_skip=24, diff_threshold=40):
         """
         Detects scene changes in a video by comparing grayscale frame differences.
@@ -61,8 +286,12 @@ class SceneDetector:
             video_path (str): Path to the input video file.
         
         Returns:
-            List[float]: List of timestamps (in seconds) of the middle of each detected scene.
+            List[Tuple[float, np.ndarray]]: (timestamp, frame) pairs of the middle of each detected scene.
         """
+        if self.mode == "single_pass":
+            return self.extract_scenes_single_pass(video_path)
+        if self.mode == "fast":
+            return self.extract_scenes_fast(video_path)
     
         scene_list = detect(video_path, ContentDetector())
                 
@@ -72,6 +301,111 @@ class SceneDetector:
         return(self.frames_by_seconds(video_path, seconds_middle))
 
     
+    def detect_cuts(self, video_path, start=0.0, end=None):
+        """
+        Find the times of scene cuts between start and end without capturing frames.
+
+        Used by segmented processing, which takes the mid-scene frames only once
+        the cuts of all segments are known. "single_pass" and "two_pass" both use
+        ContentDetector.
+
+        Parameters:
+            video_path (str): Path to the input video file.
+            start (float): Second to start at.
+            end (float, optional): Second to stop at (default: end of the video).
+
+        Returns:
+            List[float]: Cut times in seconds.
+        """
+        if self.mode == "fast":
+            cuts, _, _, fps = FastSceneDetector().detect(video_path, start=start, end=end)
+            return [cut / fps for cut in cuts]
+
+        scene_list = detect(video_path, ContentDetector(), start_time=float(start),
+                            end_time=None if end is None else float(end))
+        # The first scene starts at start, every following one at a cut
+        return [scene[0].get_seconds() for scene in scene_list[1:]]
+
+    def extract_scenes_single_pass(self, video_path, buffer_size=16):
+        """
+        Detect scenes with ContentDetector and capture the middle frame of each scene in the same decode pass.
+
+        The video is decoded exactly once, sequentially. Each frame is downscaled for the
+        detector while the full resolution frame is offered to a MidSceneBuffer, from which
+        the frame closest to the middle of a scene is picked once its cut is confirmed.
+
+        Parameters:
+            video_path (str): Path to the input video file.
+            buffer_size (int): Maximum number of full resolution frames kept in memory.
+
+        Returns:
+            List[Tuple[float, np.ndarray]]: (timestamp, frame) pairs of the middle of each detected scene.
+        """
+        cap = None
+        try:
+            cap = cv2.VideoCapture(video_path)
+            fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+            detector = ContentDetector()
+            buffer = MidSceneBuffer(capacity=buffer_size)
+            cuts = []
+            captured = []
+            frame_num = 0
+            scale = None
+
+            def close_scenes(new_cuts):
+                for cut in new_cuts:
+                    cut_frame = cut.get_frames() if hasattr(cut, "get_frames") else int(cut)
+                    if cut_frame <= buffer.scene_start:
+                        continue
+                    captured.append(buffer.take(cut_frame))
+                    cuts.append(cut_frame)
+
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+
+                if scale is None:
+                    width = frame.shape[1]
+                    scale = width / DETECTION_WIDTH if width > DETECTION_WIDTH else 1.0
+                small = frame
+                if scale > 1.0:
+                    small = cv2.resize(
+                        frame,
+                        (max(1, round(frame.shape[1] / scale)), max(1, round(frame.shape[0] / scale))),
+                        interpolation=cv2.INTER_LINEAR
+                    )
+
+                buffer.add(frame_num, frame)
+                close_scenes(detector.process_frame(FrameTimecode(frame_num, fps), small))
+                frame_num += 1
+
+            if frame_num > 0:
+                close_scenes(detector.post_process(FrameTimecode(frame_num - 1, fps)))
+
+            return mid_scene_frames(cuts, captured, buffer, frame_num, fps)
+        finally:
+            if cap is not None:
+                cap.release()
+
+    def extract_scenes_fast(self, video_path, buffer_size=16, **detector_params):
+        """
+        Detect scenes with the experimental FastSceneDetector and capture the middle frame of each
+        scene in the same pass.
+
+        Parameters:
+            video_path (str): Path to the input video file.
+            buffer_size (int): Maximum number of full resolution frames kept in memory.
+            **detector_params: Passed to FastSceneDetector.
+
+        Returns:
+            List[Tuple[float, np.ndarray]]: (timestamp, frame) pairs of the middle of each detected scene.
+        """
+        detector = FastSceneDetector(**detector_params)
+        buffer = MidSceneBuffer(capacity=buffer_size, max_cut_delay=detector.min_scene_len)
+        cuts, captured, total_frames, fps = detector.detect(video_path, buffer)
+        return mid_scene_frames(cuts, captured, buffer, total_frames, fps)
+
     def frames_by_seconds(self, video_path, seconds):
         """
         Extracts raw frames at given timestamps.
@@ -0,0 +1,291 @@
+"""
+Segmented parallel processing for long videos.
+
+process_video runs every stage over the whole video on one core. In segmented
+mode the video is split into SEGMENT_SECONDS long time segments, each decoded
+with SEGMENT_OVERLAP seconds of context on both sides, and the stages run per
+segment in a pool of worker processes. Every segment owns the results inside
+its core (the segment without the overlap), and the cores partition the video,
+so the merged results contain nothing twice:
+
+- Scene cuts and YAMNet windows belong to the core they fall into. The overlap
+  gives the detectors the frames before a cut, and segments start on the YAMNet
+  hop grid so windows line up with an unsegmented run.
+- Mid-scene frames are only taken once the cuts of all segments are merged, so
+  a scene crossing a seam stays one scene. It is described by the segment whose
+  core contains its middle.
+- Transcript segments belong to the core containing their middle. With speech
+  gating every speech region is transcribed whole by the segment whose core
+  contains its start.
+
+The pool runs two rounds of one task per segment: scanning (scene cuts, YAMNet
+scores, ungated transcript) and describing (frames, objects, captions, gated
+transcript).
+"""
+
+import atexit
+import math
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import cv2
+import numpy as np
+import torch
+
+from config import SEGMENT_SECONDS, SEGMENT_OVERLAP, SEGMENT_WORKERS
+
+# Hop between YAMNet windows (AudioDetector.score_windows)
+YAMNET_HOP_SECONDS = 0.5
+# Longest YAMNet window, a segment's overlap must hold the windows starting at the end of its core
+YAMNET_WINDOW_SECONDS = 1.0
+
+
+def video_duration(video_path):
+    """
+    Returns the duration of a video in seconds, from its frame count and rate.
+    """
+    cap = None
+    try:
+        cap = cv2.VideoCapture(video_path)
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        return cap.get(cv2.CAP_PROP_FRAME_COUNT) / fps
+    finally:
+        if cap is not None:
+            cap.release()
+
+
+def plan_segments(duration, segment_seconds=SEGMENT_SECONDS, overlap=SEGMENT_OVERLAP):
+    """
+    Splits a video into segments.
+
+    Segment boundaries are multiples of the YAMNet hop. A remainder shorter than
+    half a segment is added to the last segment instead of becoming its own.
+
+    Parameters:
+        duration (float): Length of the video in seconds.
+        segment_seconds (float): Length of a segment's core.
+        overlap (float): Seconds decoded before and after the core.
+
+    Returns:
+        List[Tuple[float, float, float, float]]: (start, end, core_start, core_end) per segment.
+            The last core ends at infinity so nothing past the nominal duration is lost.
+    """
+    segment_seconds = max(YAMNET_HOP_SECONDS, round(segment_seconds / YAMNET_HOP_SECONDS) * YAMNET_HOP_SECONDS)
+    overlap = max(YAMNET_WINDOW_SECONDS, math.ceil(overlap / YAMNET_HOP_SECONDS) * YAMNET_HOP_SECONDS)
+    count = max(1, round(duration / segment_seconds))
+    bounds = [i * segment_seconds for i in range(count)] + [math.inf]
+
+    segments = []
+    for core_start, core_end in zip(bounds[:-1], bounds[1:]):
+        start = max(0.0, core_start - overlap)
+        end = duration if core_end == math.inf else min(duration, core_end + overlap)
+        segments.append((start, end, core_start, core_end))
+    return segments
+
+
+def owner(segments, t):
+    """Returns the index of the segment whose core contains time t."""
+    for i, (_, _, core_start, core_end) in enumerate(segments):
+        if core_start <= t < core_end:
+            return i
+    return 0
+
+
+# State of a pool worker process
+_worker = {}
+
+
+def _init_worker(settings):
+    """Splits the cores between the workers instead of every process using all of them."""
+    torch.set_num_threads(settings["threads"])
+    cv2.setNumThreads(settings["threads"])
+    _worker["settings"] = settings
+
+
+def _component(name):
+    """Returns a detector of this worker process, created on first use."""
+    if name not in _worker:
+        settings = _worker["settings"]
+        if name == "scenes":
+            from video_analyzer.scene_detector import SceneDetector
+            _worker[name] = SceneDetector(settings["scene_mode"])
+        elif name == "objects":
+            from video_analyzer.object_detector import ObjectDetector
+            _worker[name] = ObjectDetector(extract_captions=settings["extract_captions"])
+        elif name == "audio":
+            from video_analyzer.audio_detector import AudioDetector
+            _worker[name] = AudioDetector(settings["whisper_model_size"])
+    return _worker[name]
+
+
+def scan_segment(video_path, segment):
+    """
+    First round: scene cuts, YAMNet scores and (without speech gating) the transcript of a segment.
+
+    Parameters:
+        video_path (str): Path to the input video file.
+        segment (tuple): (start, end, core_start, core_end) from plan_segments.
+
+    Returns:
+        dict: Owned cut times, YAMNet window starts [W] and scores [W, classes] as arrays,
+            and the owned transcript segments (None with speech gating), all in video time.
+    """
+    start, end, core_start, core_end = segment
+    cuts = [t for t in _component("scenes").detect_cuts(video_path, start, end) if core_start <= t < core_end]
+
+    audio = _component("audio")
+    waveform = audio.extract_audio(video_path, start, end - start)
+    starts, scores = audio.score_audio(waveform)
+    starts = starts.numpy() + start
+    keep = (starts >= core_start) & (starts < core_end)
+
+    transcript = None
+    if _worker["settings"]["speech_gate"] is None:
+        transcript = [
+            (segment_start + start, segment_end + start, text)
+            for segment_start, segment_end, text in audio.transcribe_audio(waveform)
+            if core_start <= start + (segment_start + segment_end) / 2 < core_end
+        ]
+    return {"cuts": cuts, "starts": starts[keep], "scores": scores.numpy()[keep], "transcript": transcript}
+
+
+def describe_segment(video_path, times, regions):
+    """
+    Second round: mid-scene frames, their objects and captions, and the speech regions owned by a segment.
+
+    Parameters:
+        video_path (str): Path to the input video file.
+        times (List[float]): Middles of the scenes owned by the segment.
+        regions (List[Tuple[float, float]]): Speech regions owned by the segment (empty without gating).
+
+    Returns:
+        dict: Frame times, object labels, captions (None if disabled) and transcript segments.
+    """
+    frames_info = _component("scenes").frames_by_seconds(video_path, times) if times else []
+    frame_times = [t for t, _ in frames_info]
+    frames = [frame for _, frame in frames_info]
+
+    objects = _component("objects")
+    object_labels = objects.detect_objects_from_frames(frames) if frames else []
+    captions = None
+    if objects.extract_captions:
+        captions = objects.generate_captions_from_frames(frames) if frames else []
+
+    transcript = []
+    if regions:
+        audio = _component("audio")
+        # Decode only the span of the regions, a region may reach past the segment's overlap
+        offset = regions[0][0]
+        waveform = audio.extract_audio(video_path, offset, regions[-1][1] - offset)
+        transcript = [
+            (segment_start + offset, segment_end + offset, text)
+            for segment_start, segment_end, text in audio.transcribe_speech(
+                waveform, [(region_start - offset, region_end - offset) for region_start, region_end in regions]
+            )
+        ]
+    return {"frame_times": frame_times, "object_labels": object_labels, "captions": captions, "transcript": transcript}
+
+
+# Pools are reused across videos so the workers keep their models loaded
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_segment_pool(settings, workers=SEGMENT_WORKERS):
+    """
+    Returns the process pool for a set of pipeline settings, starting it on first use.
+
+    Workers are spawned rather than forked: the API forks from a process with
+    running threads, which CUDA and OpenMP do not survive.
+
+    Parameters:
+        settings (dict): Scene mode, caption and speech gate settings of the analyzer.
+        workers (int): Number of worker processes.
+
+    Returns:
+        ProcessPoolExecutor: The shared pool.
+    """
+    workers = max(1, workers)
+    key = (repr(sorted(settings.items())), workers)
+    with _pools_lock:
+        if key not in _pools:
+            settings = {**settings, "threads": max(1, (os.cpu_count() or 1) // workers)}
+            _pools[key] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=get_context("spawn"),
+                initializer=_init_worker, initargs=(settings,)
+            )
+        return _pools[key]
+
+
+@atexit.register
+def shutdown_segment_pools():
+    """Stops all worker processes."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _pools.clear()
+
+
+def process_segmented(video_path, duration, settings, audio_detector, sound_event_params,
+                      segment_seconds=SEGMENT_SECONDS, overlap=SEGMENT_OVERLAP, workers=SEGMENT_WORKERS):
+    """
+    Analyzes a video segment by segment in a process pool and merges the results.
+
+    Parameters:
+        video_path (str): Path to the input video file.
+        duration (float): Length of the video in seconds.
+        settings (dict): Pipeline settings for the workers (see get_segment_pool).
+        audio_detector (AudioDetector): Turns the merged YAMNet scores into sound events and speech regions.
+        sound_event_params (dict): top_k and threshold of the sound events.
+        segment_seconds (float): Length of a segment's core.
+        overlap (float): Seconds decoded before and after each core.
+        workers (int): Number of worker processes.
+
+    Returns:
+        dict: Frame times, object labels, captions, sound events and transcript, like AnalyzeVideo.process_video.
+    """
+    segments = plan_segments(duration, segment_seconds, overlap)
+    pool = get_segment_pool(settings, workers)
+    paths = [video_path] * len(segments)
+
+    # 1. Scene cuts and audio scores of every segment
+    scans = list(pool.map(scan_segment, paths, segments))
+
+    cuts = sorted(cut for scan in scans for cut in scan["cuts"])
+    starts = torch.from_numpy(np.concatenate([scan["starts"] for scan in scans]))
+    scores = torch.from_numpy(np.concatenate([scan["scores"] for scan in scans]))
+    sound_events = audio_detector.events_from_scores(starts, scores, **sound_event_params)
+
+    # Like a single run, a video without cuts yields no scenes
+    boundaries = [0.0] + cuts + [duration] if cuts else []
+    middles = [a + (b - a) / 2.0 for a, b in zip(boundaries[:-1], boundaries[1:])]
+    times = [[] for _ in segments]
+    for t in middles:
+        times[owner(segments, t)].append(t)
+
+    speech_gate = settings["speech_gate"]
+    regions = [[] for _ in segments]
+    if speech_gate is not None:
+        for region in audio_detector.speech_regions(starts, scores, duration=duration, **speech_gate):
+            regions[owner(segments, region[0])].append(region)
+
+    # 2. Frames, objects, captions and gated transcription of every segment
+    descriptions = list(pool.map(describe_segment, paths, times, regions))
+
+    captions = None
+    if settings["extract_captions"]:
+        captions = [caption for description in descriptions for caption in description["captions"]]
+    if speech_gate is None:
+        transcript = [segment for scan in scans for segment in scan["transcript"]]
+    else:
+        transcript = [segment for description in descriptions for segment in description["transcript"]]
+
+    return {
+        "frame_times": [t for description in descriptions for t in description["frame_times"]],
+        "object_labels": [labels for description in descriptions for labels in description["object_labels"]],
+        "captions": captions,
+        "sound_events": sound_events,
+        "transcript": sorted(transcript, key=lambda segment: segment[0])
+    }
@@ -0,0 +1,254 @@
+"""
+On-disk cache of intermediate analysis results.
+
+Every stage of AnalyzeVideo.process_video (scene frames, object detections,
+captions, sound events and transcripts) is stored under a key derived from
+(video hash, stage name, model/version, parameters). Changing a parameter of
+one stage only invalidates that stage and the stages fed by its output.
+
+The cache has a size budget; least recently used entries are evicted first.
+
+Usage:
+    python -m video_analyzer.stage_cache stats
+    python -m video_analyzer.stage_cache list [--stage STAGE] [--video HASH]
+    python -m video_analyzer.stage_cache purge [--stage STAGE] [--video HASH] [--all]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from pathlib import Path
+from config import STAGE_CACHE_DIR, STAGE_CACHE_MAX_BYTES
+
+
+class StageCache:
+    def __init__(self, root_dir=STAGE_CACHE_DIR, max_bytes=STAGE_CACHE_MAX_BYTES):
+        """
+        Initialize the cache.
+
+        Parameters:
+            root_dir (str): Directory holding the cache entries.
+            max_bytes (int): Size budget of the cache in bytes (0 disables caching).
+        """
+        self.root_dir = Path(root_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    @staticmethod
+    def make_key(video_hash, stage, version, params):
+        """
+        Derive the cache key of a stage result.
+
+        Parameters:
+            video_hash (str): Content hash of the video.
+            stage (str): Stage name, e.g. "scenes".
+            version (str): Model name/version producing the result.
+            params (dict): Parameters of the stage (must be JSON serializable).
+
+        Returns:
+            str: Hex key.
+        """
+        payload = json.dumps([video_hash, stage, version, params], sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=20).hexdigest()
+
+    def _paths(self, stage, key):
+        stage_dir = self.root_dir / stage
+        return stage_dir / f"{key}.pkl", stage_dir / f"{key}.json"
+
+    def get(self, stage, key):
+        """
+        Load a cached result.
+
+        Returns:
+            Tuple[bool, Any]: (found, value).
+        """
+        data_path, _ = self._paths(stage, key)
+        try:
+            with open(data_path, "rb") as f:
+                value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return False, None
+        # Touch so eviction treats the entry as recently used
+        try:
+            os.utime(data_path)
+        except FileNotFoundError:
+            pass
+        return True, value
+
+    def put(self, stage, key, value, meta):
+        """
+        Store a result and enforce the size budget.
+
+        Parameters:
+            stage (str): Stage name.
+            key (str): Key from make_key.
+            value (Any): Picklable result.
+            meta (dict): Description of the entry shown by the CLI.
+        """
+        data_path, meta_path = self._paths(stage, key)
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temp file first so concurrent readers never see partial data
+        tmp_path = data_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, data_path)
+
+        meta = {**meta, "stage": stage, "key": key, "size": data_path.stat().st_size, "created_at": time.time()}
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, default=str)
+
+        self.evict()
+
+    def get_or_compute(self, video_hash, stage, version, params, compute, encode=None, decode=None):
+        """
+        Return the cached result of a stage, computing and storing it on a miss.
+
+        Parameters:
+            video_hash (str): Content hash of the video (None disables caching for this call).
+            stage (str): Stage name.
+            version (str): Model name/version producing the result.
+            params (dict): Parameters of the stage.
+            compute (Callable[[], Any]): Produces the result on a miss.
+            encode (Callable[[Any], Any], optional): Converts the result before pickling.
+            decode (Callable[[Any], Any], optional): Converts a stored value back.
+
+        Returns:
+            Tuple[Any, str]: The result and its cache key (None if caching is disabled).
+        """
+        if not self.enabled or video_hash is None:
+            return compute(), None
+
+        key = self.make_key(video_hash, stage, version, params)
+        found, value = self.get(stage, key)
+        if found:
+            return (decode(value) if decode else value), key
+
+        result = compute()
+        meta = {"video_hash": video_hash, "version": version, "params": params}
+        self.put(stage, key, encode(result) if encode else result, meta)
+        return result, key
+
+    def entries(self, stage=None, video_hash=None):
+        """
+        List cache entries.
+
+        Parameters:
+            stage (str, optional): Only entries of this stage.
+            video_hash (str, optional): Only entries of this video.
+
+        Returns:
+            List[dict]: Entry metadata including size and last use time.
+        """
+        if not self.root_dir.exists():
+            return []
+        pattern = f"{stage}/*.json" if stage else "*/*.json"
+        entries = []
+        for meta_path in self.root_dir.glob(pattern):
+            data_path = meta_path.with_suffix(".pkl")
+            if not data_path.exists():
+                continue
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if video_hash and meta.get("video_hash") != video_hash:
+                continue
+            meta["size"] = data_path.stat().st_size
+            meta["last_used_at"] = data_path.stat().st_mtime
+            entries.append(meta)
+        return entries
+
+    def remove(self, entry):
+        """Delete one entry as returned by entries()."""
+        data_path, meta_path = self._paths(entry["stage"], entry["key"])
+        data_path.unlink(missing_ok=True)
+        meta_path.unlink(missing_ok=True)
+
+    def purge(self, stage=None, video_hash=None):
+        """
+        Delete matching entries.
+
+        Returns:
+            int: Number of deleted entries.
+        """
+        entries = self.entries(stage, video_hash)
+        for entry in entries:
+            self.remove(entry)
+        return len(entries)
+
+    def evict(self):
+        """
+        Delete least recently used entries until the cache fits its size budget.
+
+        Returns:
+            int: Number of evicted entries.
+        """
+        with self._lock:
+            entries = sorted(self.entries(), key=lambda e: e["last_used_at"])
+            total = sum(e["size"] for e in entries)
+            evicted = 0
+            while entries and total > self.max_bytes:
+                entry = entries.pop(0)
+                self.remove(entry)
+                total -= entry["size"]
+                evicted += 1
+            return evicted
+
+    def stats(self):
+        """
+        Summarize cache usage per stage.
+
+        Returns:
+            dict: Total size, budget and per stage entry counts and sizes.
+        """
+        stages = {}
+        for entry in self.entries():
+            stage = stages.setdefault(entry["stage"], {"entries": 0, "bytes": 0})
+            stage["entries"] += 1
+            stage["bytes"] += entry["size"]
+        return {
+            "root_dir": str(self.root_dir),
+            "max_bytes": self.max_bytes,
+            "total_bytes": sum(s["bytes"] for s in stages.values()),
+            "stages": stages
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or purge the per-stage analysis cache.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="Show cache size per stage")
+    for name in ("list", "purge"):
+        sub = subparsers.add_parser(name, help=f"{name.capitalize()} cache entries")
+        sub.add_argument("--stage", help="Only entries of this stage")
+        sub.add_argument("--video", help="Only entries of this video content hash")
+        if name == "purge":
+            sub.add_argument("--all", action="store_true", help="Purge every entry")
+    args = parser.parse_args()
+
+    cache = StageCache()
+    if args.command == "stats":
+        print(json.dumps(cache.stats(), indent=2))
+    elif args.command == "list":
+        for entry in sorted(cache.entries(args.stage, args.video), key=lambda e: e["last_used_at"]):
+            last_used = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["last_used_at"]))
+            print(f"{entry['stage']:<14} {entry['video_hash'][:16]}  {entry['size']:>12}  {last_used}  "
+                  f"{entry['version']}  {json.dumps(entry['params'], sort_keys=True)}")
+    elif args.command == "purge":
+        if not (args.stage or args.video or args.all):
+            parser.error("purge needs --stage, --video or --all")
+        print(f"Purged {cache.purge(args.stage, args.video)} entries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Analysis worker for JOB_BACKEND = "postgres".
+
+Claims analysis jobs from the jobs table (see job_store), runs them with the
+same pipeline as the API's in-process workers and writes stage progress and
+results back to the job. Start as many workers as needed, on one host or many;
+they coordinate through the database only. Workers read uploaded videos from
+the path the API saved them to, so every worker must mount the API's
+OUTPUT_DIR at the same path.
+
+SIGTERM or Ctrl+C stops the worker after its current job. If a worker dies
+mid-job, another one reclaims the job once its lease expires.
+
+Usage:
+    python worker.py [--worker-id ID] [--once]
+"""
+
+import argparse
+import signal
+import threading
+from config import POSTGRES_URL, JOB_HEARTBEAT_INTERVAL, JOB_POLL_INTERVAL, EVENT_STORE
+from job_store import JobStore, LeaseLostError, new_worker_id
+from utils.logger import setup_logger, correlation_id
+
+logger = setup_logger("worker")
+
+def run_job(kind, payload, progress):
+    """
+    Run a claimed job.
+
+    Parameters:
+        kind (str): Job kind
+        payload (dict): JSON arguments of the job
+        progress (Callable[[str], None]): Reports the stage the job entered, raises
+            LeaseLostError once the job belongs to another worker
+
+    Returns:
+        dict: JSON result of the job
+    """
+    if kind == "analyze_video":
+        from api.routes.video import analyze_video_job
+        return analyze_video_job(payload["video_path"], payload["video_filename"], payload.get("content_hash"),
+                                 progress=progress)
+    raise ValueError(f"Unknown job kind: {kind}")
+
+class Worker:
+    def __init__(self, store, worker_id=None, poll_interval=JOB_POLL_INTERVAL,
+                 heartbeat_interval=JOB_HEARTBEAT_INTERVAL, runner=run_job):
+        """
+        Initialize a worker.
+
+        Parameters:
+            store (JobStore): The job table
+            worker_id (str, optional): Id recorded on claimed jobs (default: hostname and a random suffix)
+            poll_interval (float): Seconds between claims while the queue is empty
+            heartbeat_interval (float): Seconds between lease renewals of the running job
+            runner (Callable[[str, dict, Callable], dict]): Runs a claimed job (default: run_job)
+        """
+        self.store = store
+        self.worker_id = worker_id or new_worker_id()
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.runner = runner
+        self.stopping = threading.Event()
+
+    def _heartbeat_loop(self, job_id, done, lost):
+        """Renew the lease of a job until it is done, or set lost once another worker owns it."""
+        while not done.wait(self.heartbeat_interval):
+            try:
+                if not self.store.heartbeat(job_id, self.worker_id):
+                    logger.warning(f"Lost the lease of job {job_id}, another worker may have reclaimed it")
+                    lost.set()
+                    return
+            except Exception as e:
+                # The next heartbeat retries; the lease only expires after several misses
+                logger.error(f"Heartbeat of job {job_id} failed: {e}")
+
+    def run_one(self):
+        """
+        Claim and run one job.
+
+        Returns:
+            bool: False if there was no job to claim
+        """
+        job = self.store.claim(self.worker_id)
+        if job is None:
+            return False
+
+        lost = threading.Event()
+
+        def progress(stage):
+            # Every stage renews the lease; the job must not go on (e.g. save its
+            # events or delete its upload) once another worker has reclaimed it
+            if not lost.is_set():
+                try:
+                    if not self.store.heartbeat(job["id"], self.worker_id, stage):
+                        lost.set()
+                except Exception as e:
+                    logger.error(f"Could not record stage {stage} of job {job['id']}: {e}")
+            if lost.is_set():
+                raise LeaseLostError(f"Job {job['id']} was reclaimed by another worker")
+
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat_loop, args=(job["id"], done, lost),
+                                     name=f"heartbeat-{job['id']}", daemon=True)
+        heartbeat.start()
+        result, error = None, None
+        # Everything logged while the job runs carries its id, like in the API's workers
+        with correlation_id(job["id"]):
+            try:
+                logger.info(f"Running job {job['id']} ({job['description']}, attempt {job['attempts']})")
+                result = self.runner(job["kind"], job["payload"], progress)
+            except LeaseLostError as e:
+                logger.warning(f"Stopped job {job['id']}: {e}")
+                return True
+            except Exception as e:
+                logger.error(f"Job {job['id']} failed: {str(e)}", exc_info=True)
+                error = str(e)
+            finally:
+                done.set()
+                heartbeat.join()
+
+            if self.store.finish(job["id"], self.worker_id, result, error):
+                logger.info(f"Finished job {job['id']}")
+            else:
+                logger.warning(f"Job {job['id']} was reclaimed by another worker, discarding this outcome")
+        return True
+
+    def run(self, once=False):
+        """
+        Run jobs until stopped.
+
+        Parameters:
+            once (bool): Exit after the first job
+        """
+        logger.info(f"Worker {self.worker_id} waiting for jobs")
+        try:
+            while not self.stopping.is_set():
+                try:
+                    ran = self.run_one()
+                except Exception as e:
+                    # E.g. the database restarting, keep polling
+                    logger.error(f"Could not claim a job: {e}")
+                    ran = False
+                if ran and once:
+                    break
+                if not ran:
+                    self.stopping.wait(self.poll_interval)
+        finally:
+            try:
+                self.store.unregister_worker(self.worker_id)
+            except Exception as e:
+                logger.error(f"Could not unregister worker {self.worker_id}: {e}")
+        logger.info(f"Worker {self.worker_id} stopped")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run analysis jobs from the Postgres job table.")
+    parser.add_argument("--worker-id", help="Id recorded on claimed jobs (default: hostname and a random suffix)")
+    parser.add_argument("--once", action="store_true", help="Exit after running one job")
+    args = parser.parse_args()
+
+    if EVENT_STORE == "local":
+        parser.error("EVENT_STORE=local is single-process, workers need EVENT_STORE=postgres")
+    worker = Worker(JobStore(POSTGRES_URL), args.worker_id)
+
+    def stop(signum, frame):
+        logger.info("Stopping after the current job")
+        worker.stopping.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    worker.run(once=args.once)
+
+if __name__ == "__main__":
+    main()